@@ -1,16 +1,15 @@
 import streamlit as st
-import cv2
-import numpy as np
-from PIL import Image
 import pandas as pd
-import pytesseract
-import re
 import sqlite3
 import hashlib
 import uuid
-
-# ================= OCR PATH =================
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+import job_ui
+import history_ui
+import profile_ui
+import tuning_ui
+from archive_ingest import ARCHIVE_TYPES
+from plate_pipeline import CASCADE_LABELS
+from threshold_engines import AUTO_PARAM_LABELS
 
 # ================= PAGE CONFIG =================
 st.set_page_config(page_title="Sistem Deteksi Plat Nomor", page_icon="🚗", layout="wide")
@@ -49,46 +48,12 @@ def login_user(username, password):
     )
     return cursor.fetchone()
 
-def wilayah(text):
-    if not text: return "Tidak dikenali"
-    text = re.sub(r"[^A-Z0-9]", "", text.upper())
-    peta = {
-        "BE":"Lampung","D":"Bandung","E":"Cirebon","B":"Jakarta & Sekitar",
-        "F":"Bogor","BG":"Palembang","L":"Surabaya","H":"Semarang","AB":"Yogyakarta"
-    }
-    for k,v in peta.items():
-        if text.startswith(k): return v
-    return "Wilayah tidak terdaftar"
-
-def detect(img, cmin, cmax, kw, kh, min_area, min_r, max_r):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray,(5,5),0)
-    edge = cv2.Canny(blur,cmin,cmax)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT,(kw, kh))
-    morph = cv2.morphologyEx(edge, cv2.MORPH_CLOSE, kernel)
-
-    cnts,_ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    box = img.copy()
-    plates,texts,locs = [],[],[]
-    for c in cnts:
-        if cv2.contourArea(c) > min_area:
-            x,y,w,h = cv2.boundingRect(c)
-            r = w/h if h else 0
-            if min_r < r < max_r:
-                cv2.rectangle(box,(x,y),(x+w,y+h),(0,255,0),2)
-                crop = img[y:y+h, x:x+w]
-                plates.append(crop)
-                txt = pytesseract.image_to_string(crop, config="--psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
-                clean = "".join(t for t in txt if t.isalnum())
-                texts.append(clean)
-                locs.append(wilayah(clean))
-    return box,edge,morph,plates,texts,locs
-
 # ================= SESSION =================
 if "login" not in st.session_state: st.session_state.login=False
 if "user" not in st.session_state: st.session_state.user=""
 if "results" not in st.session_state: st.session_state.results=[]
 if "uid" not in st.session_state: st.session_state.uid=str(uuid.uuid4())
+if "job_id" not in st.session_state: st.session_state.job_id=None
 if "cmin" not in st.session_state:
     st.session_state.cmin=50
     st.session_state.cmax=200
@@ -97,6 +62,12 @@ if "cmin" not in st.session_state:
     st.session_state.min_area=1500
     st.session_state.min_r=2.0
     st.session_state.max_r=6.0
+if "auto_params" not in st.session_state: st.session_state.auto_params=False
+if "cascade" not in st.session_state: st.session_state.cascade=False
+if "nms_iou" not in st.session_state: st.session_state.nms_iou=0.3
+if "quality_gate" not in st.session_state: st.session_state.quality_gate=False
+if "color_mask" not in st.session_state: st.session_state.color_mask=False
+if "verifier" not in st.session_state: st.session_state.verifier=False
 
 # ================= CSS =================
 st.markdown("""
@@ -201,35 +172,44 @@ if st.sidebar.button("Logout"):
     st.session_state.user=""
     st.stop()  # Refresh page setelah logout
 
+# ================= JOB DETEKSI =================
+def to_result(r):
+    return {"nama":r["name"],"box":r["box"],"edge":r["edge"],"morph":r["morph"],
+            "texts":r["texts"],"locs":r["locations"],"confs":r["confs"],"quality":r["quality"]}
+
+# Sambung kembali ke job yang masih berjalan setelah reload
+job_id = job_ui.current_job_id(st.session_state.user)
+if job_id: job_ui.sync_results(job_id, to_result)
+
 # ================= MENU DETEKSI =================
 if menu=="Deteksi":
     st.markdown("<div class='card'><h1>🚘 Deteksi Plat Nomor</h1></div>",unsafe_allow_html=True)
     files = st.file_uploader("Upload gambar", type=["jpg","png","jpeg"], accept_multiple_files=True)
-    if files and st.button("🚀 Jalankan Deteksi"):
-        st.session_state.results=[]
-        for f in files:
-            img = np.array(Image.open(f).convert("RGB"))
-            bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-            box,edge,morph,plates,texts,locs = detect(
-                bgr,
-                st.session_state.cmin,
-                st.session_state.cmax,
-                st.session_state.kw,
-                st.session_state.kh,
-                st.session_state.min_area,
-                st.session_state.min_r,
-                st.session_state.max_r
-            )
-            st.session_state.results.append({
-                "nama": f.name,
-                "box": cv2.cvtColor(box,cv2.COLOR_BGR2RGB),
-                "edge": edge,
-                "morph": morph,
-                "plates": plates,
-                "texts": texts,
-                "locs": locs
-            })
-        st.success("Deteksi selesai")
+    archive = st.file_uploader("Atau upload satu arsip ZIP/TAR berisi gambar", type=ARCHIVE_TYPES)
+    if (files or archive) and st.button("🚀 Jalankan Deteksi"):
+        # Deteksi berjalan sebagai job di latar belakang (job_queue.py), halaman tidak terblokir
+        params = {
+            "canny_min": st.session_state.cmin,
+            "canny_max": st.session_state.cmax,
+            "kernel_w": st.session_state.kw,
+            "kernel_h": st.session_state.kh,
+            "min_area": st.session_state.min_area,
+            "min_ratio": st.session_state.min_r,
+            "max_ratio": st.session_state.max_r,
+            "auto_params": st.session_state.auto_params,
+            "cascade": st.session_state.cascade,
+            "nms_iou": st.session_state.nms_iou,
+            "quality_gate": st.session_state.quality_gate,
+            "color_mask": st.session_state.color_mask,
+            "verifier": st.session_state.verifier,
+            "ocr_first": "raw", "ocr_psm": 7, "region": "nasional"
+        }
+        if archive:
+            job_ui.start_archive_job(st.session_state.user, archive, params, "CodeFix")
+        else:
+            job_ui.start_job(st.session_state.user, files, params, "CodeFix")
+    if st.session_state.job_id:
+        job_ui.job_panel(st.session_state.job_id, to_result)
 
 # ================= MENU HASIL =================
 elif menu=="Hasil":
@@ -241,29 +221,62 @@ elif menu=="Hasil":
         c1.image(r["box"],use_container_width=True)
         c2.image(r["edge"],caption="Edge",clamp=True)
         c3.image(r["morph"],caption="Morph",clamp=True)
-        for i in range(len(r["plates"])):
+        for i in range(len(r["texts"])):
             rows.append({
                 "Nama Gambar":r["nama"],
                 "Plat Ke":i+1,
                 "Hasil OCR":r["texts"][i],
-                "Wilayah":r["locs"][i]
+                "Keyakinan OCR":r["confs"][i],
+                "Wilayah":r["locs"][i],
+                "Kualitas":"OK"
             })
+        # Gambar yang ditolak gerbang kualitas tetap muncul di tabel beserta alasannya
+        if r["quality"]:
+            rows.append({"Nama Gambar":r["nama"],"Plat Ke":None,"Hasil OCR":"-","Keyakinan OCR":None,"Wilayah":"-","Kualitas":r["quality"]})
     if rows:
         df=pd.DataFrame(rows)
         st.dataframe(df,use_container_width=True)
         csv=df.to_csv(index=False).encode()
         st.download_button("⬇️ Download CSV",csv,"hasil_deteksi_plat.csv","text/csv")
+    history_ui.history_search_panel()
 
 # ================= MENU PARAMETER =================
 elif menu=="Parameter":
     st.markdown("<div class='card'><h1>⚙️ Parameter Deteksi</h1></div>",unsafe_allow_html=True)
-    st.session_state.cmin=st.slider("Canny Min",0,150,st.session_state.cmin)
-    st.session_state.cmax=st.slider("Canny Max",150,300,st.session_state.cmax)
-    st.session_state.kw=st.slider("Kernel Width",5,30,st.session_state.kw)
-    st.session_state.kh=st.slider("Kernel Height",3,15,st.session_state.kh)
-    st.session_state.min_area=st.slider("Min Area",500,5000,st.session_state.min_area)
-    st.session_state.min_r=st.slider("Min Ratio",1.0,4.0,st.session_state.min_r)
-    st.session_state.max_r=st.slider("Max Ratio",4.0,8.0,st.session_state.max_r)
+    # Slider dan pratinjau dalam satu fragment: geseran slider hanya memproses ulang proxy gambar uji
+    @st.fragment
+    def parameter_sliders():
+        modes=list(AUTO_PARAM_LABELS)
+        st.session_state.auto_params=st.selectbox("Mode Parameter",modes,index=modes.index(st.session_state.auto_params),format_func=AUTO_PARAM_LABELS.get)
+        # Mode otomatis: Canny dihitung per gambar, kernel dan min area diskalakan dari nilai slider (acuan 640 px)
+        auto=bool(st.session_state.auto_params)
+        st.session_state.cmin=st.slider("Canny Min",0,150,st.session_state.cmin,disabled=auto)
+        st.session_state.cmax=st.slider("Canny Max",150,300,st.session_state.cmax,disabled=auto)
+        st.session_state.kw=st.slider("Kernel Width",5,30,st.session_state.kw)
+        st.session_state.kh=st.slider("Kernel Height",3,15,st.session_state.kh)
+        st.session_state.min_area=st.slider("Min Area",500,5000,st.session_state.min_area)
+        st.session_state.min_r=st.slider("Min Ratio",1.0,4.0,st.session_state.min_r)
+        st.session_state.max_r=st.slider("Max Ratio",4.0,8.0,st.session_state.max_r)
+        # Kotak yang tumpang tindih melebihi IoU ini digabung agar satu plat hanya sekali di-OCR (0 = mati)
+        st.session_state.nms_iou=st.slider("IoU NMS",0.0,0.9,st.session_state.nms_iou,step=0.05)
+        # Kontur hanya dicari di area berwarna plat (putih/hitam/kuning/merah)
+        st.session_state.color_mask=st.checkbox("Filter Warna Plat",st.session_state.color_mask)
+        tuning_ui.pipeline_preview({"canny_min":st.session_state.cmin,"canny_max":st.session_state.cmax,
+                                    "kernel_w":st.session_state.kw,"kernel_h":st.session_state.kh,
+                                    "min_area":st.session_state.min_area,"min_ratio":st.session_state.min_r,
+                                    "max_ratio":st.session_state.max_r,"auto_params":st.session_state.auto_params,
+                                    "nms_iou":st.session_state.nms_iou,"color_mask":st.session_state.color_mask})
+    parameter_sliders()
+    # Cascade: pass murah dulu, level berat hanya untuk gambar yang belum punya plat valid
+    st.session_state.cascade=st.selectbox("Cascade Deteksi",list(CASCADE_LABELS),index=list(CASCADE_LABELS).index(st.session_state.cascade),format_func=CASCADE_LABELS.get)
+    # Gambar buram/terlalu gelap/terang/kecil dilewati sebelum deteksi dan OCR; alasannya tampil di Hasil
+    st.session_state.quality_gate=st.checkbox("Gerbang Kualitas Gambar",st.session_state.quality_gate)
+    # Kandidat yang bukan plat (jendela, gril, rambu) dibuang model HOG sebelum OCR
+    st.session_state.verifier=st.checkbox("Verifikasi Plat sebelum OCR",st.session_state.verifier)
+    job_ui.cascade_stats_panel()
+    profile_ui.profile_panel(st.session_state.user,{"cmin":"canny_min","cmax":"canny_max","kw":"kernel_w","kh":"kernel_h",
+                                                    "min_area":"min_area","min_r":"min_ratio","max_r":"max_ratio","auto_params":"auto_params","cascade":"cascade","nms_iou":"nms_iou","quality_gate":"quality_gate","color_mask":"color_mask","verifier":"verifier"})
+    profile_ui.ab_compare_panel(st.session_state.user)
 
 # ================= MENU PENJELASAN =================
 else:
@@ -7,42 +7,7 @@ from streamlit_option_menu import option_menu
 import pandas as pd
 from streamlit_lottie import st_lottie
 import requests
-
-# Fungsi untuk mendeteksi plat nomor menggunakan edge detection, morfologi, dan contour filtering
-def detect_license_plate(image, canny_min=100, canny_max=200, kernel_size=5, min_area=500, max_area=50000, aspect_ratio_min=2.0, aspect_ratio_max=5.0):
-    # Konversi ke grayscale
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    
-    # Edge detection menggunakan Canny
-    edges = cv2.Canny(gray, canny_min, canny_max)
-    
-    # Transformasi morfologi: Closing untuk mengisi celah
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
-    morph = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
-    
-    # Temukan kontur
-    contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Filter kontur berdasarkan area dan aspect ratio
-    filtered_contours = []
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if min_area < area < max_area:
-            x, y, w, h = cv2.boundingRect(cnt)
-            aspect_ratio = w / float(h)
-            if aspect_ratio_min < aspect_ratio < aspect_ratio_max:
-                filtered_contours.append(cnt)
-    
-    # Gambar bounding box pada gambar asli
-    result_image = image.copy()
-    cropped_plates = []
-    for cnt in filtered_contours:
-        x, y, w, h = cv2.boundingRect(cnt)
-        cv2.rectangle(result_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-        cropped = image[y:y+h, x:x+w]
-        cropped_plates.append(cropped)
-    
-    return result_image, cropped_plates
+from plate_pipeline import detect_license_plate
 
 # Fungsi untuk mengkonversi gambar ke bytes untuk download
 def image_to_bytes(image):
@@ -3,6 +3,13 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
+import time
+import ops_metrics
+import ops_ui
+import profile_ui
+import tuning_ui
+from param_profiles import PARAM_ALIASES, normalize_params
+from threshold_engines import ENGINE_LABELS, ENGINE_PARAMS, binarize, engine_candidates
 
 # Set page config
 st.set_page_config(page_title="Plate Detection Dashboard", layout="wide")
@@ -66,7 +73,7 @@ st.markdown("""
 
 # Sidebar navigation
 st.sidebar.title("Navigation")
-menu = ["Home", "Detection Steps", "Full Detection Process", "Settings"]
+menu = ["Home", "Detection Steps", "Full Detection Process", "Settings", "Profile A/B", "Operations"]
 choice = st.sidebar.selectbox("Menu", menu)
 
 # Initialize session state for results
@@ -81,7 +88,8 @@ default_params = {
     'kernel_h': 5,
     'min_area': 1000,
     'min_aspect': 2.0,
-    'max_aspect': 6.0
+    'max_aspect': 6.0,
+    'threshold': 'canny'
 }
 
 # Main content
@@ -155,32 +163,41 @@ elif choice == "Detection Steps":
             'kernel_h': st.session_state.get('kernel_h', 5),
             'min_area': st.session_state.get('min_area', 1000),
             'min_aspect': st.session_state.get('min_aspect', 2.0),
-            'max_aspect': st.session_state.get('max_aspect', 6.0)
+            'max_aspect': st.session_state.get('max_aspect', 6.0),
+            'threshold': st.session_state.get('threshold', 'canny'),
+            'block_size': st.session_state.get('block_size', 45),
+            'c': st.session_state.get('c', 5),
+            'sobel_ksize': st.session_state.get('sobel_ksize', 3)
         }
         
         # Function to process image with given params
         def process_steps(img, params):
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            edged = cv2.Canny(blurred, params['canny_min'], params['canny_max'])
             
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (params['kernel_w'], params['kernel_h']))
-            morph = cv2.morphologyEx(edged, cv2.MORPH_CLOSE, kernel)
-            morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
-            
-            contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            img_with_boxes = img.copy()
-            cropped_plates = []
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > params['min_area']:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    aspect_ratio = w / float(h)
-                    if params['min_aspect'] < aspect_ratio < params['max_aspect']:
-                        cv2.rectangle(img_with_boxes, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                        cropped = img[y:y+h, x:x+w]
-                        cropped_plates.append(cropped)
+            # "auto" tries engines from cheapest to most expensive until a plate is found
+            for engine in engine_candidates(blurred, params['threshold']):
+                edged = binarize(blurred, engine, params)
+                
+                kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (params['kernel_w'], params['kernel_h']))
+                morph = cv2.morphologyEx(edged, cv2.MORPH_CLOSE, kernel)
+                morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
+                
+                contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                
+                img_with_boxes = img.copy()
+                cropped_plates = []
+                for contour in contours:
+                    area = cv2.contourArea(contour)
+                    if area > params['min_area']:
+                        x, y, w, h = cv2.boundingRect(contour)
+                        aspect_ratio = w / float(h)
+                        if params['min_aspect'] < aspect_ratio < params['max_aspect']:
+                            cv2.rectangle(img_with_boxes, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                            cropped = img[y:y+h, x:x+w]
+                            cropped_plates.append(cropped)
+                if cropped_plates:
+                    break
             
             return edged, morph, img_with_boxes, cropped_plates
         
@@ -244,48 +261,57 @@ elif choice == "Full Detection Process":
     uploaded_file = st.file_uploader("Choose an image...", type=["jpg", "jpeg", "png"], key="full")
     
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        img_array = np.array(image)
-        img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        with ops_metrics.timer("decode"):
+            image = Image.open(uploaded_file)
+            img_array = np.array(image)
+            img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        t0 = time.perf_counter()
         
-        # Step 1: Edge Detection
+        # Step 1: Edge Detection (binarization engine from Settings)
         gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
         blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        canny_min = st.session_state.get('canny_min', 30)
-        canny_max = st.session_state.get('canny_max', 150)
-        edged = cv2.Canny(blurred, canny_min, canny_max)
+        engine_params = {k: st.session_state.get(k, v) for p in ENGINE_PARAMS.values() for k, v in p.items()}
+        engine_params.update(canny_min=st.session_state.get('canny_min', 30),
+                             canny_max=st.session_state.get('canny_max', 150))
         
-        # Step 2: Morphological Transformation
         kernel_w = st.session_state.get('kernel_w', 15)
         kernel_h = st.session_state.get('kernel_h', 5)
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_w, kernel_h))
-        morph = cv2.morphologyEx(edged, cv2.MORPH_CLOSE, kernel)
-        morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
-        
-        # Step 3: Contour Filtering
-        contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
         min_area = st.session_state.get('min_area', 1000)
         min_aspect = st.session_state.get('min_aspect', 2)
         max_aspect = st.session_state.get('max_aspect', 6)
         
-        img_with_boxes = img_cv.copy()
-        cropped_plates = []
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > min_area:
-                x, y, w, h = cv2.boundingRect(contour)
-                aspect_ratio = w / float(h)
-                if min_aspect < aspect_ratio < max_aspect:
-                    cv2.rectangle(img_with_boxes, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                    cropped = img_cv[y:y+h, x:x+w]
-                    cropped_plates.append(cropped)
+        for engine in engine_candidates(blurred, st.session_state.get('threshold', 'canny')):
+            edged = binarize(blurred, engine, engine_params)
+            
+            # Step 2: Morphological Transformation
+            morph = cv2.morphologyEx(edged, cv2.MORPH_CLOSE, kernel)
+            morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
+            
+            # Step 3: Contour Filtering
+            contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            
+            img_with_boxes = img_cv.copy()
+            cropped_plates = []
+            for contour in contours:
+                area = cv2.contourArea(contour)
+                if area > min_area:
+                    x, y, w, h = cv2.boundingRect(contour)
+                    aspect_ratio = w / float(h)
+                    if min_aspect < aspect_ratio < max_aspect:
+                        cv2.rectangle(img_with_boxes, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                        cropped = img_cv[y:y+h, x:x+w]
+                        cropped_plates.append(cropped)
+            if cropped_plates:
+                break
+        ops_metrics.observe("detect", (time.perf_counter() - t0) * 1000)
+        ops_metrics.count("images")
         
         # Display steps
         col1, col2, col3 = st.columns(3)
         with col1:
             st.subheader("1. Edge Detection")
-            st.image(cv2.cvtColor(edged, cv2.COLOR_GRAY2RGB), caption="Edges", use_container_width=True)
+            st.image(cv2.cvtColor(edged, cv2.COLOR_GRAY2RGB), caption=f"Edges ({ENGINE_LABELS[engine]})", use_container_width=True)
         with col2:
             st.subheader("2. Morphological Transformation")
             st.image(cv2.cvtColor(morph, cv2.COLOR_GRAY2RGB), caption="Morphed", use_container_width=True)
@@ -318,14 +344,30 @@ elif choice == "Settings":
     st.title("Settings")
     st.write("Configure detection parameters.")
     
-    # Sliders for parameters
-    st.session_state.canny_min = st.slider("Canny Min Threshold", 0, 255, st.session_state.get('canny_min', 30))
-    st.session_state.canny_max = st.slider("Canny Max Threshold", 0, 255, st.session_state.get('canny_max', 150))
-    st.session_state.kernel_w = st.slider("Kernel Width", 1, 50, st.session_state.get('kernel_w', 15))
-    st.session_state.kernel_h = st.slider("Kernel Height", 1, 50, st.session_state.get('kernel_h', 5))
-    st.session_state.min_area = st.slider("Minimum Contour Area", 100, 10000, st.session_state.get('min_area', 1000))
-    st.session_state.min_aspect = st.slider("Minimum Aspect Ratio", 1.0, 10.0, st.session_state.get('min_aspect', 2.0))
-    st.session_state.max_aspect = st.slider("Maximum Aspect Ratio", 1.0, 10.0, st.session_state.get('max_aspect', 6.0))
+    setting_keys = ('canny_min', 'canny_max', 'kernel_w', 'kernel_h', 'min_area',
+                    'min_aspect', 'max_aspect', 'threshold', 'block_size', 'c', 'sobel_ksize')
+
+    # Sliders and the preview share a fragment: moving a slider only re-runs the preview on a small proxy image
+    @st.fragment
+    def settings_sliders():
+        engines = list(ENGINE_LABELS)
+        st.session_state.threshold = st.selectbox("Binarization Method", engines,
+                                                  index=engines.index(st.session_state.get('threshold', 'canny')),
+                                                  format_func=ENGINE_LABELS.get)
+        st.session_state.block_size = st.slider("Adaptive Block Size", 3, 99, st.session_state.get('block_size', 45), step=2)
+        st.session_state.c = st.slider("Adaptive Constant C", -20, 20, st.session_state.get('c', 5))
+        st.session_state.sobel_ksize = st.select_slider("Sobel Kernel Size", [1, 3, 5, 7], st.session_state.get('sobel_ksize', 3))
+        st.session_state.canny_min = st.slider("Canny Min Threshold", 0, 255, st.session_state.get('canny_min', 30))
+        st.session_state.canny_max = st.slider("Canny Max Threshold", 0, 255, st.session_state.get('canny_max', 150))
+        st.session_state.kernel_w = st.slider("Kernel Width", 1, 50, st.session_state.get('kernel_w', 15))
+        st.session_state.kernel_h = st.slider("Kernel Height", 1, 50, st.session_state.get('kernel_h', 5))
+        st.session_state.min_area = st.slider("Minimum Contour Area", 100, 10000, st.session_state.get('min_area', 1000))
+        st.session_state.min_aspect = st.slider("Minimum Aspect Ratio", 1.0, 10.0, st.session_state.get('min_aspect', 2.0))
+        st.session_state.max_aspect = st.slider("Maximum Aspect Ratio", 1.0, 10.0, st.session_state.get('max_aspect', 6.0))
+        # Full Detection Process also applies an opening after the closing
+        params = normalize_params({k: st.session_state[k] for k in setting_keys})
+        tuning_ui.pipeline_preview(dict(params, morph_open=True))
+    settings_sliders()
     
     if st.button("Reset to Defaults"):
         st.session_state.canny_min = 30
@@ -335,4 +377,19 @@ elif choice == "Settings":
         st.session_state.min_area = 1000
         st.session_state.min_aspect = 2.0
         st.session_state.max_aspect = 6.0
+        st.session_state.threshold = 'canny'
+        st.session_state.block_size = 45
+        st.session_state.c = 5
+        st.session_state.sobel_ksize = 3
         st.success("Settings reset to defaults.")
+
+    # Profiles are stored with pipeline key names (min_aspect -> min_ratio, ...)
+    profile_ui.profile_panel("", {k: PARAM_ALIASES.get(k, k) for k in setting_keys})
+
+elif choice == "Profile A/B":
+    st.title("Profile A/B Comparison")
+    profile_ui.ab_compare_panel("")
+
+elif choice == "Operations":
+    st.title("Operations")
+    ops_ui.ops_page()
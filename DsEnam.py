@@ -1,20 +1,17 @@
 import streamlit as st
-import cv2
-import numpy as np
-from PIL import Image
 import io
 import pandas as pd
-import pytesseract
-import re
+import job_ui
+import history_ui
+from archive_ingest import ARCHIVE_TYPES
+from plate_syntax import validate_table
+from threshold_engines import AUTO_PARAM_LABELS
 
 # ================= KONFIG =================
 st.set_page_config(page_title="Deteksi Plat Nomor", layout="wide")
 
-try:
-    pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-    OCR_READY = True
-except:
-    OCR_READY = False
+# Tanpa tesseract, plate_ocr otomatis memakai OCR template bawaan
+OCR_READY = True
 
 # ================= SIDEBAR =================
 st.sidebar.title("Navigasi")
@@ -38,118 +35,54 @@ if "min_ratio" not in st.session_state:
     st.session_state.min_ratio = 2.0
 if "max_ratio" not in st.session_state:
     st.session_state.max_ratio = 6.0
-
-# ================= FUNGSI LOKASI =================
-
-def get_region(text):
-    if not text:
-        return "teks plat kosong"
-
-    # Normalisasi keras
-    text = text.upper()
-    text = re.sub(r"[^A-Z0-9]", "", text)
-
-    # Koreksi OCR umum
-    text = text.replace("8E", "BE")
-
-    if not text.startswith("BE"):
-        return "plat ini bukan dari lampung"
-
-    # Cari huruf pertama SETELAH angka
-    match = re.search(r"BE\d+([A-Z])", text)
-
-    if not match:
-        return "kode wilayah Lampung tidak dikenali"
-
-    code = match.group(1)
-
-    wilayah = {
-        "ABC": "Kota Bandar Lampung",
-        "EF": "Kabupaten Lampung Selatan",
-        "GH": "Kabupaten Lampung Tengah",
-        "JK": "Kabupaten Lampung Utara",
-        "LM": "Kabupaten Tanggamus",
-        "NP": "Kabupaten Tulang Bawang",
-        "QR": "Kabupaten Lampung Timur",
-        "ST": "Kabupaten Way Kanan",
-        "UV": "Kabupaten Pesawaran",
-        "WX": "Kabupaten Mesuji",
-        "YZ": "Kabupaten Pesisir Barat & Tulang Bawang Barat"
+if "auto_params" not in st.session_state:
+    st.session_state.auto_params = False
+
+# ================= JOB DETEKSI =================
+# Deteksi, OCR dan lokasi plat dijalankan job_queue.py memakai plate_pipeline.py
+def to_result(r):
+    return {
+        "name": r["name"],
+        "box": r["box"],
+        "edge": r["edge"],
+        "morph": r["morph"],
+        "texts": r["texts"],
+        "locations": r["locations"],
+        "confs": r["confs"]
     }
 
-    for k, v in wilayah.items():
-        if code in k:
-            return v
-
-    return "kode wilayah Lampung tidak dikenali"
-
-# ================= DETEKSI =================
-def detect_plate(img):
-    h_img, w_img = img.shape[:2]
-
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (5,5), 0)
-    edge = cv2.Canny(blur, st.session_state.canny_min, st.session_state.canny_max)
-
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (st.session_state.kernel_w, st.session_state.kernel_h))
-    morph = cv2.morphologyEx(edge, cv2.MORPH_CLOSE, kernel)
-
-    contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    box_img = img.copy()
-    plates, texts, locations = [], [], []
-
-    for c in contours:
-        if cv2.contourArea(c) > st.session_state.min_area:
-            x,y,w,h = cv2.boundingRect(c)
-            ratio = w/h if h != 0 else 0
-
-            if st.session_state.min_ratio < ratio < st.session_state.max_ratio:
-                cv2.rectangle(box_img, (x,y), (x+w,y+h), (0,255,0), 2)
-                crop = img[y:y+h, x:x+w]
-
-                plates.append(crop)
-
-                if OCR_READY:
-                    txt = pytesseract.image_to_string(
-                        crop,
-                        config="--psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-                    )
-                    text = "".join(t for t in txt if t.isalnum())
-                    texts.append(text)
-                    locations.append(get_region(text))
-                else:
-                    texts.append("-")
-                    locations.append("plat ini bukan dari lampung")
-
-    return box_img, plates, edge, morph, texts, locations
+# Sambung kembali ke job dari ?job= di URL setelah reload
+job_id = job_ui.current_job_id()
+if job_id:
+    job_ui.sync_results(job_id, to_result)
 
 # ================= MENU DETEKSI =================
 if menu == "Deteksi":
     st.title("Deteksi Plat Nomor")
 
     files = st.file_uploader("Upload gambar", type=["jpg","png","jpeg"], accept_multiple_files=True)
-
-    if st.button("Jalankan Deteksi") and files:
-        st.session_state.results = []
-
-        for f in files:
-            img = np.array(Image.open(f).convert("RGB"))
-            bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-
-            box, plates, edge, morph, texts, locations = detect_plate(bgr)
-
-            st.session_state.results.append({
-                "name": f.name,
-                "box": cv2.cvtColor(box, cv2.COLOR_BGR2RGB),
-                "edge": edge,
-                "morph": morph,
-                "plates": plates,
-                "texts": texts,
-                "locations": locations
-            })
-
-        st.success("Deteksi selesai")
+    # Untuk ribuan gambar: satu arsip, anggotanya diproses satu per satu
+    archive = st.file_uploader("Atau upload arsip ZIP/TAR", type=ARCHIVE_TYPES)
+
+    if st.button("Jalankan Deteksi") and (files or archive):
+        params = {
+            "canny_min": st.session_state.canny_min,
+            "canny_max": st.session_state.canny_max,
+            "kernel_w": st.session_state.kernel_w,
+            "kernel_h": st.session_state.kernel_h,
+            "min_area": st.session_state.min_area,
+            "min_ratio": st.session_state.min_ratio,
+            "max_ratio": st.session_state.max_ratio,
+            "auto_params": st.session_state.auto_params,
+            "ocr": OCR_READY, "ocr_first": "raw", "ocr_psm": 8, "region": "lampung"
+        }
+        if archive:
+            job_ui.start_archive_job("", archive, params, "DsEnam")
+        else:
+            job_ui.start_job("", files, params, "DsEnam")
+
+    if st.session_state.get("job_id"):
+        job_ui.job_panel(st.session_state.job_id, to_result)
 
 # ================= MENU HASIL =================
 elif menu == "Hasil":
@@ -169,24 +102,32 @@ elif menu == "Hasil":
 
         rows = []
         for r in st.session_state.results:
-            for i in range(len(r["plates"])):
+            for i in range(len(r["texts"])):
                 rows.append({
                     "Nama Gambar": r["name"],
                     "Plat Ke-": i+1,
                     "Lokasi Plat": r["locations"][i],
-                    "Hasil OCR": r["texts"][i]
+                    "Hasil OCR": r["texts"][i],
+                    "Keyakinan OCR": r["confs"][i]
                 })
 
-        df = pd.DataFrame(rows)
+        df = validate_table(pd.DataFrame(rows))
         st.dataframe(df, use_container_width=True)
 
+    history_ui.history_search_panel()
+
 # ================= MENU PARAMETER =================
 elif menu == "Parameter":
     st.title("Pengaturan Parameter")
 
     st.markdown("### Parameter Deteksi")
-    st.session_state.canny_min = st.slider("Canny Min", 0, 150, st.session_state.canny_min)
-    st.session_state.canny_max = st.slider("Canny Max", 150, 300, st.session_state.canny_max)
+    modes = list(AUTO_PARAM_LABELS)
+    st.session_state.auto_params = st.selectbox("Mode Parameter", modes, index=modes.index(st.session_state.auto_params),
+                                                format_func=AUTO_PARAM_LABELS.get)
+    # Mode otomatis: Canny dihitung per gambar, kernel dan min area diskalakan dari nilai slider (acuan 640 px)
+    auto = bool(st.session_state.auto_params)
+    st.session_state.canny_min = st.slider("Canny Min", 0, 150, st.session_state.canny_min, disabled=auto)
+    st.session_state.canny_max = st.slider("Canny Max", 150, 300, st.session_state.canny_max, disabled=auto)
     st.session_state.kernel_w = st.slider("Kernel Width", 5, 30, st.session_state.kernel_w)
     st.session_state.kernel_h = st.slider("Kernel Height", 3, 15, st.session_state.kernel_h)
     st.session_state.min_area = st.slider("Min Area", 500, 5000, st.session_state.min_area)
@@ -3,10 +3,16 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
+import time
 import zipfile
 import pandas as pd
-import pytesseract
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+import ops_metrics
+import ops_ui
+import profile_ui
+import tuning_ui
+from plate_ocr import read_plates_batch
+from plate_pipeline import rectify_plate, scale_params
+from threshold_engines import AUTO_PARAM_LABELS, ENGINE_KERNEL, ENGINE_LABELS, auto_params, binarize, engine_candidates
 
 # Set page config
 st.set_page_config(page_title="Dashboard Deteksi Plat", layout="wide")
@@ -100,7 +106,7 @@ st.markdown("""
 
 # Sidebar navigation
 st.sidebar.title("Navigasi")
-menu = ["Beranda", "Langkah Deteksi", "Hasil", "Penjelasan", "Unduh Hasil"]
+menu = ["Beranda", "Langkah Deteksi", "Hasil", "Penjelasan", "Unduh Hasil", "Bandingkan Profil", "Operasional"]
 choice = st.sidebar.selectbox("Menu", menu)
 
 # Initialize session state for results
@@ -117,34 +123,10 @@ default_params = {
     'min_aspect': 2.0,  # Lowered for more flexibility
     'max_aspect': 6.0,  # Increased for more flexibility
     'min_solidity': 0.6,  # Lowered for more tolerance
-    'max_plates': 1  # New parameter to limit to top N plates
+    'max_plates': 1,  # New parameter to limit to top N plates
+    'threshold': 'canny'
 }
 
-# Function to preprocess image for OCR
-def preprocess_for_ocr(img):
-    # Convert to grayscale if not already
-    if len(img.shape) == 3:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = img
-    
-    # Resize if too small (minimum height 50 pixels)
-    if gray.shape[0] < 50:
-        scale = 50 / gray.shape[0]
-        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
-    
-    # Apply Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-    
-    # Apply thresholding to get binary image
-    _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    
-    # Morphological operations to clean up
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-    cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-    
-    return cleaned
-
 # Main content
 if choice == "Beranda":
     st.title("Dashboard Deteksi Plat")
@@ -198,46 +180,16 @@ elif choice == "Langkah Deteksi":
     st.title("Langkah Deteksi")
     st.write("Unggah gambar untuk melihat langkah-langkah individu: Deteksi Tepi, Transformasi Morfologi, dan Penyaringan Kontur. Bandingkan sebelum (pengaturan default) dan sesudah (pengaturan kustom).")
     
-    # Sliders for custom parameters
-    st.subheader("Sesuaikan Parameter Kustom")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        canny_min = st.slider("Ambang Batas Canny Minimum", 0, 255, 50)
-        canny_max = st.slider("Ambang Batas Canny Maksimum", 0, 255, 200)
-    with col2:
-        kernel_w = st.slider("Lebar Kernel", 1, 50, 20)
-        kernel_h = st.slider("Tinggi Kernel", 1, 50, 8)
-    with col3:
-        min_area = st.slider("Luas Kontur Minimum", 100, 10000, 1500)  # Adjusted default
-        min_aspect = st.slider("Rasio Aspek Minimum", 1.0, 10.0, 2.0)  # Adjusted
-        max_aspect = st.slider("Rasio Aspek Maksimum", 1.0, 10.0, 6.0)  # Adjusted
-        min_solidity = st.slider("Soliditas Minimum", 0.0, 1.0, 0.6)  # Adjusted
-        max_plates = st.slider("Maksimal Plat Terdeteksi", 1, 10, 1)  # New slider
-    
-    custom_params = {
-        'canny_min': canny_min,
-        'canny_max': canny_max,
-        'kernel_w': kernel_w,
-        'kernel_h': kernel_h,
-        'min_area': min_area,
-        'min_aspect': min_aspect,
-        'max_aspect': max_aspect,
-        'min_solidity': min_solidity,
-        'max_plates': max_plates
-    }
-    
     uploaded_file = st.file_uploader("Pilih gambar...", type=["jpg", "jpeg", "png"], key="steps")
     
-    if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        img_array = np.array(image)
-        img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+    # Function to process image with given params (tanpa OCR untuk pratinjau proxy)
+    def process_steps(img, params, ocr=True):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
         
-        # Function to process image with given params
-        def process_steps(img, params):
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            edged = cv2.Canny(blurred, params['canny_min'], params['canny_max'])
+        # Mode auto: coba engine dari yang termurah sampai ada kandidat plat
+        for engine in engine_candidates(blurred, params['threshold']):
+            edged = binarize(blurred, engine, params)
             
             kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (params['kernel_w'], params['kernel_h']))
             morph = cv2.morphologyEx(edged, cv2.MORPH_CLOSE, kernel)
@@ -260,49 +212,148 @@ elif choice == "Langkah Deteksi":
                         aspect_ratio = max(w, h) / min(w, h) if min(w, h) > 0 else 0
                         if params['min_aspect'] < aspect_ratio < params['max_aspect']:
                             filtered_contours.append((contour, area, rect))
+            if filtered_contours:
+                break
+        
+        # Sort by area descending and take top max_plates
+        filtered_contours.sort(key=lambda x: x[1], reverse=True)
+        top_contours = filtered_contours[:params['max_plates']]
+        
+        img_with_boxes = img.copy()
+        cropped_plates = []
+        for i, (contour, _, rect) in enumerate(top_contours):
+            # Draw rotated rectangle
+            box = cv2.boxPoints(rect)
+            box = np.intp(box)
+            cv2.drawContours(img_with_boxes, [box], 0, (0, 255, 0), 2)
+            # Add green text overlay above the plate
+            text_x = int(np.min(box[:, 0]))
+            text_y = int(np.min(box[:, 1])) - 10
+            cv2.putText(img_with_boxes, f"Plat {i+1}", (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
             
-            # Sort by area descending and take top max_plates
-            filtered_contours.sort(key=lambda x: x[1], reverse=True)
-            top_contours = filtered_contours[:params['max_plates']]
-            
-            img_with_boxes = img.copy()
-            cropped_plates = []
-            plate_texts = []  # List untuk menyimpan teks OCR
-            for i, (contour, _, rect) in enumerate(top_contours):
-                # Draw rotated rectangle
-                box = cv2.boxPoints(rect)
-                box = np.int0(box)
-                cv2.drawContours(img_with_boxes, [box], 0, (0, 255, 0), 2)
-                # Add green text overlay above the plate
-                text_x = int(np.min(box[:, 0]))
-                text_y = int(np.min(box[:, 1])) - 10
-                cv2.putText(img_with_boxes, f"Plat {i+1}", (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Crop using bounding box with padding
+            # Crop diluruskan dari rotated rectangle ke tinggi tetap (bukan bounding box + padding);
+            # rect degenerate (sisi < 1 px) memakai crop sejajar sumbu seperti crop_plates
+            warped = rectify_plate(img, rect)
+            if warped is None:
                 x, y, w, h = cv2.boundingRect(contour)
-                padding = 30  # Increased padding
-                x = max(0, x - padding)
-                y = max(0, y - padding)
-                w = min(img.shape[1] - x, w + 2 * padding)
-                h = min(img.shape[0] - y, h + 2 * padding)
-                cropped = img[y:y+h, x:x+w]
-                cropped_plates.append(cropped)
-                
-                # Preprocess and OCR pada cropped image
-                try:
-                    preprocessed = preprocess_for_ocr(cropped)
-                    text = pytesseract.image_to_string(preprocessed, config='--psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
-                    cleaned_text = ''.join(c for c in text if c.isalnum()).strip()  # Clean non-alphanumeric
-                    plate_texts.append(cleaned_text if cleaned_text else "Tidak Ditemukan")
-                except Exception as e:
-                    st.warning(f"OCR gagal untuk Plat {i+1}: {str(e)}. Pastikan Tesseract terinstal dengan benar.")
-                    plate_texts.append("OCR Gagal")
+                warped = img[y:y+h, x:x+w]
+            cropped_plates.append(warped)
+        
+        if not ocr:
+            return edged, morph, img_with_boxes, cropped_plates, [], engine
+        
+        # Semua crop seukuran, jadi OCR cukup satu batch (retry per crop hanya jika keyakinan rendah)
+        try:
+            with ops_metrics.timer("ocr"):
+                reads = read_plates_batch(cropped_plates, first="prep", psm=8)
+            plate_texts = [r['text'] if r['text'] else "Tidak Ditemukan" for r in reads]
+        except Exception as e:
+            st.warning(f"OCR gagal: {str(e)}. Pastikan Tesseract terinstal dengan benar.")
+            plate_texts = ["OCR Gagal"] * len(cropped_plates)
+        
+        return edged, morph, img_with_boxes, cropped_plates, plate_texts, engine
+    
+    # Slider dan pratinjau dalam satu fragment: geseran slider hanya memproses ulang proxy kecil,
+    # perbandingan resolusi penuh di bawah baru dijalankan setelah "Terapkan"
+    @st.fragment
+    def custom_sliders():
+        # Sliders for custom parameters
+        st.subheader("Sesuaikan Parameter Kustom")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            threshold = st.selectbox("Metode Binarisasi", list(ENGINE_LABELS), format_func=ENGINE_LABELS.get)
+            auto_mode = st.selectbox("Mode Parameter", list(AUTO_PARAM_LABELS), format_func=AUTO_PARAM_LABELS.get)
+            # Parameter hanya untuk engine yang dipilih (mode auto bisa memakai semuanya)
+            canny_min, canny_max, block_size, c_value, sobel_ksize = 50, 200, 45, 5, 3
+            if threshold in ("canny", "auto") and not auto_mode:
+                canny_min = st.slider("Ambang Batas Canny Minimum", 0, 255, 50)
+                canny_max = st.slider("Ambang Batas Canny Maksimum", 0, 255, 200)
+            if threshold in ("adaptive", "auto"):
+                block_size = st.slider("Ukuran Blok Adaptive", 3, 99, 45, step=2)
+                c_value = st.slider("Konstanta C Adaptive", -20, 20, 5)
+            if threshold in ("sobel_x", "auto"):
+                sobel_ksize = st.select_slider("Ukuran Kernel Sobel", [1, 3, 5, 7], 3)
+        with col2:
+            default_kw, default_kh = ENGINE_KERNEL.get(threshold, (20, 8))
+            kernel_w = st.slider("Lebar Kernel", 1, 50, default_kw)
+            kernel_h = st.slider("Tinggi Kernel", 1, 50, default_kh)
+        with col3:
+            min_area = st.slider("Luas Kontur Minimum", 100, 10000, 1500)  # Adjusted default
+            min_aspect = st.slider("Rasio Aspek Minimum", 1.0, 10.0, 2.0)  # Adjusted
+            max_aspect = st.slider("Rasio Aspek Maksimum", 1.0, 10.0, 6.0)  # Adjusted
+            min_solidity = st.slider("Soliditas Minimum", 0.0, 1.0, 0.6)  # Adjusted
+            max_plates = st.slider("Maksimal Plat Terdeteksi", 1, 10, 1)  # New slider
+    
+        custom_params = {
+            'canny_min': canny_min,
+            'canny_max': canny_max,
+            'kernel_w': kernel_w,
+            'kernel_h': kernel_h,
+            'min_area': min_area,
+            'min_aspect': min_aspect,
+            'max_aspect': max_aspect,
+            'min_solidity': min_solidity,
+            'max_plates': max_plates,
+            'threshold': threshold,
+            'block_size': block_size,
+            'c': c_value,
+            'sobel_ksize': sobel_ksize
+        }
+        # Soliditas dan jumlah plat maksimum khusus halaman ini, tidak ikut disimpan di profil
+        with st.expander("Simpan sebagai profil"):
+            profile_ui.save_profile_form("", dict(custom_params, auto_params=auto_mode))
+        
+        if uploaded_file is not None:
+            proxy, s = tuning_ui.proxy_for(uploaded_file)
+            t0 = time.perf_counter()
+            if auto_mode:
+                proxy_blur = cv2.GaussianBlur(cv2.cvtColor(proxy, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+                proxy_params = auto_params(proxy_blur, custom_params, auto_mode)
+            else:
+                proxy_params = scale_params(custom_params, s)
+            edged, morph, detected, _, _, engine = process_steps(proxy, proxy_params, ocr=False)
+            ms = (time.perf_counter() - t0) * 1000
+            ops_metrics.observe("tuning", ms)
             
-            return edged, morph, img_with_boxes, cropped_plates, plate_texts
+            st.write("**Pratinjau Cepat (Kustom)**")
+            col1, col2, col3 = st.columns(3)
+            col1.image(edged, caption=f"Tepi ({ENGINE_LABELS[engine]})", use_container_width=True)
+            col2.image(morph, caption="Morfologi", use_container_width=True)
+            col3.image(cv2.cvtColor(detected, cv2.COLOR_BGR2RGB), caption="Deteksi", use_container_width=True)
+            st.caption(f"Proxy {proxy.shape[1]}x{proxy.shape[0]}: {ms:.0f} ms")
+            if st.button("Terapkan", type="primary"):
+                # Disimpan bersama file_id: upload baru kembali ke mode pratinjau sampai Terapkan lagi
+                st.session_state.steps_applied = (uploaded_file.file_id, custom_params, auto_mode)
+                st.rerun()
+    custom_sliders()
+    
+    applied = st.session_state.get("steps_applied")
+    if applied is not None and (uploaded_file is None or applied[0] != uploaded_file.file_id):
+        applied = None
+    if uploaded_file is not None and applied is None:
+        st.info("Klik Terapkan untuk membandingkan pengaturan default dan kustom pada resolusi penuh.")
+    
+    if uploaded_file is not None and applied is not None:
+        _, custom_params, auto_mode = applied
+        with ops_metrics.timer("decode"):
+            image = Image.open(uploaded_file)
+            img_array = np.array(image)
+            img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        
+        # Mode otomatis: ambang Canny dari gambar, kernel dan luas minimum sesuai resolusi
+        if auto_mode:
+            blurred = cv2.GaussianBlur(cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+            custom_params = auto_params(blurred, custom_params, auto_mode)
+            st.caption(f"Parameter otomatis: Canny {custom_params['canny_min']}-{custom_params['canny_max']}, "
+                       f"kernel {custom_params['kernel_w']}x{custom_params['kernel_h']}, "
+                       f"luas minimum {custom_params['min_area']}")
         
         # Process with default and custom
-        edged_default, morph_default, detected_default, crops_default, texts_default = process_steps(img_cv, default_params)
-        edged_custom, morph_custom, detected_custom, crops_custom, texts_custom = process_steps(img_cv, custom_params)
+        with ops_metrics.timer("total"):
+            edged_default, morph_default, detected_default, crops_default, texts_default, engine_default = process_steps(img_cv, default_params)
+        with ops_metrics.timer("total"):
+            edged_custom, morph_custom, detected_custom, crops_custom, texts_custom, engine_custom = process_steps(img_cv, custom_params)
+        ops_metrics.count("images", 2)
         
         # Display comparison
         st.subheader("Perbandingan: Pengaturan Default vs. Pengaturan Kustom")
@@ -311,10 +362,10 @@ elif choice == "Langkah Deteksi":
         st.subheader("1. Deteksi Tepi")
         col1, col2 = st.columns(2)
         with col1:
-            st.write("**Default**")
+            st.write(f"**Default** ({ENGINE_LABELS[engine_default]})")
             st.image(cv2.cvtColor(edged_default, cv2.COLOR_GRAY2RGB), caption="Tepi Default", use_container_width=True)
         with col2:
-            st.write("**Kustom**")
+            st.write(f"**Kustom** ({ENGINE_LABELS[engine_custom]})")
             st.image(cv2.cvtColor(edged_custom, cv2.COLOR_GRAY2RGB), caption="Tepi Kustom", use_container_width=True)
         
         # Morphological Transformation
@@ -400,4 +451,12 @@ elif choice == "Unduh Hasil":
                 mime="application/zip"
             )
     else:
-        st.write("Tidak ada hasil untuk diunduh")
\ No newline at end of file
+        st.write("Tidak ada hasil untuk diunduh")
+
+elif choice == "Bandingkan Profil":
+    st.title("Bandingkan Profil")
+    profile_ui.ab_compare_panel("")
+
+elif choice == "Operasional":
+    st.title("Operasional")
+    ops_ui.ops_page()
\ No newline at end of file
@@ -1,17 +1,17 @@
 import streamlit as st
-import cv2
-import numpy as np
-from PIL import Image
 import pandas as pd
-import pytesseract
-import re
 import uuid
 import sqlite3
 import hashlib
-
-# ================= OCR PATH (WINDOWS) =================
-# SESUAIKAN JIKA LOKASI BERBEDA
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+import job_ui
+import history_ui
+import profile_ui
+import tuning_ui
+from archive_ingest import ARCHIVE_TYPES
+from plate_ocr import backend_name
+from plate_syntax import validate_table
+from plate_pipeline import CASCADE_LABELS
+from threshold_engines import AUTO_PARAM_LABELS
 
 # ================= KONFIG =================
 st.set_page_config(page_title="Deteksi Plat Nomor", layout="wide")
@@ -81,16 +81,17 @@ if not st.session_state.logged_in:
 
 # ================= OCR CHECK =================
 try:
-    pytesseract.get_tesseract_version()
+    OCR_BACKEND = backend_name()
     OCR_READY = True
-except:
+except Exception:
+    OCR_BACKEND = "-"
     OCR_READY = False
 
 # ================= SIDEBAR =================
 st.sidebar.title("Navigasi")
 menu = st.sidebar.radio("Menu", ["Deteksi", "Hasil", "Parameter", "Penjelasan"])
 st.sidebar.write("User:", st.session_state.username)
-st.sidebar.write("OCR Ready:", OCR_READY)
+st.sidebar.write("OCR Ready:", OCR_READY, f"({OCR_BACKEND})")
 if st.sidebar.button("Logout"):
     st.session_state.logged_in = False
     st.session_state.username = ""
@@ -100,80 +101,38 @@ if st.sidebar.button("Logout"):
 defaults = {
     "canny_min": 50, "canny_max": 200,
     "kernel_w": 20, "kernel_h": 8,
-    "min_area": 1500, "min_ratio": 2.0, "max_ratio": 6.0
+    "min_area": 1500, "min_ratio": 2.0, "max_ratio": 6.0,
+    "auto_params": False, "cascade": False, "nms_iou": 0.3, "quality_gate": False,
+    "color_mask": False, "verifier": False
 }
 for k,v in defaults.items():
     if k not in st.session_state: st.session_state[k] = v
 
-# ================= LOKASI LAMPUNG =================
-def get_region(text):
-    if not text: return "teks plat kosong"
-    text = re.sub(r"[^A-Z0-9]", "", text.upper()).replace("8E","BE")
-    if not text.startswith("BE"): return "plat ini bukan dari lampung"
-    m = re.search(r"BE\d+([A-Z])", text)
-    if not m: return "kode wilayah Lampung tidak dikenali"
-    code = m.group(1)
-    wilayah = {
-        "ABC":"Kota Bandar Lampung","EF":"Kabupaten Lampung Selatan","GH":"Kabupaten Lampung Tengah",
-        "JK":"Kabupaten Lampung Utara","LM":"Kabupaten Tanggamus","NP":"Kabupaten Tulang Bawang",
-        "QR":"Kabupaten Lampung Timur","ST":"Kabupaten Way Kanan","UV":"Kabupaten Pesawaran",
-        "WX":"Kabupaten Mesuji","YZ":"Kabupaten Pesisir Barat & Tulang Bawang Barat"
-    }
-    for k,v in wilayah.items():
-        if code in k: return v
-    return "kode wilayah Lampung tidak dikenali"
-
 # ================= DETEKSI =================
-def detect_plate(img):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray,(5,5),0)
-    edge = cv2.Canny(blur, st.session_state.canny_min, st.session_state.canny_max)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT,(st.session_state.kernel_w, st.session_state.kernel_h))
-    morph = cv2.morphologyEx(edge, cv2.MORPH_CLOSE, kernel)
-
-    cnts,_ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    box_img = img.copy()
-    plates,texts,locs = [],[],[]
-
-    for c in cnts:
-        if cv2.contourArea(c) > st.session_state.min_area:
-            x,y,w,h = cv2.boundingRect(c)
-            r = w/h if h else 0
-            if st.session_state.min_ratio < r < st.session_state.max_ratio:
-                cv2.rectangle(box_img,(x,y),(x+w,y+h),(0,255,0),2)
-                crop = img[y:y+h, x:x+w]
-                plates.append(crop)
-
-                if OCR_READY:
-                    g = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-                    _,th = cv2.threshold(g,0,255,cv2.THRESH_BINARY+cv2.THRESH_OTSU)
-                    txt = pytesseract.image_to_string(
-                        th, config="--psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-                    )
-                    text = "".join(ch for ch in txt if ch.isalnum())
-                    texts.append(text)
-                    locs.append(get_region(text))
-                else:
-                    texts.append("-")
-                    locs.append("OCR tidak tersedia")
-
-    return box_img, plates, edge, morph, texts, locs
+# Pipeline (deteksi, OCR, wilayah) ada di plate_pipeline.py dan dijalankan
+# job_queue.py di latar belakang
+def job_params():
+    params = {k: st.session_state[k] for k in defaults}
+    params.update({"ocr": OCR_READY, "ocr_first": "otsu", "ocr_psm": 7, "region": "lampung"})
+    return params
+
+def to_result(r):
+    return {k: r[k] for k in ("name","box","edge","morph","texts","locations","confs","quality")}
+
+# Sambung kembali ke job yang masih berjalan setelah reload
+job_id = job_ui.current_job_id(st.session_state.username)
+if job_id: job_ui.sync_results(job_id, to_result)
 
 # ================= MENU =================
 if menu == "Deteksi":
     st.title("Deteksi Plat Nomor")
     files = st.file_uploader("Upload gambar", type=["jpg","png","jpeg"], accept_multiple_files=True)
-    if st.button("Jalankan Deteksi") and files:
-        st.session_state.results = []
-        for f in files:
-            img = np.array(Image.open(f).convert("RGB"))
-            bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-            box,plates,edge,morph,texts,locs = detect_plate(bgr)
-            st.session_state.results.append({
-                "name":f.name,"box":cv2.cvtColor(box,cv2.COLOR_BGR2RGB),
-                "edge":edge,"morph":morph,"plates":plates,"texts":texts,"locations":locs
-            })
-        st.success("Deteksi selesai")
+    archive = st.file_uploader("Atau upload arsip ZIP/TAR", type=ARCHIVE_TYPES)
+    if st.button("Jalankan Deteksi") and (files or archive):
+        if archive: job_ui.start_archive_job(st.session_state.username, archive, job_params(), "DsTuju")
+        else: job_ui.start_job(st.session_state.username, files, job_params(), "DsTuju")
+    if st.session_state.get("job_id"):
+        job_ui.job_panel(st.session_state.job_id, to_result)
 
 elif menu == "Hasil":
     st.title("Hasil Deteksi")
@@ -189,22 +148,52 @@ elif menu == "Hasil":
 
         rows=[]
         for r in st.session_state.results:
-            for i in range(len(r["plates"])):
+            for i in range(len(r["texts"])):
                 rows.append({
                     "Nama Gambar":r["name"],"Plat Ke-":i+1,
-                    "Hasil OCR":r["texts"][i],"Lokasi Plat":r["locations"][i]
+                    "Hasil OCR":r["texts"][i],"Keyakinan OCR":r["confs"][i],
+                    "Lokasi Plat":r["locations"][i],"Kualitas":"OK"
                 })
-        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+            # Gambar yang ditolak gerbang kualitas tetap muncul di tabel beserta alasannya
+            if r["quality"]:
+                rows.append({"Nama Gambar":r["name"],"Plat Ke-":None,"Hasil OCR":"-","Keyakinan OCR":None,
+                             "Lokasi Plat":"-","Kualitas":r["quality"]})
+        df = validate_table(pd.DataFrame(rows))
+        st.dataframe(df, use_container_width=True)
+        st.download_button("Download CSV", df.to_csv(index=False).encode(), "hasil_deteksi_plat.csv", "text/csv")
+    history_ui.history_search_panel()
 
 elif menu == "Parameter":
     st.title("Pengaturan Parameter")
-    st.session_state.canny_min = st.slider("Canny Min",0,150,st.session_state.canny_min)
-    st.session_state.canny_max = st.slider("Canny Max",150,300,st.session_state.canny_max)
-    st.session_state.kernel_w = st.slider("Kernel Width",5,30,st.session_state.kernel_w)
-    st.session_state.kernel_h = st.slider("Kernel Height",3,15,st.session_state.kernel_h)
-    st.session_state.min_area = st.slider("Min Area",500,5000,st.session_state.min_area)
-    st.session_state.min_ratio = st.slider("Min Ratio",1.0,4.0,st.session_state.min_ratio)
-    st.session_state.max_ratio = st.slider("Max Ratio",4.0,8.0,st.session_state.max_ratio)
+    # Slider dan pratinjau dalam satu fragment: geseran slider hanya memproses ulang proxy gambar uji
+    @st.fragment
+    def parameter_sliders():
+        modes = list(AUTO_PARAM_LABELS)
+        st.session_state.auto_params = st.selectbox("Mode Parameter",modes,index=modes.index(st.session_state.auto_params),format_func=AUTO_PARAM_LABELS.get)
+        # Mode otomatis: Canny dihitung per gambar, kernel dan min area diskalakan dari nilai slider (acuan 640 px)
+        auto = bool(st.session_state.auto_params)
+        st.session_state.canny_min = st.slider("Canny Min",0,150,st.session_state.canny_min,disabled=auto)
+        st.session_state.canny_max = st.slider("Canny Max",150,300,st.session_state.canny_max,disabled=auto)
+        st.session_state.kernel_w = st.slider("Kernel Width",5,30,st.session_state.kernel_w)
+        st.session_state.kernel_h = st.slider("Kernel Height",3,15,st.session_state.kernel_h)
+        st.session_state.min_area = st.slider("Min Area",500,5000,st.session_state.min_area)
+        st.session_state.min_ratio = st.slider("Min Ratio",1.0,4.0,st.session_state.min_ratio)
+        st.session_state.max_ratio = st.slider("Max Ratio",4.0,8.0,st.session_state.max_ratio)
+        # Kotak yang tumpang tindih melebihi IoU ini digabung agar satu plat hanya sekali di-OCR (0 = mati)
+        st.session_state.nms_iou = st.slider("IoU NMS",0.0,0.9,st.session_state.nms_iou,step=0.05)
+        # Kontur hanya dicari di area berwarna plat (putih/hitam/kuning/merah)
+        st.session_state.color_mask = st.checkbox("Filter Warna Plat",st.session_state.color_mask)
+        tuning_ui.pipeline_preview({k: st.session_state[k] for k in defaults if k not in ("cascade", "quality_gate", "verifier")})
+    parameter_sliders()
+    # Cascade: pass murah dulu, level berat hanya untuk gambar yang belum punya plat valid
+    st.session_state.cascade = st.selectbox("Cascade Deteksi",list(CASCADE_LABELS),index=list(CASCADE_LABELS).index(st.session_state.cascade),format_func=CASCADE_LABELS.get)
+    # Gambar buram/terlalu gelap/terang/kecil dilewati sebelum deteksi dan OCR; alasannya tampil di Hasil
+    st.session_state.quality_gate = st.checkbox("Gerbang Kualitas Gambar",st.session_state.quality_gate)
+    # Kandidat yang bukan plat (jendela, gril, rambu) dibuang model HOG sebelum OCR
+    st.session_state.verifier = st.checkbox("Verifikasi Plat sebelum OCR",st.session_state.verifier)
+    job_ui.cascade_stats_panel()
+    profile_ui.profile_panel(st.session_state.username, {k: k for k in defaults})
+    profile_ui.ab_compare_panel(st.session_state.username)
 
 else:
     st.markdown("""
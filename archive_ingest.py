@@ -0,0 +1,86 @@
+"""Baca gambar dari arsip ZIP/TAR satu anggota per satu.
+
+Arsip upload disalin ke disk (`spool`) sedikit demi sedikit, lalu job_queue
+hanya membaca satu anggota saat akan diproses, sehingga memori tidak
+bergantung pada jumlah gambar di dalam arsip. Anggota dirujuk dengan
+nomor urut di `ArchiveReader.members`, jadi nama ganda tetap aman.
+"""
+import os
+import shutil
+import tarfile
+import uuid
+import zipfile
+
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+ARCHIVE_TYPES = ["zip", "tar", "tgz", "gz", "bz2", "xz"]
+ARCHIVE_DIR = "archives"
+CHUNK_BYTES = 1 << 20
+# Anggota yang lebih besar dari ini ditolak (melindungi dari arsip bom)
+MAX_MEMBER_BYTES = 64 * 1024 * 1024
+
+
+def spool(fileobj, name="", dest_dir=ARCHIVE_DIR):
+    """Salin file upload ke `dest_dir` per CHUNK_BYTES, kembalikan path-nya."""
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, f"{uuid.uuid4().hex[:12]}_{os.path.basename(name) or 'arsip'}")
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(fileobj, f, CHUNK_BYTES)
+    return path
+
+
+def _is_image(name):
+    base = os.path.basename(name)
+    # Lewati metadata macOS (__MACOSX/, ._foto.jpg) dan file tersembunyi
+    return (base.lower().endswith(IMAGE_EXT) and not base.startswith(".")
+            and "__MACOSX/" not in name)
+
+
+class ArchiveReader:
+    """Daftar anggota gambar dan pembacaan satu anggota dari arsip ZIP atau TAR (boleh terkompresi)."""
+
+    def __init__(self, path):
+        self.path = path
+        if zipfile.is_zipfile(path):
+            self._zip = zipfile.ZipFile(path)
+            self._tar = None
+            self._members = [i for i in self._zip.infolist() if not i.is_dir() and _is_image(i.filename)]
+        elif tarfile.is_tarfile(path):
+            self._zip = None
+            self._tar = tarfile.open(path, "r:*")
+            self._members = [m for m in self._tar.getmembers() if m.isfile() and _is_image(m.name)]
+        else:
+            raise ValueError("file bukan arsip ZIP/TAR")
+
+    @property
+    def members(self):
+        return [m.filename if self._zip else m.name for m in self._members]
+
+    def read(self, idx):
+        """Bytes anggota ke-`idx`; anggota TAR paling cepat dibaca berurutan."""
+        m = self._members[idx]
+        size = m.file_size if self._zip else m.size
+        if size > MAX_MEMBER_BYTES:
+            raise ValueError(f"anggota arsip terlalu besar ({size // (1024 * 1024)} MB)")
+        if self._zip:
+            return self._zip.read(m)
+        f = self._tar.extractfile(m)
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def close(self):
+        (self._zip or self._tar).close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def list_images(path):
+    with ArchiveReader(path) as reader:
+        return reader.members
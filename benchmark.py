@@ -0,0 +1,125 @@
+"""Bandingkan kecepatan mesin deteksi plat pada sekumpulan gambar.
+
+Contoh:
+    python benchmark.py contoh.jpeg folder_gambar/ --engines canny integral --repeat 5
+    python benchmark.py folder_gambar/ --cascade            # satu pass vs cascade (deteksi + OCR)
+    python benchmark.py data.pack --cascade                 # frame dari image_pack.py, tanpa decode
+"""
+import argparse
+import os
+import statistics
+import time
+
+import cv2
+
+from image_pack import ImagePack
+from plate_pipeline import CASCADE_STATS, DETECTION_ENGINES, process_batch
+
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+
+
+def load_images(paths, truth=None):
+    """Decode semua gambar sekali di awal agar waktu decode tidak ikut terukur.
+
+    File .pack (image_pack.py) tidak di-decode: frame-nya view memmap, dan
+    ground truth-nya ditambahkan ke `truth` jika diberikan.
+    """
+    images = []
+    for p in paths:
+        if p.endswith(".pack"):
+            pack = ImagePack(p)
+            if pack.mode == "encoded":
+                for name, frame in pack:
+                    img = cv2.imdecode(frame, cv2.IMREAD_COLOR)
+                    if img is not None:
+                        images.append((name, img))
+            else:
+                images.extend(pack)
+            if truth is not None:
+                truth.update(pack.truth)
+            continue
+        files = [os.path.join(p, f) for f in sorted(os.listdir(p))] if os.path.isdir(p) else [p]
+        for f in files:
+            if f.lower().endswith(IMAGE_EXT):
+                img = cv2.imread(f, cv2.IMREAD_COLOR)
+                if img is not None:
+                    images.append((os.path.basename(f), img))
+    return images
+
+
+def run_engine(fn, images, repeat=3, **params):
+    times, plates = [], []
+    for _, img in images:
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            _, crops = fn(img, **params)
+            elapsed = (time.perf_counter() - t0) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best)
+        plates.append(len(crops))
+    return times, plates
+
+
+def run_pipeline(images, cascade, repeat=3, truth=None):
+    """Waktu process_batch (deteksi + OCR) per gambar dan jumlah gambar dengan plat valid.
+
+    Dengan `truth`, yang dihitung hanya gambar berlabel: apakah semua plat ground truth-nya terbaca.
+    """
+    times, plates = [], []
+    for name, img in images:
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = process_batch([img], [{"cascade": cascade}])[0]
+            elapsed = (time.perf_counter() - t0) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best)
+        if truth:
+            if name in truth:
+                plates.append(int(set(truth[name]) <= set(out["texts"])))
+        else:
+            plates.append(int(any(out["valid"])))
+    return times, plates
+
+
+def report_cascade():
+    snap = CASCADE_STATS.snapshot()
+    for r in snap["levels"]:
+        print(f"  {r['level']:<11} masuk={r['images']:<5} hit={r['hits']:<5} ({r['hit_rate']:.0%})  "
+              f"{r['ms_per_image']:8.1f} ms/gambar  porsi waktu={r['time_share']:.0%}")
+    print(f"  tanpa plat valid setelah level terakhir: {snap['unresolved']}")
+
+
+def report(name, times, plates):
+    # plates kosong jika ada ground truth tetapi tidak satu pun nama frame cocok
+    rate = f"plat/gambar={statistics.mean(plates):.2f}" if plates else "tidak ada frame berlabel"
+    print(f"{name:<10} mean={statistics.mean(times):8.2f} ms  median={statistics.median(times):8.2f} ms  "
+          f"max={max(times):8.2f} ms  {rate}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark mesin deteksi plat")
+    ap.add_argument("paths", nargs="+", help="file gambar atau folder")
+    ap.add_argument("--engines", nargs="+", default=list(DETECTION_ENGINES), choices=list(DETECTION_ENGINES))
+    ap.add_argument("--repeat", type=int, default=3, help="ulangan per gambar, diambil waktu terbaik")
+    ap.add_argument("--cascade", nargs="?", const=True, default=None,
+                    help="bandingkan satu pass dengan cascade (opsional: daftar level dipisah koma)")
+    args = ap.parse_args()
+
+    truth = {}
+    images = load_images(args.paths, truth)
+    if not images:
+        raise SystemExit("Tidak ada gambar yang bisa dibaca")
+    print(f"{len(images)} gambar, repeat={args.repeat}")
+    if args.cascade:
+        # Kolom plat/gambar di sini = rasio gambar dengan plat valid, atau yang cocok ground truth (recall)
+        if truth:
+            print(f"ground truth untuk {len(truth)} gambar")
+        report("satu pass", *run_pipeline(images, False, args.repeat, truth))
+        CASCADE_STATS.reset()
+        report("cascade", *run_pipeline(images, args.cascade, args.repeat, truth))
+        report_cascade()
+        raise SystemExit
+    for name in args.engines:
+        report(name, *run_engine(DETECTION_ENGINES[name], images, args.repeat))
@@ -0,0 +1,286 @@
+"""Layanan HTTP/JSON lokal untuk pipeline deteksi + OCR + wilayah.
+
+Jalankan server:
+    python detection_service.py --port 8600
+
+Uji dengan client lokal:
+    python detection_service.py --client contoh.jpeg --port 8600
+
+Endpoint:
+    POST /detect   {"name": "...", "image": "<base64>", "params": {...}}
+    GET  /health   status singkat
+    GET  /metrics  counter, statistik batch dan statistik per level cascade
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import plate_verifier
+from plate_pipeline import CASCADE_STATS, decode_gray, decode_image, process_batch, validate_params
+
+# ================= KONFIG =================
+HOST = "127.0.0.1"
+PORT = 8600
+WORKERS = 2
+MAX_BATCH = 8
+BATCH_WAIT_MS = 20
+MAX_QUEUE = 64
+REQUEST_TIMEOUT = 30.0
+# Batas atas "timeout" yang boleh diminta client per request (detik)
+MAX_TIMEOUT = 300.0
+MAX_BODY = 20 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+               500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class DetectionService:
+    """Front end asyncio + worker pool dengan micro-batching.
+
+    Setiap request masuk ke antrian terbatas (backpressure: antrian penuh
+    langsung dibalas 503). Batcher mengambil hingga MAX_BATCH request yang
+    datang dalam BATCH_WAIT_MS lalu memprosesnya sebagai satu batch di worker
+    pool, sehingga deteksi dan OCR berbagi satu panggilan per batch.
+    """
+
+    def __init__(self, workers=WORKERS, max_batch=MAX_BATCH, batch_wait_ms=BATCH_WAIT_MS,
+                 max_queue=MAX_QUEUE, timeout=REQUEST_TIMEOUT):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.started = time.time()
+        self.metrics = {
+            "requests": 0, "ok": 0, "errors": 0, "rejected": 0, "timeouts": 0,
+            "batches": 0, "batched_items": 0, "images": 0, "plates": 0,
+            "latency_ms_total": 0.0,
+        }
+
+    # ---------- batching ----------
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.batcher = asyncio.create_task(self._batch_loop())
+        # Model verifier (bila ada) dimuat sekali saat start, bukan di request pertama
+        if os.path.exists(plate_verifier.MODEL_PATH):
+            plate_verifier.get_model()
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Request yang sudah timeout atau dibatalkan tidak ikut diproses
+            batch = [item for item in batch if not item["future"].done()]
+            if not batch:
+                continue
+            await self.slots.acquire()
+            asyncio.create_task(self._run_batch(batch))
+
+    def _process(self, batch):
+        """process_batch untuk satu batch; jika gagal, setiap item diulang sendiri agar
+        error satu request tidak ikut dikirim ke request lain di batch yang sama."""
+        try:
+            return process_batch([item["image"] for item in batch], [item["params"] for item in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                return [e]
+        outputs = []
+        for item in batch:
+            try:
+                outputs.append(process_batch([item["image"]], [item["params"]])[0])
+            except Exception as e:
+                outputs.append(e)
+        return outputs
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            outputs = await loop.run_in_executor(self.pool, self._process, batch)
+            self.metrics["batches"] += 1
+            self.metrics["batched_items"] += len(batch)
+            for item, out in zip(batch, outputs):
+                if item["future"].done():
+                    continue
+                if isinstance(out, Exception):
+                    item["future"].set_exception(out)
+                else:
+                    item["future"].set_result(out)
+        finally:
+            self.slots.release()
+
+    async def detect(self, payload):
+        # Parameter dan timeout dicek sebelum masuk antrian: request yang salah dibalas 400 sendiri
+        if not isinstance(payload, dict):
+            raise ValueError("body harus berupa objek JSON")
+        params = validate_params(payload.get("params"))
+        timeout = payload.get("timeout", self.timeout)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout <= MAX_TIMEOUT:
+            raise ValueError(f"timeout harus angka di antara 0 dan {MAX_TIMEOUT} detik")
+
+        raw = payload.get("image")
+        try:
+            data = base64.b64decode(raw, validate=True) if isinstance(raw, str) else b""
+        except binascii.Error:
+            data = b""
+        # Layanan hanya mengembalikan kotak dan teks, jadi cukup decode grayscale; color_mask butuh BGR
+        image = (decode_image(data) if params["color_mask"] else decode_gray(data)) if data else None
+        if image is None:
+            return 400, {"error": "gambar tidak valid"}
+
+        loop = asyncio.get_running_loop()
+        item = {"image": image, "params": params, "future": loop.create_future()}
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.metrics["rejected"] += 1
+            return 503, {"error": "antrian penuh, coba lagi"}
+
+        t0 = time.perf_counter()
+        try:
+            out = await asyncio.wait_for(item["future"], timeout)
+        except asyncio.TimeoutError:
+            self.metrics["timeouts"] += 1
+            return 504, {"error": "waktu proses habis"}
+
+        elapsed = (time.perf_counter() - t0) * 1000
+        self.metrics["ok"] += 1
+        self.metrics["images"] += 1
+        self.metrics["plates"] += len(out["boxes"])
+        self.metrics["latency_ms_total"] += elapsed
+        plates = [
+            {"box": list(box), "text": text, "conf": conf, "region": loc}
+            for box, text, conf, loc in zip(out["boxes"], out["texts"], out["confs"], out["locations"])
+        ]
+        return 200, {"name": payload.get("name", ""), "plates": plates, "quality": out["quality"],
+                     "elapsed_ms": round(elapsed, 1)}
+
+    # ---------- endpoint ----------
+    def health(self):
+        return {"status": "ok", "uptime_s": round(time.time() - self.started, 1),
+                "queue_depth": self.queue.qsize(), "workers": self.workers}
+
+    def snapshot(self):
+        m = dict(self.metrics)
+        m["queue_depth"] = self.queue.qsize()
+        m["avg_batch_size"] = round(m["batched_items"] / m["batches"], 2) if m["batches"] else 0
+        m["avg_latency_ms"] = round(m["latency_ms_total"] / m["ok"], 1) if m["ok"] else 0
+        m["cascade"] = CASCADE_STATS.snapshot()
+        return m
+
+    async def route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, self.health()
+        if method == "GET" and path == "/metrics":
+            return 200, self.snapshot()
+        if method == "POST" and path == "/detect":
+            self.metrics["requests"] += 1
+            try:
+                payload = json.loads(body or b"{}")
+                return await self.detect(payload)
+            except (ValueError, TypeError) as e:
+                self.metrics["errors"] += 1
+                return 400, {"error": str(e)}
+            except Exception as e:
+                self.metrics["errors"] += 1
+                return 500, {"error": str(e)}
+        return 404, {"error": "endpoint tidak ada"}
+
+    # ---------- HTTP minimal ----------
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                writer.close()
+                return
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                status, resp = 413, {"error": "body terlalu besar"}
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, resp = await self.route(method, path.split("?")[0], body)
+        except (ValueError, asyncio.IncompleteReadError):
+            status, resp = 400, {"error": "request tidak valid"}
+
+        data = json.dumps(resp).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        await self.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Layanan deteksi berjalan di http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+# ================= CLIENT LOKAL =================
+def detect_file(path, host=HOST, port=PORT, params=None, timeout=REQUEST_TIMEOUT):
+    with open(path, "rb") as f:
+        payload = {"name": path, "image": base64.b64encode(f.read()).decode(), "params": params or {}}
+    req = urllib.request.Request(
+        f"http://{host}:{port}/detect", data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(req, timeout=timeout + 5) as resp:
+        return json.loads(resp.read())
+
+
+def get_json(endpoint, host=HOST, port=PORT):
+    with urllib.request.urlopen(f"http://{host}:{port}{endpoint}", timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Layanan HTTP deteksi plat nomor")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    ap.add_argument("--batch-wait-ms", type=int, default=BATCH_WAIT_MS)
+    ap.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    ap.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    ap.add_argument("--client", nargs="*", help="kirim gambar ke server yang sudah berjalan")
+    args = ap.parse_args()
+
+    if args.client is not None:
+        for p in args.client:
+            print(json.dumps(detect_file(p, args.host, args.port), indent=2))
+        print(json.dumps(get_json("/metrics", args.host, args.port), indent=2))
+    else:
+        service = DetectionService(args.workers, args.max_batch, args.batch_wait_ms,
+                                   args.max_queue, args.timeout)
+        asyncio.run(service.serve(args.host, args.port))
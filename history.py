@@ -0,0 +1,269 @@
+"""Riwayat deteksi plat dan pencarian teks plat.
+
+Semua hasil deteksi yang sudah selesai (job UI, ingest folder, dll)
+disimpan di tabel `detections` pada database yang sama dengan users.
+
+Pencarian memakai `plate_key`, yaitu teks plat yang dinormalisasi sehingga
+salah baca OCR yang umum (8/B, 0/O, 1/I, 5/S, 2/Z, 6/G) menghasilkan kunci
+yang sama, ditambah indeks trigram untuk toleransi salah/kurang karakter.
+
+Contoh:
+    python history.py "BE 1234 AB"
+    python history.py "BE1234" --region "Kota Bandar Lampung" --exact
+"""
+import argparse
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+DB_PATH = "users.db"
+
+# Karakter yang sering tertukar oleh OCR dipetakan ke satu bentuk kanonik
+CONFUSIONS = str.maketrans({"8": "B", "0": "O", "1": "I", "5": "S", "2": "Z", "6": "G"})
+
+
+def plate_key(text):
+    return re.sub(r"[^A-Z0-9]", "", (text or "").upper()).translate(CONFUSIONS)
+
+
+def trigrams(key):
+    padded = f"^{key}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein; jika `limit` diberikan, berhenti begitu jarak pasti > limit."""
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if limit is not None and min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+# ================= DATABASE =================
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    init_history(conn)
+    return conn
+
+
+def init_history(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS detections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT,
+        owner TEXT,
+        image_name TEXT,
+        plate_index INTEGER,
+        plate_text TEXT,
+        confidence REAL,
+        region TEXT,
+        created_at REAL,
+        plate_key TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS plate_trigrams (
+        trigram TEXT,
+        detection_id INTEGER
+    )
+    """)
+    # Jumlah posting per trigram, dipakai untuk memilih trigram paling jarang saat mencari
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS trigram_stats (
+        trigram TEXT PRIMARY KEY,
+        n INTEGER
+    )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(detections)")}
+    if "plate_key" not in columns:
+        _add_plate_key(conn)
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_text ON detections(plate_text)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_key ON detections(plate_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_region ON detections(region, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_created ON detections(created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trigrams ON plate_trigrams(trigram, detection_id)")
+    conn.commit()
+
+
+def _add_plate_key(conn):
+    """Migrasi database lama: tambah kolom plate_key dan isi indeks trigram."""
+    conn.execute("ALTER TABLE detections ADD COLUMN plate_key TEXT")
+    rows = conn.execute("SELECT id, plate_text FROM detections").fetchall()
+    keys = [(plate_key(text), i) for i, text in rows]
+    conn.executemany("UPDATE detections SET plate_key=? WHERE id=?", keys)
+    _index_trigrams(conn, [(i, key) for key, i in keys])
+
+
+def _index_trigrams(conn, items):
+    postings = [(g, i) for i, key in items for g in trigrams(key)]
+    conn.executemany("INSERT INTO plate_trigrams VALUES (?,?)", postings)
+    conn.executemany(
+        "INSERT INTO trigram_stats VALUES (?, 1) ON CONFLICT(trigram) DO UPDATE SET n = n + 1",
+        [(g,) for g, _ in postings]
+    )
+
+
+def record_detections(conn, source, owner, image_name, texts, confs, locations, created_at=None):
+    """Simpan satu baris per plat yang terdeteksi pada satu gambar."""
+    created_at = created_at or time.time()
+    items = []
+    for i, (t, c, loc) in enumerate(zip(texts, confs, locations)):
+        key = plate_key(t)
+        cur = conn.execute(
+            "INSERT INTO detections (source, owner, image_name, plate_index, plate_text, confidence, region, "
+            "created_at, plate_key) VALUES (?,?,?,?,?,?,?,?,?)",
+            (source, owner, image_name, i + 1, t, c, loc, created_at, key)
+        )
+        items.append((cur.lastrowid, key))
+    _index_trigrams(conn, items)
+    conn.commit()
+
+
+# ================= PENCARIAN =================
+SEARCH_COLUMNS = ("id", "source", "owner", "image_name", "plate_index", "plate_text",
+                  "confidence", "region", "created_at", "plate_key")
+
+
+def _filters(region, since, until):
+    sql, args = [], []
+    if region:
+        sql.append("region = ?")
+        args.append(region)
+    if since:
+        sql.append("created_at >= ?")
+        args.append(since)
+    if until:
+        sql.append("created_at < ?")
+        args.append(until)
+    return sql, args
+
+
+def search_plates(conn, query, region=None, since=None, until=None, fuzzy=True, max_distance=1, limit=100):
+    """Cari deteksi berdasarkan teks plat.
+
+    Mode exact mencocokkan awalan `plate_key` (jadi "BE1234" juga menemukan
+    "BE1234AB") lewat indeks. Mode fuzzy mengambil kandidat dari indeks
+    trigram lalu menyaring dengan edit distance <= `max_distance`.
+    Hasil diurutkan dari yang paling mirip, lalu yang paling baru.
+
+    Satu edit merusak paling banyak 3 trigram, jadi plat dengan jarak <= d
+    pasti memuat minimal satu dari 3d+1 trigram query mana pun. Karena itu
+    kandidat cukup diambil dari 3d+1 trigram yang paling jarang. Query yang
+    trigramnya kurang dari 3d+1 tidak punya jaminan itu, jadi dipindai
+    langsung (hanya disaring panjangnya).
+
+    Query yang lebih pendek dari plat tersimpan ("BE 1234" untuk "BE1234AB")
+    juga dicocokkan sebagai awalan/potongan kunci; hasilnya ditandai
+    `partial` dan diurutkan setelah hasil penuh dengan jarak yang sama.
+    """
+    key = plate_key(query)
+    if not key:
+        return []
+    cols = ", ".join(f"d.{c}" for c in SEARCH_COLUMNS)
+    where, args = _filters(region, since, until)
+    where = [f"d.{w}" for w in where]
+
+    if not fuzzy:
+        sql = (f"SELECT {cols} FROM detections d WHERE d.plate_key >= ? AND d.plate_key < ? "
+               + "".join(f"AND {w} " for w in where) + "ORDER BY d.created_at DESC LIMIT ?")
+        rows = conn.execute(sql, [key, key + "~"] + args + [limit]).fetchall()
+        return [dict(zip(SEARCH_COLUMNS, r), distance=0, partial=False) for r in rows]
+
+    grams = sorted(trigrams(key))
+    counts = dict(conn.execute(
+        f"SELECT trigram, n FROM trigram_stats WHERE trigram IN ({','.join('?' * len(grams))})", grams
+    ).fetchall())
+    # Tahap 1: hanya id + kunci kandidat, disaring panjangnya di SQL
+    if len(grams) > 3 * max_distance:
+        # Trigram yang tidak pernah muncul berarti posting kosong, paling murah
+        grams = sorted(grams, key=lambda g: counts.get(g, 0))[:3 * max_distance + 1]
+        sql = (f"SELECT d.id, d.plate_key, d.created_at FROM detections d WHERE d.id IN ("
+               f"SELECT detection_id FROM plate_trigrams WHERE trigram IN ({','.join('?' * len(grams))})) "
+               # '+' mencegah SQLite memilih indeks region/waktu di atas indeks trigram
+               + "".join(f"AND +{w} " for w in where))
+    else:
+        # Kunci pendek: semua trigramnya bisa rusak, jadi pindai langsung
+        grams = []
+        sql = "SELECT d.id, d.plate_key, d.created_at FROM detections d WHERE 1 " + "".join(f"AND {w} " for w in where)
+    candidates = conn.execute(
+        sql + "AND length(d.plate_key) BETWEEN ? AND ?",
+        grams + args + [len(key) - max_distance, len(key) + max_distance]
+    ).fetchall()
+
+    scored = []
+    for det_id, cand, created_at in candidates:
+        dist = edit_distance(key, cand, max_distance)
+        if dist <= max_distance:
+            scored.append((dist, False, -created_at, det_id))
+
+    if len(scored) < limit:
+        scored += _partial_matches(conn, key, counts, where, args, {s[-1] for s in scored}, limit - len(scored))
+    scored.sort()
+    scored = scored[:limit]
+    if not scored:
+        return []
+
+    # Tahap 2: ambil baris lengkap hanya untuk hasil akhir
+    ids = [det_id for *_, det_id in scored]
+    rows = {r[0]: r for r in conn.execute(
+        f"SELECT {cols} FROM detections d WHERE d.id IN ({','.join('?' * len(ids))})", ids
+    )}
+    return [dict(zip(SEARCH_COLUMNS, rows[det_id]), distance=dist, partial=partial)
+            for dist, partial, _, det_id in scored]
+
+
+def _partial_matches(conn, key, counts, where, args, found, limit):
+    """Paling banyak `limit` plat terbaru yang lebih panjang dari query dan memuat `key` sebagai awalan/potongan."""
+    inner = [key[i:i + 3] for i in range(len(key) - 2)]
+    if inner:
+        # Potongan pasti memuat semua trigram query tanpa ^/$; ambil yang paling jarang
+        gram = min(inner, key=lambda g: counts.get(g, 0))
+        sql = ("SELECT d.id, d.created_at FROM detections d WHERE d.id IN ("
+               "SELECT detection_id FROM plate_trigrams WHERE trigram = ?) AND instr(d.plate_key, ?) > 0 ")
+        sql_args = [gram, key]
+    else:
+        # Kurang dari 3 karakter: hanya awalan. Awalan sependek ini cocok dengan sebagian besar
+        # riwayat, jadi '+' membuat SQLite menelusuri indeks created_at dan berhenti di LIMIT
+        # alih-alih mengurutkan semua plat berawalan sama
+        sql = "SELECT d.id, d.created_at FROM detections d WHERE +d.plate_key >= ? AND +d.plate_key < ? "
+        sql_args = [key, key + "~"]
+    sql += ("AND length(d.plate_key) > ? " + "".join(f"AND +{w} " for w in where)
+            + "ORDER BY d.created_at DESC LIMIT ?")
+    # Baris yang sudah ditemukan pencarian penuh ikut terambil lalu dibuang, jadi ambil lebih
+    rows = conn.execute(sql, sql_args + [len(key)] + args + [limit + len(found)]).fetchall()
+    return [(0, True, -created_at, det_id) for det_id, created_at in rows if det_id not in found][:limit]
+
+
+def list_regions(conn):
+    return [r[0] for r in conn.execute("SELECT DISTINCT region FROM detections WHERE region IS NOT NULL ORDER BY region")]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Cari plat di riwayat deteksi")
+    ap.add_argument("query")
+    ap.add_argument("--region")
+    ap.add_argument("--exact", action="store_true", help="tanpa toleransi salah karakter")
+    ap.add_argument("--distance", type=int, default=1)
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+
+    conn = connect(args.db)
+    t0 = time.perf_counter()
+    hits = search_plates(conn, args.query, args.region, fuzzy=not args.exact,
+                         max_distance=args.distance, limit=args.limit)
+    elapsed = (time.perf_counter() - t0) * 1000
+    for h in hits:
+        ts = datetime.fromtimestamp(h["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{ts}  {h['plate_text']:<12} {h['region']:<30} {h['source']}/{h['image_name']}  (jarak {h['distance']}{', sebagian' if h['partial'] else ''})")
+    print(f"{len(hits)} hasil dalam {elapsed:.1f} ms")
@@ -0,0 +1,37 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import history
+
+
+# ================= PENCARIAN RIWAYAT =================
+def history_search_panel():
+    st.markdown("## Cari Riwayat Plat")
+    conn = history.connect()
+    c1, c2, c3 = st.columns([3, 2, 1])
+    query = c1.text_input("Teks plat", key="hist_query", placeholder="BE 1234 AB")
+    region = c2.selectbox("Wilayah", ["Semua"] + history.list_regions(conn), key="hist_region")
+    exact = c3.checkbox("Persis", key="hist_exact", help="Tanpa toleransi salah baca OCR selain 8/B, 0/O, 1/I, 5/S, 2/Z, 6/G")
+
+    if query:
+        t0 = time.perf_counter()
+        hits = history.search_plates(conn, query, None if region == "Semua" else region, fuzzy=not exact)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if hits:
+            st.dataframe(pd.DataFrame([{
+                "Waktu": datetime.fromtimestamp(h["created_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "Hasil OCR": h["plate_text"],
+                "Wilayah": h["region"],
+                "Sumber": h["source"],
+                "Nama Gambar": h["image_name"],
+                "Keyakinan OCR": h["confidence"],
+                "Selisih Karakter": h["distance"],
+                "Cocok Sebagian": "Ya" if h["partial"] else "",
+            } for h in hits]), use_container_width=True)
+        else:
+            st.info("Plat tidak ditemukan di riwayat")
+        st.caption(f"{len(hits)} hasil dalam {elapsed:.1f} ms")
+    conn.close()
@@ -0,0 +1,157 @@
+"""Dataset gambar terkemas untuk benchmark dan sweep parameter.
+
+Satu folder gambar dikemas menjadi satu file `.pack` berisi piksel mentah
+(grayscale/BGR yang sudah di-decode, opsional diskalakan) atau bytes JPG/PNG
+asli, dengan indeks offset di `<pack>.json` dan ground truth di
+`<pack>.truth.json`. `ImagePack` membuka file lewat np.memmap, jadi setiap
+frame adalah view ke halaman file (zero-copy) dan evaluasi berulang tidak
+lagi menghabiskan waktu untuk membaca dan men-decode JPEG.
+
+Contoh:
+    python image_pack.py pack folder_gambar/ data.pack --mode gray --scale 0.5 --truth label.csv
+    python image_pack.py info data.pack
+    python benchmark.py data.pack --cascade
+"""
+import argparse
+import csv
+import json
+import os
+
+import cv2
+import numpy as np
+
+PACK_VERSION = 1
+MODES = ("gray", "bgr", "encoded")
+# Setiap frame dimulai di offset kelipatan ALIGN
+ALIGN = 64
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+
+
+def index_path(path):
+    return path + ".json"
+
+
+def truth_path(path):
+    return path + ".truth.json"
+
+
+def iter_files(paths):
+    for p in paths:
+        files = [os.path.join(p, f) for f in sorted(os.listdir(p))] if os.path.isdir(p) else [p]
+        for f in files:
+            if f.lower().endswith(IMAGE_EXT):
+                with open(f, "rb") as fh:
+                    yield os.path.basename(f), fh.read()
+
+
+def load_truth(path):
+    """Ground truth {nama file: [plat, ...]} dari JSON atau CSV (kolom name, plate; plat ganda dipisah ';')."""
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            raw = json.load(f)
+        return {k: [v] if isinstance(v, str) else list(v) for k, v in raw.items()}
+    with open(path, newline="") as f:
+        return {row["name"]: [p.strip() for p in row["plate"].split(";") if p.strip()] for row in csv.DictReader(f)}
+
+
+# ================= MENGEMAS =================
+def pack_images(paths, out_path, mode="gray", scale=1.0, truth=None):
+    """Kemas gambar dari `paths` ke `out_path`; mengembalikan (jumlah frame, nama file yang gagal)."""
+    if mode not in MODES:
+        raise ValueError(f"mode tidak dikenal: {mode}")
+    flag = cv2.IMREAD_GRAYSCALE if mode == "gray" else cv2.IMREAD_COLOR
+    entries, failed = [], []
+    with open(out_path, "wb") as f:
+        for name, data in iter_files(paths):
+            if mode == "encoded":
+                buf, shape = data, [len(data)]
+            else:
+                img = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+                if img is None:
+                    failed.append(name)
+                    continue
+                if scale != 1:
+                    img = cv2.resize(img, None, fx=scale, fy=scale,
+                                     interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+                buf, shape = np.ascontiguousarray(img).data, list(img.shape)
+            f.write(b"\0" * (-f.tell() % ALIGN))
+            entries.append({"name": name, "offset": f.tell(), "shape": shape})
+            f.write(buf)
+
+    with open(index_path(out_path), "w") as f:
+        json.dump({"version": PACK_VERSION, "mode": mode, "scale": scale, "entries": entries}, f)
+    if truth:
+        with open(truth_path(out_path), "w") as f:
+            json.dump({e["name"]: truth[e["name"]] for e in entries if e["name"] in truth}, f)
+    return len(entries), failed
+
+
+# ================= MEMBACA =================
+class ImagePack:
+    """Frame dari file .pack sebagai view np.memmap (read-only, tanpa salinan)."""
+
+    def __init__(self, path):
+        with open(index_path(path)) as f:
+            meta = json.load(f)
+        if meta.get("version") != PACK_VERSION:
+            raise ValueError(f"versi pack tidak didukung: {meta.get('version')}")
+        self.path = path
+        self.mode = meta["mode"]
+        self.scale = meta["scale"]
+        self.entries = meta["entries"]
+        self.names = [e["name"] for e in self.entries]
+        self.truth = {}
+        if os.path.exists(truth_path(path)):
+            with open(truth_path(path)) as f:
+                self.truth = json.load(f)
+        self._mm = np.memmap(path, np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, np.uint8)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def frame(self, idx):
+        """Array grayscale/BGR, atau array bytes terenkode pada mode "encoded"."""
+        e = self.entries[idx]
+        view = self._mm[e["offset"]:e["offset"] + int(np.prod(e["shape"]))]
+        return view if self.mode == "encoded" else view.reshape(e["shape"])
+
+    __getitem__ = frame
+
+    def __iter__(self):
+        for i, name in enumerate(self.names):
+            yield name, self.frame(i)
+
+    def close(self):
+        self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Kemas folder gambar ke satu file memory-mapped")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="kemas gambar")
+    p.add_argument("paths", nargs="+", help="file gambar atau folder, diikuti file .pack tujuan")
+    p.add_argument("--mode", default="gray", choices=MODES)
+    p.add_argument("--scale", type=float, default=1.0, help="skala tetap saat pre-decode (mode gray/bgr)")
+    p.add_argument("--truth", help="CSV (name,plate) atau JSON ground truth")
+    i = sub.add_parser("info", help="ringkasan isi pack")
+    i.add_argument("pack")
+    args = ap.parse_args()
+
+    if args.cmd == "pack":
+        *sources, out = args.paths
+        if not sources:
+            ap.error("butuh minimal satu sumber gambar dan satu file .pack tujuan")
+        n, failed = pack_images(sources, out, args.mode, args.scale, load_truth(args.truth) if args.truth else None)
+        print(f"{n} frame dikemas ke {out} ({os.path.getsize(out) / 1e6:.1f} MB, mode {args.mode})")
+        for name in failed:
+            print(f"  dilewati (bukan gambar valid): {name}")
+    else:
+        with ImagePack(args.pack) as pack:
+            print(f"{len(pack)} frame, mode {pack.mode}, skala {pack.scale}, "
+                  f"{os.path.getsize(args.pack) / 1e6:.1f} MB, ground truth untuk {len(pack.truth)} frame")
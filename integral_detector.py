@@ -0,0 +1,167 @@
+import cv2
+import numpy as np
+
+# ================= DETEKTOR INTEGRAL IMAGE =================
+# Alternatif untuk Canny + MORPH_CLOSE + findContours. Plat nomor adalah area
+# kecil dengan banyak tepi vertikal (tepi karakter), jadi peta gradien Sobel-x
+# dihitung sekali, dibuat integral image-nya, lalu setiap jendela berbentuk
+# plat dinilai dengan 4 lookup (O(1)) secara tervektor untuk beberapa skala.
+
+# Sisi terpanjang gambar kerja; gambar lebih besar diperkecil dulu
+WORK_SIZE = 800
+N_SCALES = 4
+STRIDE_FRAC = 0.25
+# Lebar cincin konteks di sekitar jendela, relatif terhadap tinggi jendela
+RING_FRAC = 0.5
+# Kandidat harus memiliki skor minimal sebagian ini dari skor terbaik
+MIN_REL_SCORE = 0.5
+
+
+def gradient_integral(gray, pad=0):
+    gx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+    grad = cv2.convertScaleAbs(gx)
+    if pad:
+        grad = cv2.copyMakeBorder(grad, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=0)
+    return cv2.integral(grad, sdepth=cv2.CV_64F)
+
+
+def shrink(gray, scale):
+    """Perkecil dengan pyrDown (cepat) selama masih >= 2x, sisanya INTER_AREA."""
+    if scale >= 1:
+        return gray
+    size = (int(round(gray.shape[1] * scale)), int(round(gray.shape[0] * scale)))
+    work = gray
+    while work.shape[1] >= 2 * size[0]:
+        work = cv2.pyrDown(work)
+    return cv2.resize(work, size, interpolation=cv2.INTER_AREA)
+
+
+def grid_sums(ii, y0, x0, bh, bw, ny, nx, stride):
+    """Jumlah piksel kotak bh x bw pada grid (y0 + i*stride, x0 + j*stride).
+
+    Karena jendela tersusun teratur, keempat pojok cukup diambil dengan
+    slicing ber-stride (view, tanpa fancy indexing).
+    """
+    ys0 = slice(y0, y0 + (ny - 1) * stride + 1, stride)
+    ys1 = slice(y0 + bh, y0 + bh + (ny - 1) * stride + 1, stride)
+    xs0 = slice(x0, x0 + (nx - 1) * stride + 1, stride)
+    xs1 = slice(x0 + bw, x0 + bw + (nx - 1) * stride + 1, stride)
+    return ii[ys1, xs1] - ii[ys0, xs1] - ii[ys1, xs0] + ii[ys0, xs0]
+
+
+def window_scores(ii, pad, win_w, win_h, stride):
+    """Grid skor semua jendela win_w x win_h (baris i = y i*stride, kolom j = x j*stride).
+
+    Skornya kepadatan gradien di dalam jendela dikurangi di cincin sekitarnya.
+
+    `ii` adalah integral image dari peta gradien yang diberi border nol
+    selebar `pad` piksel, sehingga cincin di tepi gambar tidak perlu di-clip.
+    """
+    H, W = ii.shape[0] - 1 - 2 * pad, ii.shape[1] - 1 - 2 * pad
+    ny, nx = (H - win_h) // stride + 1, (W - win_w) // stride + 1
+    if ny <= 0 or nx <= 0:
+        return np.empty((0, 0))
+
+    inner_sum = grid_sums(ii, pad, pad, win_h, win_w, ny, nx, stride)
+    ring = min(pad, max(1, int(win_h * RING_FRAC)))
+    outer_sum = grid_sums(ii, pad - ring, pad - ring, win_h + 2 * ring, win_w + 2 * ring, ny, nx, stride)
+
+    # Luas cincin yang benar-benar berada di dalam gambar (terpisah per sumbu)
+    ys = np.arange(ny) * stride
+    xs = np.arange(nx) * stride
+    hy = np.minimum(ys + win_h + ring, H) - np.maximum(ys - ring, 0)
+    wx = np.minimum(xs + win_w + ring, W) - np.maximum(xs - ring, 0)
+    ring_area = np.maximum(np.outer(hy, wx) - win_w * win_h, 1)
+
+    inner = inner_sum / (win_w * win_h)
+    outer = (outer_sum - inner_sum) / ring_area
+
+    # Dikali akar luas agar plat utuh mengalahkan potongan teks di dalamnya
+    return (inner - outer) * np.sqrt(win_w * win_h)
+
+
+def non_max_suppression(boxes, scores, iou_thresh=0.3, max_boxes=None, contain_thresh=0.7):
+    """NMS greedy; IoU satu kotak terhadap semua sisa dihitung tervektor.
+
+    Kotak yang sebagian besar (>= contain_thresh) berada di dalam kotak yang
+    sudah dipilih juga dibuang, agar potongan teks di dalam plat tidak ikut.
+    """
+    if len(boxes) == 0:
+        return []
+    x0, y0 = boxes[:, 0].astype(float), boxes[:, 1].astype(float)
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    area = boxes[:, 2] * boxes[:, 3].astype(float)
+    order = np.argsort(scores)[::-1]
+    keep = []
+    while order.size and (max_boxes is None or len(keep) < max_boxes):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.clip(np.minimum(x1[i], x1[rest]) - np.maximum(x0[i], x0[rest]), 0, None)
+        ih = np.clip(np.minimum(y1[i], y1[rest]) - np.maximum(y0[i], y0[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / (area[i] + area[rest] - inter)
+        contained = inter / np.minimum(area[i], area[rest])
+        order = rest[(iou <= iou_thresh) & (contained < contain_thresh)]
+    return keep
+
+
+def window_sizes(min_area, max_area, aspect_min, aspect_max, n_scales=N_SCALES):
+    """Ukuran jendela (w, h) dari rentang area dan rasio aspek yang sama dengan filter kontur."""
+    aspect = (aspect_min + aspect_max) / 2
+    areas = np.geomspace(max(min_area, 1), max(max_area, min_area + 1), n_scales)
+    return [(int(round(np.sqrt(a * aspect))), int(round(np.sqrt(a / aspect)))) for a in areas]
+
+
+def find_plate_boxes(gray, min_area=500, max_area=50000, aspect_ratio_min=2.0, aspect_ratio_max=5.0,
+                     score_sigma=2.0, iou_thresh=0.3, max_plates=5):
+    """Kotak (x, y, w, h) kandidat plat pada koordinat gambar asli, terurut dari skor tertinggi."""
+    h_img, w_img = gray.shape[:2]
+    scale = min(1.0, WORK_SIZE / max(h_img, w_img))
+    work = shrink(gray, scale)
+    sizes = [(w, h) for w, h in window_sizes(min_area * scale ** 2, max_area * scale ** 2,
+                                             aspect_ratio_min, aspect_ratio_max)
+             if 4 <= w <= work.shape[1] and 2 <= h <= work.shape[0]]
+    if not sizes:
+        return []
+    pad = max(1, int(max(h for _, h in sizes) * RING_FRAC))
+    ii = gradient_integral(work, pad)
+
+    grids = []
+    for w, h in sizes:
+        stride = max(1, int(h * STRIDE_FRAC))
+        grids.append((w, h, stride, window_scores(ii, pad, w, h, stride)))
+    flat = np.concatenate([g.ravel() for *_, g in grids])
+    if not flat.size:
+        return []
+    # Ambang adaptif: jauh di atas rata-rata gambar ini dan tidak terlalu jauh dari skor terbaik
+    thresh = max(flat.mean() + score_sigma * flat.std(), MIN_REL_SCORE * flat.max(), 0)
+
+    # Kotak hanya dibentuk untuk jendela yang lolos ambang
+    all_boxes, all_scores = [], []
+    for w, h, stride, grid in grids:
+        iy, ix = np.nonzero(grid > thresh)
+        all_boxes.append(np.stack([ix * stride, iy * stride, np.full(ix.size, w), np.full(ix.size, h)], axis=1))
+        all_scores.append(grid[iy, ix])
+    boxes, scores = np.concatenate(all_boxes), np.concatenate(all_scores)
+
+    keep = non_max_suppression(boxes, scores, iou_thresh, max_plates)
+    return [tuple(int(round(v / scale)) for v in boxes[i]) for i in keep]
+
+
+def detect_license_plate_integral(image, canny_min=None, canny_max=None, kernel_size=None, min_area=500,
+                                  max_area=50000, aspect_ratio_min=2.0, aspect_ratio_max=5.0):
+    """Pengganti detect_license_plate dengan signature dan keluaran yang sama.
+
+    canny_min, canny_max dan kernel_size diterima agar bisa dipertukarkan,
+    tetapi tidak dipakai oleh metode ini.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    boxes = find_plate_boxes(gray, min_area, max_area, aspect_ratio_min, aspect_ratio_max)
+
+    result_image = image.copy()
+    cropped_plates = []
+    for x, y, w, h in boxes:
+        cv2.rectangle(result_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cropped_plates.append(image[y:y+h, x:x+w])
+    return result_image, cropped_plates
@@ -0,0 +1,342 @@
+"""Antrian job deteksi di latar belakang, disimpan di SQLite.
+
+Tombol "Jalankan Deteksi" cukup memasukkan file ke antrian lewat submit_job;
+worker thread memproses item satu per satu dan menulis hasilnya ke tabel
+job_items (hasil parsial langsung terbaca) serta ke riwayat `detections`.
+Karena semuanya ada di database, halaman yang di-reload bisa menyambung
+kembali ke job yang masih berjalan, dan item yang terputus saat server mati
+akan diulang ketika worker hidup lagi.
+
+Job dari arsip ZIP/TAR (submit_archive_job) tidak menyimpan bytes gambar di
+job_items: arsipnya disimpan di disk dan worker membaca satu anggota tepat
+sebelum memprosesnya.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+import history
+import ops_metrics
+from archive_ingest import ArchiveReader, list_images, spool
+from plate_pipeline import process_encoded
+
+DB_PATH = history.DB_PATH
+POLL_INTERVAL = 0.5
+# Item 'running' milik worker lain baru boleh diambil ulang setelah lease-nya habis (detik);
+# lebih lama dari waktu proses satu gambar terbesar, termasuk mode tile
+LEASE_S = 600
+
+# Opsi non-deteksi yang ikut disimpan di params job
+PIPELINE_OPTIONS = ("ocr", "ocr_first", "ocr_psm", "region")
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+# ================= DATABASE =================
+def connect(db_path=DB_PATH):
+    conn = history.connect(db_path)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        owner TEXT,
+        source TEXT,
+        status TEXT,
+        total INTEGER,
+        done INTEGER,
+        params TEXT,
+        created_at REAL,
+        updated_at REAL,
+        archive TEXT
+    )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+    if "archive" not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN archive TEXT")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS job_items (
+        job_id TEXT,
+        idx INTEGER,
+        name TEXT,
+        data BLOB,
+        status TEXT,
+        result TEXT,
+        box BLOB,
+        edge BLOB,
+        morph BLOB,
+        error TEXT,
+        worker TEXT,
+        lease_until REAL,
+        PRIMARY KEY (job_id, idx)
+    )
+    """)
+    item_columns = {row[1] for row in conn.execute("PRAGMA table_info(job_items)")}
+    for col, kind in (("worker", "TEXT"), ("lease_until", "REAL")):
+        if col not in item_columns:
+            conn.execute(f"ALTER TABLE job_items ADD COLUMN {col} {kind}")
+    conn.commit()
+    return conn
+
+
+def _png(img):
+    ok, buf = cv2.imencode(".png", img)
+    return buf.tobytes() if ok else None
+
+
+def _unpng(blob, flags=cv2.IMREAD_UNCHANGED):
+    if blob is None:
+        return None
+    return cv2.imdecode(np.frombuffer(blob, np.uint8), flags)
+
+
+# ================= API =================
+def _insert_job(owner, files, params, source, archive, db_path):
+    conn = connect(db_path)
+    job_id = uuid.uuid4().hex[:12]
+    now = time.time()
+    conn.execute(
+        "INSERT INTO jobs (id, owner, source, status, total, done, params, created_at, updated_at, archive) "
+        "VALUES (?,?,?,?,?,?,?,?,?,?)",
+        (job_id, owner, source, "queued", len(files), 0, json.dumps(params), now, now, archive)
+    )
+    conn.executemany(
+        "INSERT INTO job_items (job_id, idx, name, data, status) VALUES (?,?,?,?,?)",
+        [(job_id, i, name, data, "queued") for i, (name, data) in enumerate(files)]
+    )
+    conn.commit()
+    conn.close()
+    ensure_worker(db_path)
+    return job_id
+
+
+def submit_job(owner, files, params, source="app", db_path=DB_PATH):
+    """Masukkan list (nama, bytes) ke antrian, kembalikan id job."""
+    return _insert_job(owner, files, params, source, None, db_path)
+
+
+def submit_archive_job(owner, name, fileobj, params, source="app", db_path=DB_PATH):
+    """Antrikan semua gambar JPG/PNG di arsip ZIP/TAR; ValueError jika bukan arsip atau kosong."""
+    path = spool(fileobj, name)
+    try:
+        members = list_images(path)
+        if not members:
+            raise ValueError("arsip tidak berisi gambar JPG/PNG")
+    except Exception:
+        os.remove(path)
+        raise
+    return _insert_job(owner, [(m, None) for m in members], params, source, path, db_path)
+
+
+def get_job(job_id, db_path=DB_PATH):
+    conn = connect(db_path)
+    row = conn.execute(
+        "SELECT id, owner, source, status, total, done, created_at FROM jobs WHERE id=?", (job_id,)
+    ).fetchone()
+    conn.close()
+    if not row:
+        return None
+    keys = ("id", "owner", "source", "status", "total", "done", "created_at")
+    return dict(zip(keys, row))
+
+
+def latest_active_job(owner, db_path=DB_PATH):
+    """Job terakhir milik owner yang masih antri/berjalan (untuk reattach)."""
+    conn = connect(db_path)
+    row = conn.execute(
+        "SELECT id FROM jobs WHERE owner=? AND status IN ('queued','running') ORDER BY created_at DESC LIMIT 1",
+        (owner,)
+    ).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def queue_depth(db_path=DB_PATH):
+    """Jumlah item yang masih menunggu worker, dari semua job aktif."""
+    conn = connect(db_path)
+    row = conn.execute(
+        "SELECT COUNT(*) FROM job_items i JOIN jobs j ON j.id = i.job_id "
+        "WHERE i.status='queued' AND j.status IN ('queued','running')"
+    ).fetchone()
+    conn.close()
+    return row[0]
+
+
+def cancel_job(job_id, db_path=DB_PATH):
+    conn = connect(db_path)
+    conn.execute("UPDATE jobs SET status='cancelled', updated_at=? WHERE id=? AND status IN ('queued','running')",
+                 (time.time(), job_id))
+    conn.execute("UPDATE job_items SET status='cancelled', data=NULL WHERE job_id=? AND status='queued'", (job_id,))
+    conn.commit()
+    conn.close()
+
+
+def job_results(job_id, after_idx=-1, db_path=DB_PATH):
+    """Hasil item yang sudah selesai (parsial jika job masih berjalan).
+
+    `after_idx` membatasi ke item dengan idx lebih besar, agar UI cukup
+    men-decode item yang baru selesai.
+    """
+    conn = connect(db_path)
+    rows = conn.execute(
+        "SELECT idx, name, status, result, box, edge, morph, error FROM job_items "
+        "WHERE job_id=? AND idx>? AND status IN ('done','failed') ORDER BY idx", (job_id, after_idx)
+    ).fetchall()
+    conn.close()
+
+    results = []
+    for idx, name, status, result, box, edge, morph, error in rows:
+        r = json.loads(result) if result else {"texts": [], "confs": [], "locations": []}
+        box = _unpng(box)
+        results.append({
+            "idx": idx, "name": name, "status": status, "error": error,
+            "box": cv2.cvtColor(box, cv2.COLOR_BGR2RGB) if box is not None else None,
+            "edge": _unpng(edge), "morph": _unpng(morph),
+            "texts": r["texts"], "confs": r["confs"], "locations": r["locations"], "quality": r.get("quality", ""),
+        })
+    return results
+
+
+# ================= WORKER =================
+# CodeFix, DsEnam dan DsTuju memakai users.db yang sama dan masing-masing
+# menjalankan worker, jadi item diklaim secara atomik (UPDATE ... AND
+# status='queued', rowcount 1) dengan lease; hanya item yang lease-nya habis
+# (worker-nya mati) yang dikembalikan ke antrian.
+def _requeue_expired(conn):
+    conn.execute("UPDATE job_items SET status='queued', worker=NULL, lease_until=NULL "
+                 "WHERE status='running' AND (lease_until IS NULL OR lease_until < ?)", (time.time(),))
+    conn.commit()
+
+
+def _next_item(conn, worker_id):
+    """Klaim item antrian berikutnya untuk worker ini; None jika antrian kosong."""
+    while True:
+        item = conn.execute(
+            "SELECT i.job_id, i.idx, i.name, i.data, j.owner, j.source, j.params, j.archive "
+            "FROM job_items i JOIN jobs j ON j.id = i.job_id "
+            "WHERE i.status='queued' AND j.status IN ('queued','running') "
+            "ORDER BY j.created_at, i.idx LIMIT 1"
+        ).fetchone()
+        if item is None:
+            return None
+        claimed = conn.execute(
+            "UPDATE job_items SET status='running', worker=?, lease_until=? "
+            "WHERE job_id=? AND idx=? AND status='queued'",
+            (worker_id, time.time() + LEASE_S, item[0], item[1])
+        ).rowcount
+        conn.commit()
+        if claimed == 1:
+            return item
+        # Diambil worker lain di antara SELECT dan UPDATE: coba item berikutnya
+
+
+def _process_item(data, params):
+    # Grayscale-first: UI hanya menampilkan pratinjau box/edge/morph, bukan crop warna
+    options = {k: params[k] for k in PIPELINE_OPTIONS if k in params}
+    with ops_metrics.timer("total"):
+        out = process_encoded([data], [params], **options)[0]
+    return out, out["box"]
+
+
+def _cleanup_archives(conn, readers):
+    """Tutup dan hapus arsip milik job yang sudah selesai atau dibatalkan."""
+    rows = conn.execute(
+        "SELECT id, archive FROM jobs WHERE archive IS NOT NULL AND status NOT IN ('queued','running')"
+    ).fetchall()
+    for job_id, path in rows:
+        if path in readers:
+            readers.pop(path).close()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        conn.execute("UPDATE jobs SET archive=NULL WHERE id=?", (job_id,))
+    conn.commit()
+
+
+def _archive_member(readers, path, idx):
+    # Hanya satu arsip yang dibuka sekaligus; anggota TAR dibaca maju sesuai urutan idx
+    if path not in readers:
+        for other in readers.values():
+            other.close()
+        readers.clear()
+        readers[path] = ArchiveReader(path)
+    return readers[path].read(idx)
+
+
+def _finish_job_if_complete(conn, job_id):
+    left = conn.execute(
+        "SELECT COUNT(*) FROM job_items WHERE job_id=? AND status IN ('queued','running')", (job_id,)
+    ).fetchone()[0]
+    if left == 0:
+        conn.execute("UPDATE jobs SET status='done', updated_at=? WHERE id=? AND status='running'",
+                     (time.time(), job_id))
+
+
+def run_worker(db_path=DB_PATH, stop=None, idle_exit=False):
+    conn = connect(db_path)
+    worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    # Item 'running' dengan lease habis berarti worker-nya mati di tengah jalan
+    _requeue_expired(conn)
+    readers = {}
+    _cleanup_archives(conn, readers)
+
+    while not (stop and stop.is_set()):
+        item = _next_item(conn, worker_id)
+        if item is None:
+            _requeue_expired(conn)
+            _cleanup_archives(conn, readers)
+            if idle_exit:
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        job_id, idx, name, data, owner, source, params, archive = item
+        params = json.loads(params)
+        conn.execute("UPDATE jobs SET status='running', updated_at=? WHERE id=? AND status='queued'",
+                     (time.time(), job_id))
+        conn.commit()
+
+        try:
+            if data is None and archive:
+                data = _archive_member(readers, archive, idx)
+            out, box = _process_item(data, params)
+            result = {"texts": out["texts"], "confs": out["confs"], "locations": out["locations"],
+                      "quality": out["quality"]}
+            # Hanya pemegang lease yang menulis hasil: item yang lease-nya sempat habis dan diklaim
+            # worker lain tidak dicatat dua kali di riwayat
+            owned = conn.execute(
+                "UPDATE job_items SET status='done', data=NULL, result=?, box=?, edge=?, morph=? "
+                "WHERE job_id=? AND idx=? AND worker=? AND status='running'",
+                (json.dumps(result), _png(box), _png(out["edge"]), _png(out["morph"]), job_id, idx, worker_id)
+            ).rowcount
+            if owned:
+                history.record_detections(conn, source, owner, name, out["texts"], out["confs"], out["locations"])
+        except Exception as e:
+            owned = conn.execute(
+                "UPDATE job_items SET status='failed', data=NULL, error=? "
+                "WHERE job_id=? AND idx=? AND worker=? AND status='running'",
+                (str(e), job_id, idx, worker_id)
+            ).rowcount
+
+        if owned:
+            conn.execute("UPDATE jobs SET done=done+1, updated_at=? WHERE id=?", (time.time(), job_id))
+        _finish_job_if_complete(conn, job_id)
+        conn.commit()
+    for reader in readers.values():
+        reader.close()
+    conn.close()
+
+
+def ensure_worker(db_path=DB_PATH):
+    """Jalankan satu worker thread per proses (aman dipanggil tiap rerun)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, args=(db_path,), daemon=True, name="job-worker")
+            _worker.start()
+    return _worker
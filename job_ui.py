@@ -0,0 +1,112 @@
+import pandas as pd
+import streamlit as st
+
+import job_queue
+from plate_pipeline import CASCADE_STATS
+
+# ================= KOMPONEN UI JOB =================
+STATUS_LABEL = {
+    "queued": "Menunggu antrian", "running": "Sedang diproses", "done": "Selesai",
+    "cancelled": "Dibatalkan", "failed": "Gagal"
+}
+
+
+def start_job(owner, files, params, source):
+    job_id = job_queue.submit_job(owner, [(f.name, f.getvalue()) for f in files], params, source)
+    st.session_state.job_id = job_id
+    st.query_params["job"] = job_id
+    return job_id
+
+
+def start_archive_job(owner, archive, params, source):
+    """Job dari satu arsip ZIP/TAR; anggota dibaca worker satu per satu."""
+    try:
+        job_id = job_queue.submit_archive_job(owner, archive.name, archive, params, source)
+    except ValueError as e:
+        st.error(f"Arsip tidak bisa diproses: {e}")
+        return None
+    st.session_state.job_id = job_id
+    st.query_params["job"] = job_id
+    return job_id
+
+
+def current_job_id(owner=None):
+    """Job yang sedang diikuti: dari session, dari ?job= di URL, atau job aktif terakhir milik owner."""
+    job_queue.ensure_worker()
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if not job_id and owner:
+        job_id = job_queue.latest_active_job(owner)
+    if job_id:
+        st.session_state.job_id = job_id
+    return job_id
+
+
+def sync_results(job_id, to_result):
+    """Isi st.session_state.results dari item job yang sudah selesai.
+
+    Hanya item dengan idx setelah item terakhir yang sudah dimuat yang diambil
+    dan di-decode dari database, jadi biayanya tidak tumbuh dengan ukuran job.
+    Item dengan idx lebih kecil yang selesai belakangan (beberapa worker atau
+    beberapa app memproses job yang sama) terlewat oleh cara itu; jika jumlah
+    item yang dimuat kurang dari `done`, dimuat ulang penuh.
+    """
+    job = job_queue.get_job(job_id)
+    if not job:
+        return None
+    key = (job_id, job["done"])
+    loaded = st.session_state.get("job_loaded")
+    if loaded != key:
+        if loaded and loaded[0] == job_id:
+            _load_items(job_id, st.session_state.job_last_idx, to_result)
+        # Ganti job, atau ada item yang terlewat: muat ulang penuh. `done` dan status
+        # item ditulis dalam satu transaksi, jadi pemuatan penuh pasti >= done.
+        if not (loaded and loaded[0] == job_id) or len(st.session_state.job_items) < job["done"]:
+            st.session_state.job_items, st.session_state.results = [], []
+            st.session_state.job_last_idx = -1
+            _load_items(job_id, -1, to_result)
+        st.session_state.job_loaded = key
+    return job
+
+
+def _load_items(job_id, after, to_result):
+    items = job_queue.job_results(job_id, after)
+    st.session_state.job_items += [(r["name"], r["status"], len(r["texts"]), ", ".join(r["texts"]), r["error"])
+                                   for r in items]
+    st.session_state.results += [to_result(r) for r in items if r["status"] == "done"]
+    if items:
+        st.session_state.job_last_idx = items[-1]["idx"]
+
+
+@st.fragment(run_every=1.0)
+def job_panel(job_id, to_result):
+    job = sync_results(job_id, to_result)
+    if not job:
+        st.warning("Job tidak ditemukan")
+        return
+
+    total = job["total"] or 1
+    st.progress(job["done"] / total, text=f"{STATUS_LABEL[job['status']]}: {job['done']}/{job['total']} gambar")
+    if job["status"] in ("queued", "running"):
+        if st.button("⛔ Batalkan Deteksi", key=f"cancel_{job_id}"):
+            job_queue.cancel_job(job_id)
+
+    if st.session_state.get("job_items"):
+        st.dataframe(
+            pd.DataFrame(st.session_state.job_items,
+                         columns=["Nama Gambar", "Status", "Jumlah Plat", "Hasil OCR", "Error"]),
+            use_container_width=True
+        )
+
+
+# ================= STATISTIK CASCADE =================
+def cascade_stats_panel():
+    """Hit dan waktu per level cascade dari semua deteksi di proses ini (termasuk worker job)."""
+    snap = CASCADE_STATS.snapshot()
+    if not snap["images"]:
+        st.caption("Belum ada gambar yang diproses.")
+        return
+    st.caption(f"{snap['images']} gambar, rata-rata {snap['mean_ms']} ms per gambar, "
+               f"{snap['unresolved']} tanpa plat valid setelah level terakhir")
+    st.dataframe(pd.DataFrame(snap["levels"]).rename(columns={
+        "level": "Level", "images": "Gambar Masuk", "hits": "Hit", "hit_rate": "Rasio Hit",
+        "ms_per_image": "ms/Gambar", "time_share": "Porsi Waktu"}), use_container_width=True)
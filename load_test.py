@@ -0,0 +1,224 @@
+"""Uji beban sesi bersamaan untuk CodeFix/DsTuju dengan AppTest Streamlit.
+
+Setiap sesi virtual menjalankan alur register -> login -> upload beberapa
+gambar + deteksi -> buka Hasil -> download CSV. Untuk setiap jumlah sesi N,
+latensi per langkah (p50/p95/p99/maks), jumlah error dan memori proses
+dilaporkan.
+
+Semua sesi berjalan di thread masing-masing dalam satu proses, sama seperti
+server Streamlit, dan berbagi worker job_queue yang sama. AppTest memakai
+state global (Runtime._instance, config) selama satu run script, jadi run
+script antar sesi diserialkan dengan RUN_LOCK; waktu tunggu lock ikut
+terhitung sebagai antrian di latensi langkah. Database dibuat di folder kerja
+sementara, bukan users.db milik aplikasi.
+
+Contoh:
+    python load_test.py --app CodeFix.py --sessions 1 2 4 8 --files 3
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from streamlit.testing.v1 import AppTest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STEPS = ("open", "register", "login", "detect", "hasil", "csv")
+PASSWORD = "loadtest123"
+RUN_TIMEOUT = 120
+DETECT_TIMEOUT = 300
+POLL_INTERVAL = 0.2
+RUN_LOCK = threading.Lock()
+
+# Widget per aplikasi: key (CodeFix) atau label (DsTuju); "{user}" diganti nama user sesi
+APPS = {
+    "CodeFix.py": {
+        "register": ({"reg_user": "{user}", "reg_pass": PASSWORD, "reg_confirm": PASSWORD}, "Daftar"),
+        "login": ({"login_user": "{user}", "login_pass": PASSWORD}, "Login"),
+        "detect": "🚀 Jalankan Deteksi",
+    },
+    "DsTuju.py": {
+        "register": ({"Username Baru": "{user}", "Password Baru": PASSWORD}, "Register"),
+        "login": ({"Username": "{user}", "Password": PASSWORD}, "Login"),
+        "detect": "Jalankan Deteksi",
+    },
+}
+
+
+# ================= SATU SESI =================
+def _find(elements, name):
+    for el in elements:
+        if el.key == name or el.label == name:
+            return el
+    raise LookupError(f"widget tidak ditemukan: {name}")
+
+
+class Session:
+    def __init__(self, app, user, images):
+        self.app = app
+        self.spec = APPS[app]
+        self.user = user
+        self.images = images
+        self.at = AppTest.from_file(os.path.join(HERE, app), default_timeout=RUN_TIMEOUT)
+        self.times = {}
+        self.error = None
+
+    def run(self):
+        with RUN_LOCK:
+            self.at.run()
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].value)
+
+    def fill(self, step):
+        fields, button = self.spec[step]
+        for name, value in fields.items():
+            _find(self.at.text_input, name).input(value.format(user=self.user))
+        _find(self.at.button, button).click()
+
+    def step_open(self):
+        self.run()
+
+    def step_register(self):
+        self.fill("register")
+        self.run()
+
+    def step_login(self):
+        self.fill("login")
+        self.run()
+        # CodeFix memakai st.stop() setelah login: menu baru muncul di run berikutnya
+        if not self.at.sidebar.radio:
+            self.run()
+        if not self.at.sidebar.radio:
+            raise RuntimeError("login gagal")
+
+    def step_detect(self):
+        self.at.file_uploader[0].set_value([(name, data, "image/jpeg") for name, data in self.images])
+        # Tombol deteksi CodeFix baru muncul setelah ada file yang diupload
+        self.run()
+        _find(self.at.button, self.spec["detect"]).click()
+        self.run()
+        t0 = time.perf_counter()
+        # Hasil job disinkronkan ke session_state.results di awal setiap run script
+        while len(self.at.session_state["results"]) < len(self.images):
+            if time.perf_counter() - t0 > DETECT_TIMEOUT:
+                raise TimeoutError("job deteksi tidak selesai")
+            time.sleep(POLL_INTERVAL)
+            self.run()
+
+    def step_hasil(self):
+        self.at.sidebar.radio[0].set_value("Hasil")
+        self.run()
+
+    def step_csv(self):
+        if not self.at.download_button:
+            raise RuntimeError("tombol download CSV tidak ada")
+        self.at.download_button[0].click()
+        self.run()
+
+    def play(self, start):
+        start.wait()
+        for step in STEPS:
+            t0 = time.perf_counter()
+            try:
+                getattr(self, f"step_{step}")()
+            except Exception as e:
+                self.error = (step, f"{type(e).__name__}: {e}")
+                return
+            self.times[step] = (time.perf_counter() - t0) * 1000
+
+
+# ================= BEBAN =================
+def memory_mb():
+    """(RSS saat ini, RSS puncak) proses dalam MB; None jika tidak bisa diukur."""
+    rss = psutil.Process().memory_info().rss / 1e6 if psutil else None
+    peak = None
+    if resource is not None:
+        # ru_maxrss dalam KB di Linux, byte di macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == "darwin" else 1e3)
+    return rss, peak
+
+
+def run_level(app, n, images):
+    """Jalankan `n` sesi bersamaan; kembalikan ringkasan latensi, error dan memori."""
+    start = threading.Barrier(n + 1)
+    tag = uuid.uuid4().hex[:6]
+    sessions = [Session(app, f"load_{tag}_{i}", images) for i in range(n)]
+    threads = [threading.Thread(target=s.play, args=(start,), daemon=True) for s in sessions]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    start.wait()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    steps = {}
+    for step in STEPS:
+        vals = [s.times[step] for s in sessions if step in s.times]
+        steps[step] = {"n": len(vals), **({k: round(float(np.percentile(vals, q)), 1)
+                                          for k, q in (("p50", 50), ("p95", 95), ("p99", 99))} if vals else {}),
+                       "max": round(max(vals), 1) if vals else None}
+    errors = [{"session": s.user, "step": s.error[0], "error": s.error[1]} for s in sessions if s.error]
+    rss, peak = memory_mb()
+    return {"sessions": n, "wall_s": round(wall, 2), "steps": steps, "errors": errors,
+            "rss_mb": round(rss, 1) if rss else None, "peak_rss_mb": round(peak, 1) if peak else None}
+
+
+def print_level(res):
+    mem = f"RSS={res['rss_mb']} MB" if res["rss_mb"] else ""
+    mem += f" puncak={res['peak_rss_mb']} MB" if res["peak_rss_mb"] else ""
+    print(f"\nN={res['sessions']}  waktu total={res['wall_s']} s  error={len(res['errors'])}  {mem}")
+    print(f"  {'langkah':<9} {'n':>3} {'p50':>9} {'p95':>9} {'p99':>9} {'maks':>9}  (ms)")
+    for step, s in res["steps"].items():
+        if s["n"]:
+            print(f"  {step:<9} {s['n']:>3} {s['p50']:>9} {s['p95']:>9} {s['p99']:>9} {s['max']:>9}")
+        else:
+            print(f"  {step:<9} {0:>3} {'-':>9}")
+    for e in res["errors"][:5]:
+        print(f"  ! {e['session']} [{e['step']}] {e['error']}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Uji beban sesi Streamlit bersamaan (AppTest)")
+    ap.add_argument("--app", default="CodeFix.py", choices=list(APPS))
+    ap.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8], help="jumlah sesi per tahap")
+    ap.add_argument("--files", type=int, default=3, help="jumlah gambar per deteksi")
+    ap.add_argument("--image", default=os.path.join(HERE, "contoh.jpeg"))
+    ap.add_argument("--workdir", help="folder database sementara (default: folder temp baru)")
+    ap.add_argument("--json", help="simpan hasil lengkap ke file JSON")
+    args = ap.parse_args()
+
+    with open(args.image, "rb") as f:
+        data = f.read()
+    images = [(f"beban_{i}{os.path.splitext(args.image)[1]}", data) for i in range(args.files)]
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    # users.db, riwayat dan antrian job aplikasi dibuat relatif terhadap folder kerja
+    workdir = args.workdir or tempfile.mkdtemp(prefix="loadtest_")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    sys.path.insert(0, HERE)
+    print(f"{args.app}: {args.files} gambar per sesi, database di {workdir}")
+
+    results = []
+    for n in args.sessions:
+        results.append(run_level(args.app, n, images))
+        print_level(results[-1])
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,110 @@
+"""Gerbang perubahan frame untuk kamera tetap.
+
+Sebelum deteksi, frame di-decode kecil (IMREAD_REDUCED_GRAYSCALE, lebar
+GATE_WIDTH) lalu dibandingkan dengan frame acuan di area ROI. Acuan adalah
+frame terakhir yang diproses, yang pelan-pelan menyerap frame yang dilewati
+(running average), sehingga perubahan cahaya bertahap tidak memicu deteksi
+sedangkan mobil yang datang atau bergerak tetap memicu. Mobil yang parkir
+diam hanya diproses sekali.
+
+Contoh (uji sensitivitas atas folder frame):
+    python motion_gate.py /mnt/kamera/gerbang1 --threshold 25 --min-changed 0.02 --roi 0,0.4,1,0.6
+"""
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+GATE_WIDTH = 160
+# Selisih level piksel (0-255) yang dihitung sebagai berubah
+DEFAULT_THRESHOLD = 25
+# Fraksi piksel ROI yang harus berubah agar frame diproses
+DEFAULT_MIN_CHANGED = 0.02
+# Bobot frame yang dilewati saat memperbarui acuan
+BACKGROUND_ALPHA = 0.05
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+
+
+def parse_roi(text):
+    """ROI "x,y,w,h" dalam fraksi lebar/tinggi frame (0-1) menjadi tuple float."""
+    roi = tuple(float(v) for v in text.split(","))
+    if len(roi) != 4 or not all(0 <= v <= 1 for v in roi) or roi[2] <= 0 or roi[3] <= 0:
+        raise ValueError("ROI harus berupa x,y,w,h dalam rentang 0-1")
+    return roi
+
+
+class MotionGate:
+    """Memutuskan apakah frame cukup berubah untuk dideteksi, dengan counter diproses/dilewati."""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, min_changed=DEFAULT_MIN_CHANGED, roi=None,
+                 alpha=BACKGROUND_ALPHA, width=GATE_WIDTH):
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.roi = roi
+        self.alpha = alpha
+        self.width = width
+        self.reference = None
+        self.processed = 0
+        self.skipped = 0
+        self.last_changed = 0.0
+
+    def small_frame(self, frame):
+        """Frame (bytes JPG/PNG atau array) sebagai grayscale float kecil di area ROI."""
+        if isinstance(frame, (bytes, bytearray, memoryview)):
+            frame = cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+            if frame is None:
+                raise ValueError("file bukan gambar yang valid")
+        elif frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        h, w = frame.shape
+        small = cv2.resize(frame, (self.width, max(1, round(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        if self.roi:
+            sh, sw = small.shape
+            x, y, rw, rh = self.roi
+            small = small[int(y * sh):max(int(y * sh) + 1, int((y + rh) * sh)),
+                          int(x * sw):max(int(x * sw) + 1, int((x + rw) * sw))]
+        # Blur meredam noise sensor agar tidak terhitung sebagai perubahan
+        return cv2.GaussianBlur(small, (5, 5), 0).astype(np.float32)
+
+    def check(self, frame):
+        """True jika frame harus diproses; acuan dan counter ikut diperbarui."""
+        small = self.small_frame(frame)
+        if self.reference is None or self.reference.shape != small.shape:
+            self.last_changed = 1.0
+        else:
+            self.last_changed = float(np.count_nonzero(cv2.absdiff(small, self.reference) > self.threshold)) / small.size
+        if self.last_changed >= self.min_changed:
+            self.reference = small
+            self.processed += 1
+            return True
+        cv2.accumulateWeighted(small, self.reference, self.alpha)
+        self.skipped += 1
+        return False
+
+    def reset(self):
+        self.reference = None
+
+    def stats(self):
+        total = self.processed + self.skipped
+        return {"processed": self.processed, "skipped": self.skipped,
+                "skip_rate": round(self.skipped / total, 3) if total else 0.0}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Uji gerbang perubahan atas urutan frame di folder")
+    ap.add_argument("folder")
+    ap.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD)
+    ap.add_argument("--min-changed", type=float, default=DEFAULT_MIN_CHANGED)
+    ap.add_argument("--roi", type=parse_roi, help="x,y,w,h dalam fraksi frame, mis. 0,0.4,1,0.6")
+    args = ap.parse_args()
+
+    gate = MotionGate(args.threshold, args.min_changed, args.roi)
+    entries = sorted((e for e in os.scandir(args.folder) if e.name.lower().endswith(IMAGE_EXT)),
+                     key=lambda e: (e.stat().st_mtime, e.name))
+    for entry in entries:
+        with open(entry.path, "rb") as f:
+            ok = gate.check(f.read())
+        print(f"{entry.name:<30} berubah={gate.last_changed:6.1%}  {'PROSES' if ok else 'lewati'}")
+    s = gate.stats()
+    print(f"diproses={s['processed']} dilewati={s['skipped']} ({s['skip_rate']:.0%})")
@@ -0,0 +1,158 @@
+"""Metrik operasional pipeline dalam jendela waktu bergulir.
+
+Pipeline (plate_pipeline, plate_ocr, template_ocr) dan aplikasi dashboard
+mencatat latensi per tahap dan counter ke registry global `METRICS`; halaman
+Operations (ops_ui.py) membaca ringkasannya. Jendela disimpan sebagai ring
+buffer slot waktu (BUCKET_S detik per slot): setiap update hanya menambah satu
+sel, dan persentil dibaca dari histogram bin latensi log, jadi biaya update
+O(1) dan biaya baca tidak bergantung pada jumlah riwayat.
+"""
+import bisect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+WINDOW_S = 300
+BUCKET_S = 5
+# Batas bin latensi (ms) berskala log: resolusi persentil sekitar 10%
+LATENCY_EDGES = np.geomspace(0.05, 120_000, 160).tolist()
+PERCENTILES = (50, 95, 99)
+# Urutan tampilan tahap yang dikenal; tahap lain ditampilkan sesudahnya
+STAGES = ("decode", "quality", "detect", "verify", "ocr", "preview", "total", "tuning")
+
+
+class RollingHistogram:
+    """Histogram per slot waktu dalam ring buffer; slot yang kedaluwarsa dikosongkan saat dipakai ulang."""
+
+    def __init__(self, n_bins, window_s=WINDOW_S, bucket_s=BUCKET_S):
+        self.bucket_s = bucket_s
+        self.n_slots = max(1, int(window_s // bucket_s))
+        self.counts = np.zeros((self.n_slots, n_bins), np.int64)
+        self.slot_ids = np.full(self.n_slots, -1, np.int64)
+
+    def add(self, bin_idx, now, n=1):
+        slot = int(now // self.bucket_s)
+        i = slot % self.n_slots
+        if self.slot_ids[i] != slot:
+            self.counts[i] = 0
+            self.slot_ids[i] = slot
+        self.counts[i, bin_idx] += n
+
+    def total(self, now):
+        """Jumlah per bin atas slot yang masih di dalam jendela."""
+        live = self.slot_ids > int(now // self.bucket_s) - self.n_slots
+        return self.counts[live].sum(axis=0)
+
+
+class OpsMetrics:
+    """Registry latensi per tahap dan counter, aman dipakai lintas thread (sesi Streamlit, worker job)."""
+
+    def __init__(self, window_s=WINDOW_S, bucket_s=BUCKET_S):
+        self.window_s = window_s
+        self.bucket_s = bucket_s
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latency = {}
+        self.counters = RollingHistogram(0, window_s, bucket_s)
+        self.counter_names = []
+        self.totals = {}
+
+    def observe(self, stage, ms, now=None):
+        now = time.time() if now is None else now
+        b = bisect.bisect_left(LATENCY_EDGES, ms)
+        with self.lock:
+            hist = self.latency.get(stage)
+            if hist is None:
+                hist = self.latency[stage] = RollingHistogram(len(LATENCY_EDGES) + 1, self.window_s, self.bucket_s)
+            hist.add(b, now)
+
+    def count(self, name, n=1, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            if name not in self.totals:
+                # Kolom counter baru: jarang terjadi, hanya saat nama counter pertama kali dipakai
+                self.counter_names.append(name)
+                self.counters.counts = np.pad(self.counters.counts, ((0, 0), (0, 1)))
+                self.totals[name] = 0
+            self.counters.add(self.counter_names.index(name), now, n)
+            self.totals[name] += n
+
+    @contextmanager
+    def timer(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - t0) * 1000)
+
+    def window_counts(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            counts = self.counters.total(now) if self.counter_names else []
+            return dict(zip(self.counter_names, (int(c) for c in counts)))
+
+    def stage_latency(self, now=None):
+        """Per tahap: jumlah sampel dan p50/p95/p99 (ms, batas atas bin) dalam jendela."""
+        now = time.time() if now is None else now
+        with self.lock:
+            hists = {stage: h.total(now) for stage, h in self.latency.items()}
+        rows = []
+        for stage in sorted(hists, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+            hist = hists[stage]
+            n = int(hist.sum())
+            if not n:
+                continue
+            cum = np.cumsum(hist)
+            row = {"stage": stage, "n": n}
+            for q in PERCENTILES:
+                b = int(np.searchsorted(cum, q / 100 * n))
+                row[f"p{q}"] = round(LATENCY_EDGES[min(b, len(LATENCY_EDGES) - 1)], 2)
+            rows.append(row)
+        return rows
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        counts = self.window_counts(now)
+        span = min(self.window_s, max(now - self.started, self.bucket_s))
+        images = counts.get("images", 0)
+        caches = {}
+        for name, n in counts.items():
+            if name.endswith("_cache_hit"):
+                cache = name[:-len("_cache_hit")]
+                miss = counts.get(f"{cache}_cache_miss", 0)
+                caches[cache] = {"hits": n, "misses": miss, "hit_rate": round(n / (n + miss), 3) if n + miss else 0.0}
+        return {
+            "window_s": self.window_s, "images": images,
+            "images_per_min": round(images * 60 / span, 1),
+            "ocr_calls_per_image": round(counts.get("ocr_calls", 0) / images, 2) if images else 0.0,
+            "stages": self.stage_latency(now), "caches": caches, "counts": counts,
+            "totals": dict(self.totals), "memory_mb": memory_mb(),
+        }
+
+
+def memory_mb():
+    """RSS proses saat ini (psutil) atau puncaknya (resource), dalam MB; None jika tidak tersedia."""
+    if psutil is not None:
+        return round(psutil.Process().memory_info().rss / 1e6, 1)
+    if resource is not None:
+        # ru_maxrss dalam KB di Linux, byte di macOS
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == "darwin" else 1e3), 1)
+    return None
+
+
+METRICS = OpsMetrics()
+observe = METRICS.observe
+count = METRICS.count
+timer = METRICS.timer
@@ -0,0 +1,53 @@
+import pandas as pd
+import streamlit as st
+
+import job_queue
+import ops_metrics
+
+# Interval refresh halaman operasional (detik)
+REFRESH_S = 2
+
+STAGE_LABEL = {"decode": "Decode", "quality": "Cek Kualitas", "detect": "Deteksi", "verify": "Verifikasi Plat", "ocr": "OCR", "preview": "Pratinjau",
+               "total": "Total", "tuning": "Pratinjau Tuning"}
+
+
+# ================= HALAMAN OPERASIONAL =================
+def ops_page():
+    """Throughput, latensi per tahap, cache dan antrian dari ops_metrics proses ini."""
+    st.caption(f"Jendela {ops_metrics.WINDOW_S // 60} menit terakhir, diperbarui setiap {REFRESH_S} detik. "
+               "Angka mencakup semua sesi dan worker job di server ini.")
+    _live_panel()
+
+
+@st.fragment(run_every=REFRESH_S)
+def _live_panel():
+    snap = ops_metrics.METRICS.snapshot()
+    try:
+        depth = job_queue.queue_depth()
+    except Exception:
+        depth = None
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Gambar / menit", snap["images_per_min"])
+    m2.metric("Panggilan OCR / gambar", snap["ocr_calls_per_image"])
+    m3.metric("Antrian job", "-" if depth is None else depth)
+    m4.metric("Memori (MB)", "-" if snap["memory_mb"] is None else snap["memory_mb"])
+
+    st.markdown("#### Latensi per Tahap (ms)")
+    if snap["stages"]:
+        st.dataframe(pd.DataFrame([{
+            "Tahap": STAGE_LABEL.get(r["stage"], r["stage"]), "Sampel": r["n"],
+            "p50": r["p50"], "p95": r["p95"], "p99": r["p99"],
+        } for r in snap["stages"]]), use_container_width=True, hide_index=True)
+    else:
+        st.caption("Belum ada gambar yang diproses dalam jendela ini.")
+
+    st.markdown("#### Cache")
+    if snap["caches"]:
+        st.dataframe(pd.DataFrame([{
+            "Cache": name, "Hit": c["hits"], "Miss": c["misses"], "Rasio Hit": c["hit_rate"],
+        } for name, c in snap["caches"].items()]), use_container_width=True, hide_index=True)
+    else:
+        st.caption("Belum ada akses cache dalam jendela ini.")
+    st.caption(f"Total sejak server hidup: {snap['totals'].get('images', 0)} gambar, "
+               f"{snap['totals'].get('ocr_calls', 0)} panggilan OCR")
@@ -0,0 +1,230 @@
+"""Profil parameter deteksi per user dan kamera, serta perbandingan A/B.
+
+Profil disimpan di tabel `param_profiles` pada database yang sama dengan
+users, dengan nama key plate_pipeline (canny_min, kernel_w, min_ratio, ...),
+sehingga bisa dipakai ulang di semua aplikasi dan tidak hilang saat logout.
+
+`compare_profiles` menjalankan dua profil atas satu batch gambar: setiap
+gambar di-decode sekali (grayscale, atau BGR jika salah satu profil memakai
+color_mask), lalu kedua profil diproses paralel lewat process_batch, sehingga
+cascade, gerbang kualitas, mask warna dan verifier ikut dibandingkan.
+
+Contoh:
+    python param_profiles.py folder_gambar/ --camera gerbang1 --a siang --b malam
+    python param_profiles.py data.pack --camera gerbang1 --b malam    # frame dari image_pack.py
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import history
+from image_pack import ImagePack
+from plate_pipeline import DEFAULT_PARAMS, decode_gray, decode_image, params_with_defaults, process_batch
+
+DB_PATH = history.DB_PATH
+DEFAULT_PROFILE = "default"
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+# Nama parameter di beberapa aplikasi yang berbeda dari plate_pipeline
+PARAM_ALIASES = {"min_aspect": "min_ratio", "max_aspect": "max_ratio"}
+# Kotak dianggap sama pada kedua profil jika IoU-nya minimal ini
+MATCH_IOU = 0.5
+
+
+# ================= DATABASE =================
+def connect(db_path=DB_PATH):
+    conn = history.connect(db_path)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS param_profiles (
+        owner TEXT,
+        camera TEXT,
+        name TEXT,
+        params TEXT,
+        updated_at REAL,
+        PRIMARY KEY (owner, camera, name)
+    )
+    """)
+    conn.commit()
+    return conn
+
+
+def normalize_params(params):
+    """Parameter dengan nama key plate_pipeline; key yang tidak dikenal pipeline dibuang."""
+    renamed = {PARAM_ALIASES.get(k, k): v for k, v in params.items()}
+    return {k: v for k, v in renamed.items() if k in DEFAULT_PARAMS}
+
+
+def save_profile(conn, owner, camera, name, params):
+    conn.execute(
+        "INSERT OR REPLACE INTO param_profiles VALUES (?,?,?,?,?)",
+        (owner or "", camera or "", name, json.dumps(normalize_params(params)), time.time())
+    )
+    conn.commit()
+
+
+def load_profile(conn, owner, camera, name):
+    """Parameter lengkap (digabung dengan DEFAULT_PARAMS); profil "default" selalu ada."""
+    if name == DEFAULT_PROFILE:
+        return dict(DEFAULT_PARAMS)
+    row = conn.execute("SELECT params FROM param_profiles WHERE owner=? AND camera=? AND name=?",
+                       (owner or "", camera or "", name)).fetchone()
+    if row is None:
+        raise KeyError(f"profil tidak ditemukan: {name}")
+    return params_with_defaults(json.loads(row[0]))
+
+
+def list_profiles(conn, owner, camera):
+    return [r[0] for r in conn.execute(
+        "SELECT name FROM param_profiles WHERE owner=? AND camera=? ORDER BY name", (owner or "", camera or "")
+    )]
+
+
+def list_cameras(conn, owner):
+    return [r[0] for r in conn.execute(
+        "SELECT DISTINCT camera FROM param_profiles WHERE owner=? ORDER BY camera", (owner or "",)
+    )]
+
+
+def delete_profile(conn, owner, camera, name):
+    conn.execute("DELETE FROM param_profiles WHERE owner=? AND camera=? AND name=?",
+                 (owner or "", camera or "", name))
+    conn.commit()
+
+
+# ================= PERBANDINGAN A/B =================
+def run_profile(frame, params, ocr=True, ocr_first="otsu", ocr_psm=7):
+    """Deteksi (+ OCR) satu gambar dengan satu profil lewat process_batch, beserta waktunya.
+
+    `frame` grayscale, atau BGR untuk profil dengan color_mask.
+    """
+    t0 = time.perf_counter()
+    out = process_batch([frame], [params], ocr, ocr_first, ocr_psm)[0]
+    texts = out["texts"] if ocr else []
+    return {"boxes": out["boxes"], "texts": texts, "ms": (time.perf_counter() - t0) * 1000}
+
+
+def unmatched_boxes(boxes_a, boxes_b, iou=MATCH_IOU):
+    """Jumlah kotak A yang tidak punya pasangan di B dan sebaliknya (IoU dihitung tervektor)."""
+    if not boxes_a or not boxes_b:
+        return len(boxes_a), len(boxes_b)
+    a, b = np.asarray(boxes_a, float), np.asarray(boxes_b, float)
+    iw = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    ih = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - inter
+    matched = inter / union >= iou
+    return int((~matched.any(axis=1)).sum()), int((~matched.any(axis=0)).sum())
+
+
+def compare_profiles(items, params_a, params_b, ocr=True, ocr_first="otsu", ocr_psm=7):
+    """Jalankan dua profil atas (nama, bytes) dan hasilkan satu baris perbandingan per gambar.
+
+    Berupa generator, jadi pemanggil bisa menampilkan hasil sambil berjalan
+    dan `items` boleh berupa iterator (mis. anggota arsip). Frame yang sudah
+    berupa array (dari ImagePack) dipakai langsung tanpa decode.
+    """
+    params_a, params_b = params_with_defaults(params_a), params_with_defaults(params_b)
+    color = params_a["color_mask"] or params_b["color_mask"]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for name, data in items:
+            t0 = time.perf_counter()
+            frame = as_color(data) if color else as_gray(data)
+            if frame is None:
+                yield {"name": name, "error": "file bukan gambar yang valid"}
+                continue
+            # BGR hanya untuk profil dengan color_mask; profil lain tetap grayscale seperti pipeline
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+            decode_ms = (time.perf_counter() - t0) * 1000
+            fa = pool.submit(run_profile, frame if params_a["color_mask"] else gray, params_a, ocr, ocr_first, ocr_psm)
+            fb = pool.submit(run_profile, frame if params_b["color_mask"] else gray, params_b, ocr, ocr_first, ocr_psm)
+            a, b = fa.result(), fb.result()
+            only_a, only_b = unmatched_boxes(a["boxes"], b["boxes"])
+            yield {
+                "name": name, "error": None, "decode_ms": decode_ms,
+                "plates_a": len(a["boxes"]), "plates_b": len(b["boxes"]),
+                "only_a": only_a, "only_b": only_b,
+                "texts_a": a["texts"], "texts_b": b["texts"],
+                "same_text": sorted(a["texts"]) == sorted(b["texts"]),
+                "ms_a": a["ms"], "ms_b": b["ms"],
+            }
+
+
+def as_gray(data):
+    """Frame grayscale dari bytes JPG/PNG, array bytes terenkode, atau array gambar; None jika tidak valid."""
+    if data is None or len(data) == 0:
+        return None
+    if isinstance(data, np.ndarray) and data.ndim >= 2:
+        return cv2.cvtColor(data, cv2.COLOR_BGR2GRAY) if data.ndim == 3 else data
+    return decode_gray(data)
+
+
+def as_color(data):
+    """Seperti as_gray, tetapi BGR (untuk profil dengan color_mask); frame grayscale dikembalikan apa adanya."""
+    if data is None or len(data) == 0:
+        return None
+    if isinstance(data, np.ndarray) and data.ndim >= 2:
+        return data
+    return decode_image(data)
+
+
+def summarize(rows):
+    ok = [r for r in rows if not r["error"]]
+    if not ok:
+        return {"images": 0, "failed": len(rows)}
+    return {
+        "images": len(ok), "failed": len(rows) - len(ok),
+        "plates_a": sum(r["plates_a"] for r in ok), "plates_b": sum(r["plates_b"] for r in ok),
+        "differing_boxes": sum(1 for r in ok if r["only_a"] or r["only_b"]),
+        "differing_text": sum(1 for r in ok if not r["same_text"]),
+        "mean_ms_a": statistics.mean(r["ms_a"] for r in ok), "mean_ms_b": statistics.mean(r["ms_b"] for r in ok),
+        "mean_decode_ms": statistics.mean(r["decode_ms"] for r in ok),
+    }
+
+
+def iter_files(paths):
+    for p in paths:
+        if p.endswith(".pack"):
+            yield from ImagePack(p)
+            continue
+        files = [os.path.join(p, f) for f in sorted(os.listdir(p))] if os.path.isdir(p) else [p]
+        for f in files:
+            if f.lower().endswith(IMAGE_EXT):
+                with open(f, "rb") as fh:
+                    yield os.path.basename(f), fh.read()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Bandingkan dua profil parameter atas sekumpulan gambar")
+    ap.add_argument("paths", nargs="+", help="file gambar atau folder")
+    ap.add_argument("--owner", default="")
+    ap.add_argument("--camera", default="")
+    ap.add_argument("--a", default=DEFAULT_PROFILE, help="nama profil A")
+    ap.add_argument("--b", required=True, help="nama profil B")
+    ap.add_argument("--no-ocr", action="store_true")
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+
+    conn = connect(args.db)
+    pa = load_profile(conn, args.owner, args.camera, args.a)
+    pb = load_profile(conn, args.owner, args.camera, args.b)
+    conn.close()
+
+    rows = []
+    for r in compare_profiles(iter_files(args.paths), pa, pb, ocr=not args.no_ocr):
+        rows.append(r)
+        if r["error"]:
+            print(f"{r['name']:<30} GAGAL: {r['error']}")
+            continue
+        mark = "" if r["same_text"] and not (r["only_a"] or r["only_b"]) else "  BEDA"
+        print(f"{r['name']:<30} A={r['plates_a']} {','.join(r['texts_a']) or '-':<20} {r['ms_a']:7.1f} ms  "
+              f"B={r['plates_b']} {','.join(r['texts_b']) or '-':<20} {r['ms_b']:7.1f} ms{mark}")
+    s = summarize(rows)
+    if s["images"]:
+        print(f"{s['images']} gambar ({s['failed']} gagal): plat A={s['plates_a']} B={s['plates_b']}, "
+              f"kotak beda={s['differing_boxes']}, teks beda={s['differing_text']}, "
+              f"rata-rata A={s['mean_ms_a']:.1f} ms B={s['mean_ms_b']:.1f} ms (decode {s['mean_decode_ms']:.1f} ms)")
@@ -0,0 +1,273 @@
+import os
+
+import cv2
+import numpy as np
+
+import ops_metrics
+import template_ocr
+from plate_syntax import MIN_SYNTAX_SCORE, correct_plates
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# ================= BACKEND OCR =================
+# "tesseract" (proses eksternal), "template" (template_ocr.py, di dalam proses)
+# atau "auto": tesseract bila terpasang, selain itu template
+OCR_BACKENDS = ("auto", "tesseract", "template")
+OCR_BACKEND = os.environ.get("PLATE_OCR_BACKEND", "auto")
+
+# Lokasi tesseract bila tidak ada di PATH; default instalasi Windows dipakai jika ada
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD")
+WINDOWS_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+if pytesseract is not None:
+    if TESSERACT_CMD:
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    elif os.path.exists(WINDOWS_TESSERACT):
+        pytesseract.pytesseract.tesseract_cmd = WINDOWS_TESSERACT
+
+_backend = None
+
+
+def tesseract_available():
+    if pytesseract is None:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def set_backend(name):
+    """Pilih backend OCR untuk proses ini ("auto", "tesseract" atau "template")."""
+    global OCR_BACKEND, _backend
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"backend OCR tidak dikenal: {name}")
+    OCR_BACKEND, _backend = name, None
+
+
+def get_backend():
+    """Modul dengan antarmuka pytesseract (image_to_data + Output) yang sedang aktif.
+
+    Pada mode auto, ketersediaan tesseract hanya dicek sekali per proses.
+    """
+    global _backend
+    if _backend is None:
+        name = OCR_BACKEND
+        if name == "auto":
+            name = "tesseract" if tesseract_available() else "template"
+        if name == "tesseract" and pytesseract is None:
+            raise RuntimeError("pytesseract tidak terpasang")
+        _backend = pytesseract if name == "tesseract" else template_ocr
+    return _backend
+
+
+def backend_name():
+    return "template" if get_backend() is template_ocr else "tesseract"
+
+
+def image_to_data(img, psm):
+    backend = get_backend()
+    ops_metrics.count("ocr_calls")
+    return backend.image_to_data(img, config=tesseract_config(psm), output_type=backend.Output.DICT)
+
+
+# ================= KONFIG OCR =================
+WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# Rata-rata keyakinan minimal (0-100) agar hasil diterima tanpa retry
+MIN_CONF = 75
+
+# Urutan eskalasi: varian preprocessing x mode psm, dari yang paling murah
+RETRY_PLAN = [
+    ("otsu", 7),
+    ("prep", 8),
+    ("prep", 7),
+    ("otsu_inv", 7),
+    ("raw", 13),
+]
+
+# Tinggi strip dan jarak antar strip saat beberapa crop digabung jadi satu gambar
+BATCH_HEIGHT = 48
+BATCH_GAP = 16
+
+
+def tesseract_config(psm):
+    return f"--psm {psm} -c tessedit_char_whitelist={WHITELIST}"
+
+
+def clean_text(txt):
+    return "".join(ch for ch in txt.upper() if ch.isalnum())
+
+
+# ================= PREPROCESSING =================
+def preprocess_for_ocr(img):
+    # Konversi ke grayscale jika belum
+    if len(img.shape) == 3:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = img
+
+    # Perbesar jika terlalu kecil (tinggi minimal 50 piksel)
+    if gray.shape[0] < 50:
+        scale = 50 / gray.shape[0]
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+
+    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+    _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+    return cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+
+
+def make_variant(crop, name):
+    if name == "raw":
+        return crop
+    if name == "prep":
+        return preprocess_for_ocr(crop)
+
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if len(crop.shape) == 3 else crop
+    if name == "otsu":
+        _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return th
+    if name == "otsu_inv":
+        _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        return th
+    raise ValueError(f"varian OCR tidak dikenal: {name}")
+
+
+# ================= OCR DENGAN KEYAKINAN =================
+def ocr_pass(img, psm):
+    """Satu panggilan OCR, mengembalikan (teks, keyakinan per karakter).
+
+    Tesseract (dan template_ocr) hanya melaporkan keyakinan per kata, jadi setiap karakter
+    mewarisi keyakinan kata tempat ia berada.
+    """
+    data = image_to_data(img, psm)
+    text, char_conf = "", []
+    for word, conf in zip(data["text"], data["conf"]):
+        word = clean_text(word)
+        conf = float(conf)
+        if not word or conf < 0:
+            continue
+        text += word
+        char_conf.extend([conf] * len(word))
+    return text, char_conf
+
+
+def make_result(raw, char_conf, variant, psm, passes, plate, syntax):
+    """Hasil OCR satu crop; `text` sudah dikoreksi sesuai tata bahasa plat (plate_syntax.py)."""
+    return {
+        "text": plate,
+        "raw": raw,
+        "conf": sum(char_conf) / len(char_conf) if char_conf else 0.0,
+        "char_conf": char_conf,
+        "valid": syntax > 0,
+        "syntax": syntax,
+        "variant": variant,
+        "psm": psm,
+        "passes": passes,
+    }
+
+
+def _score(result):
+    return (result["valid"], result["syntax"], result["conf"])
+
+
+def _accept(result, min_conf):
+    return result["valid"] and result["syntax"] >= MIN_SYNTAX_SCORE and result["conf"] >= min_conf
+
+
+def read_plate(crop, psm=7, first="raw", min_conf=MIN_CONF, max_passes=4, done=()):
+    """OCR plat dengan retry adaptif.
+
+    Pass pertama memakai varian `first` dan `psm` milik pemanggil. Bila hasilnya
+    (setelah koreksi posisi) cocok dengan pola plat dengan skor sintaks >=
+    MIN_SYNTAX_SCORE dan rata-rata keyakinannya >= `min_conf`, langsung
+    berhenti; jika tidak, lanjut ke RETRY_PLAN sampai `max_passes` tercapai dan
+    mengembalikan hasil terbaik (sintaks dulu, lalu keyakinan).
+
+    `done` berisi pasangan (varian, psm) yang sudah dicoba pemanggil; pasangan
+    itu dilewati dan ikut dihitung dalam `max_passes`.
+    """
+    plan = [(first, psm)] + [p for p in RETRY_PLAN if p != (first, psm)]
+    plan = [p for p in plan if p not in done]
+    best = None
+
+    for passes, (variant, mode) in enumerate(plan[:max_passes - len(done)], start=len(done) + 1):
+        text, char_conf = ocr_pass(make_variant(crop, variant), mode)
+        checked = correct_plates([text])
+        result = make_result(text, char_conf, variant, mode, passes, checked["plate"][0], float(checked["score"][0]))
+        if best is None or _score(result) > _score(best):
+            best = result
+        best["passes"] = passes
+
+        if _accept(result, min_conf):
+            break
+
+    return best
+
+
+# ================= OCR BATCH =================
+def _strip(crop, variant):
+    img = make_variant(crop, variant)
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    scale = BATCH_HEIGHT / img.shape[0]
+    img = cv2.resize(img, (max(1, int(img.shape[1] * scale)), BATCH_HEIGHT), interpolation=cv2.INTER_LINEAR)
+    # Warna latar strip mengikuti tepi crop agar sambungan tidak terbaca sebagai garis
+    bg = int(np.median(np.concatenate([img[0], img[-1]])))
+    return img, bg
+
+
+def read_plates_batch(crops, first="raw", psm=7, min_conf=MIN_CONF, max_passes=4):
+    """OCR banyak crop dengan satu panggilan OCR.
+
+    Crop disusun vertikal (satu baris per crop) lalu dibaca dengan psm 6;
+    kata dikembalikan ke crop asalnya berdasarkan posisi y. Crop yang hasilnya
+    tidak valid atau kurang yakin diulang satu per satu lewat read_plate, mulai
+    dari pass 2: batch dihitung sebagai pass 1, sehingga total panggilan OCR
+    paling banyak 1 + (max_passes - 1) * len(crops).
+    """
+    if len(crops) <= 1:
+        return [read_plate(c, psm=psm, first=first, min_conf=min_conf, max_passes=max_passes) for c in crops]
+
+    strips = [_strip(c, first) for c in crops]
+    row_h = BATCH_HEIGHT + BATCH_GAP
+    width = max(s.shape[1] for s, _ in strips) + 2 * BATCH_GAP
+    canvas = np.full((BATCH_GAP + row_h * len(strips), width), 255, np.uint8)
+    for i, (s, bg) in enumerate(strips):
+        y0 = i * row_h
+        canvas[y0:y0 + row_h + BATCH_GAP, :] = bg
+        canvas[y0 + BATCH_GAP:y0 + BATCH_GAP + BATCH_HEIGHT, BATCH_GAP:BATCH_GAP + s.shape[1]] = s
+
+    data = image_to_data(canvas, 6)
+    texts = [""] * len(crops)
+    confs = [[] for _ in crops]
+    for word, conf, top, height in zip(data["text"], data["conf"], data["top"], data["height"]):
+        word = clean_text(word)
+        conf = float(conf)
+        if not word or conf < 0:
+            continue
+        idx = min(len(crops) - 1, max(0, (top + height // 2 - BATCH_GAP // 2) // row_h))
+        texts[idx] += word
+        confs[idx].extend([conf] * len(word))
+
+    # Koreksi sintaks untuk semua crop sekaligus
+    checked = correct_plates(texts)
+    results = []
+    for i, (crop, text, char_conf) in enumerate(zip(crops, texts, confs)):
+        result = make_result(text, char_conf, first, 6, 1, checked["plate"][i], float(checked["score"][i]))
+        if not _accept(result, min_conf) and max_passes > 1:
+            retry = read_plate(crop, psm=psm, first=first, min_conf=min_conf, max_passes=max_passes,
+                               done=[(first, 6)])
+            if _score(retry) >= _score(result):
+                result = retry
+            else:
+                result["passes"] = retry["passes"]
+        results.append(result)
+    return results
+
@@ -0,0 +1,882 @@
+import re
+import threading
+import time
+import cv2
+import numpy as np
+import ops_metrics
+import plate_verifier
+import quality_gate
+from plate_color import apply_mask, plate_color_mask
+from plate_ocr import BATCH_HEIGHT, read_plates_batch
+from plate_syntax import MIN_SYNTAX_SCORE, correct_plate
+from integral_detector import detect_license_plate_integral, non_max_suppression
+from threshold_engines import (AUTO_METHODS, ENGINE_KERNEL, ENGINE_LABELS, GLOBAL_LEVEL_ENGINES, auto_params,
+                               binarize, engine_candidates, level_histogram, otsu_from_hist, resolution_scale)
+
+# ================= PARAMETER DEFAULT =================
+DEFAULT_PARAMS = {
+    "canny_min": 50, "canny_max": 200,
+    "kernel_w": 20, "kernel_h": 8,
+    "min_area": 1500, "min_ratio": 2.0, "max_ratio": 6.0,
+    # Engine binarisasi (lihat threshold_engines.py) dan parameternya
+    "threshold": "canny", "block_size": 45, "c": 5, "sobel_ksize": 3,
+    # False, atau "otsu"/"median": ambang Canny, kernel dan min_area dihitung per gambar
+    "auto_params": False,
+    # Anggaran memori per tile (MB): None = otomatis untuk gambar >= LARGE_IMAGE_PX, 0 = tanpa tile
+    "tile_mb": None,
+    # Crop diluruskan dari minAreaRect ke tinggi tetap (lihat rectify_plate)
+    "rectify": True,
+    # Opening setelah closing (seperti DsEmpat/DsLima) untuk membuang tonjolan tipis
+    "morph_open": False,
+    # Ambang IoU NMS antar kotak kandidat sebelum crop/OCR (0 = tanpa NMS)
+    "nms_iou": 0.3,
+    # False = satu pass; True = DEFAULT_CASCADE; atau daftar level (lihat CASCADE_LEVELS)
+    "cascade": False,
+    # Gambar buram/terlalu gelap/terang/kecil dilewati sebelum deteksi dan OCR (lihat quality_gate.py)
+    "quality_gate": False,
+    # Kontur hanya dicari di area berwarna plat (mask HSV, lihat plate_color.py); butuh gambar BGR
+    "color_mask": False,
+    # Crop yang bukan plat menurut model HOG + linear (lihat plate_verifier.py) dibuang sebelum OCR
+    "verifier": False
+}
+
+# ================= TILE =================
+LARGE_IMAGE_PX = 12_000_000
+DEFAULT_TILE_MB = 64
+# Buffer per piksel tile: salinan BGR, gray, blur, edge, morph dan salinan di findContours
+TILE_BYTES_PER_PX = 8
+# Sisi terpanjang gambar pratinjau (edge/morph/bounding box) pada mode tile
+PREVIEW_SIDE = 1280
+
+# ================= LOKASI LAMPUNG =================
+WILAYAH_LAMPUNG = {
+    "ABC": "Kota Bandar Lampung", "EF": "Kabupaten Lampung Selatan", "GH": "Kabupaten Lampung Tengah",
+    "JK": "Kabupaten Lampung Utara", "LM": "Kabupaten Tanggamus", "NP": "Kabupaten Tulang Bawang",
+    "QR": "Kabupaten Lampung Timur", "ST": "Kabupaten Way Kanan", "UV": "Kabupaten Pesawaran",
+    "WX": "Kabupaten Mesuji", "YZ": "Kabupaten Pesisir Barat & Tulang Bawang Barat"
+}
+
+
+def get_region(text):
+    if not text: return "teks plat kosong"
+    # Koreksi posisi (8E -> BE, angka 8 di huruf akhir -> B, dst.) sebelum mencocokkan kode wilayah
+    text = correct_plate(text)[0]
+    if not text.startswith("BE"): return "plat ini bukan dari lampung"
+    m = re.search(r"BE\d+([A-Z])", text)
+    if not m: return "kode wilayah Lampung tidak dikenali"
+    code = m.group(1)
+    for k, v in WILAYAH_LAMPUNG.items():
+        if code in k: return v
+    return "kode wilayah Lampung tidak dikenali"
+
+
+# ================= WILAYAH NASIONAL =================
+KODE_WILAYAH = {
+    "BE": "Lampung", "D": "Bandung", "E": "Cirebon", "B": "Jakarta & Sekitar",
+    "F": "Bogor", "BG": "Palembang", "L": "Surabaya", "H": "Semarang", "AB": "Yogyakarta"
+}
+
+
+def wilayah(text):
+    if not text: return "Tidak dikenali"
+    text = correct_plate(text)[0]
+    for k, v in KODE_WILAYAH.items():
+        if text.startswith(k): return v
+    return "Wilayah tidak terdaftar"
+
+
+REGION_FUNCS = {"lampung": get_region, "nasional": wilayah}
+
+
+# ================= DETEKSI =================
+def params_with_defaults(params=None):
+    merged = dict(DEFAULT_PARAMS)
+    if params:
+        merged.update({k: v for k, v in params.items() if k in DEFAULT_PARAMS})
+    return merged
+
+
+# Parameter boleh bernilai negatif (konstanta adaptive threshold)
+SIGNED_PARAMS = ("c",)
+# Ukuran kernel Sobel yang diterima cv2.Sobel
+SOBEL_KSIZES = (1, 3, 5, 7)
+
+
+def validate_params(params):
+    """params_with_defaults untuk parameter dari luar (mis. request HTTP); ValueError jika tipe/nilainya salah."""
+    if params is not None and not isinstance(params, dict):
+        raise ValueError("params harus berupa objek")
+    merged = params_with_defaults(params)
+    for key, default in DEFAULT_PARAMS.items():
+        value = merged[key]
+        if key == "threshold":
+            ok = value in ENGINE_LABELS
+        elif key == "auto_params":
+            ok = isinstance(value, bool) or value in AUTO_METHODS
+        elif key == "cascade":
+            ok = isinstance(value, (bool, str, list))
+        elif key == "tile_mb":
+            ok = value is None or (isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0)
+        elif key in ("kernel_w", "kernel_h"):
+            # Dipakai langsung oleh cv2.getStructuringElement: bilangan bulat >= 1
+            ok = isinstance(value, int) and not isinstance(value, bool) and value >= 1
+        elif key == "sobel_ksize":
+            ok = not isinstance(value, bool) and value in SOBEL_KSIZES
+        elif isinstance(default, bool):
+            ok = isinstance(value, bool)
+        else:
+            ok = (isinstance(value, (int, float)) and not isinstance(value, bool)
+                  and (value >= 0 or key in SIGNED_PARAMS))
+        if not ok:
+            raise ValueError(f"nilai parameter {key} tidak valid: {value!r}")
+    if merged["nms_iou"] > 1:
+        raise ValueError("nms_iou harus di antara 0 dan 1")
+    if merged["min_ratio"] >= merged["max_ratio"]:
+        raise ValueError("min_ratio harus lebih kecil dari max_ratio")
+    cascade_levels(merged)
+    return merged
+
+
+def filter_boxes(morph, params):
+    """Kotak (x, y, w, h) kontur yang lolos filter beserta minAreaRect-nya, setelah NMS."""
+    cnts, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes, rects = [], []
+    for c in cnts:
+        if cv2.contourArea(c) > params["min_area"]:
+            x, y, w, h = cv2.boundingRect(c)
+            r = w / h if h else 0
+            if params["min_ratio"] < r < params["max_ratio"]:
+                boxes.append((x, y, w, h))
+                rects.append(cv2.minAreaRect(c))
+    return suppress_overlaps(boxes, rects, params["nms_iou"])
+
+
+def suppress_overlaps(boxes, rects, iou):
+    """Satu kotak per plat: kotak yang tumpang tindih (IoU > `iou`) atau sebagian besar berada
+    di dalam kotak lain dibuang, yang terbesar dipertahankan. IoU dihitung tervektor (NumPy).
+    """
+    if not iou or len(boxes) < 2:
+        return boxes, rects
+    arr = np.array(boxes)
+    keep = sorted(non_max_suppression(arr, arr[:, 2] * arr[:, 3], iou_thresh=iou))
+    return [boxes[i] for i in keep], [rects[i] for i in keep]
+
+
+def close_kernel(engine, params, auto, scale):
+    kw, kh = params["kernel_w"], params["kernel_h"]
+    if auto and engine in ENGINE_KERNEL:
+        kw, kh = (max(1, int(round(k * scale))) for k in ENGINE_KERNEL[engine])
+    return cv2.getStructuringElement(cv2.MORPH_RECT, (kw, kh))
+
+
+def use_tiles(img, params):
+    if params["tile_mb"] == 0:
+        return False
+    return bool(params["tile_mb"]) or img.shape[0] * img.shape[1] >= LARGE_IMAGE_PX
+
+
+def locate_plates(img, params):
+    """Binarisasi + morfologi + filter kontur.
+
+    Mengembalikan dict boxes, edge, morph, engine dan params (parameter yang
+    benar-benar dipakai). Dengan threshold "auto" engine dicoba dari yang
+    termurah sampai ada kandidat plat; engine yang punya kernel sendiri
+    (adaptive) memakainya. Dengan auto_params, ambang Canny dihitung dari
+    gambar dan kernel/min_area diskalakan sesuai resolusi.
+    """
+    if use_tiles(img, params):
+        return locate_plates_tiled(img, params)
+    mask = plate_color_mask(img) if params["color_mask"] and img.ndim == 3 else None
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    if params["auto_params"]:
+        method = params["auto_params"] if params["auto_params"] in AUTO_METHODS else "otsu"
+        params = auto_params(blur, params, method)
+    scale = resolution_scale(blur.shape) if params["auto_params"] else 1.0
+
+    auto = params["threshold"] == "auto"
+    for engine in engine_candidates(blur, params["threshold"]):
+        edge = binarize(blur, engine, params)
+        kernel = close_kernel(engine, params, auto, scale)
+        morph = cv2.morphologyEx(edge, cv2.MORPH_CLOSE, kernel)
+        if params["morph_open"]:
+            morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
+        if mask is not None:
+            morph = apply_mask(morph, mask)
+        boxes, rects = filter_boxes(morph, params)
+        if boxes:
+            break
+    return {"boxes": boxes, "rects": rects, "edge": edge, "morph": morph, "engine": engine, "params": params,
+            "tiles": 0}
+
+
+def tile_grid(h, w, side, overlap):
+    """Koordinat (y0, y1, x0, x1) tile persegi yang saling tumpang tindih selebar `overlap`."""
+    step = max(1, side - overlap)
+    ys = list(range(0, max(h - overlap, 1), step))
+    xs = list(range(0, max(w - overlap, 1), step))
+    return [(y, min(y + side, h), x, min(x + side, w)) for y in ys for x in xs]
+
+
+def merge_pieces(pieces):
+    """Gabungkan potongan kontur yang terpotong batas tile menjadi satu kotak.
+
+    Setiap potongan berupa (x, y, w, h, area, tx0, ty0, tx1, ty1, mask) dengan
+    koordinat tile asalnya dan `mask` isi kontur seukuran kotaknya. Dua
+    potongan dari tile berbeda dianggap kontur yang sama jika piksel mask
+    keduanya bertemu di area tumpang tindih kedua tile; kotak yang hanya
+    beririsan (mis. plat dan garis di dekatnya) tidak digabung.
+    Penggabungan berlaku transitif. Luas gabungan didekati dengan jumlah
+    luas potongan, dibatasi luas kotak gabungan.
+    """
+    if not pieces:
+        return []
+    b = np.array([piece[:9] for piece in pieces], dtype=float)
+    x0, y0, x1, y1 = b[:, 0], b[:, 1], b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    tx0, ty0, tx1, ty1 = b[:, 5], b[:, 6], b[:, 7], b[:, 8]
+
+    # Area tumpang tindih setiap pasangan tile
+    bx0, by0 = np.maximum(tx0[:, None], tx0[None, :]), np.maximum(ty0[:, None], ty0[None, :])
+    bx1, by1 = np.minimum(tx1[:, None], tx1[None, :]), np.minimum(ty1[:, None], ty1[None, :])
+
+    def clip(a0, a1, lo, hi, axis):
+        return np.maximum(np.expand_dims(a0, axis), lo), np.minimum(np.expand_dims(a1, axis), hi)
+
+    # Potongan i (baris) dan j (kolom) yang dipotong ke area tumpang tindih
+    ix0, ix1 = clip(x0, x1, bx0, bx1, 1)
+    iy0, iy1 = clip(y0, y1, by0, by1, 1)
+    jx0, jx1 = clip(x0, x1, bx0, bx1, 0)
+    jy0, jy1 = clip(y0, y1, by0, by1, 0)
+    inter = (np.clip(np.minimum(ix1, jx1) - np.maximum(ix0, jx0), 0, None) *
+             np.clip(np.minimum(iy1, jy1) - np.maximum(iy0, jy0), 0, None))
+    other_tile = (tx0[:, None] != tx0[None, :]) | (ty0[:, None] != ty0[None, :])
+    touch = other_tile & (inter > 0)
+
+    parent = list(range(len(pieces)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def pixels_touch(i, j):
+        # Irisan kotak i, j di dalam area tumpang tindih tile; kotak sudah pasti beririsan
+        rx0, ry0 = int(max(ix0[i, j], jx0[i, j])), int(max(iy0[i, j], jy0[i, j]))
+        rx1, ry1 = int(min(ix1[i, j], jx1[i, j])), int(min(iy1[i, j], jy1[i, j]))
+        mi = pieces[i][9][ry0 - int(y0[i]):ry1 - int(y0[i]), rx0 - int(x0[i]):rx1 - int(x0[i])]
+        mj = pieces[j][9][ry0 - int(y0[j]):ry1 - int(y0[j]), rx0 - int(x0[j]):rx1 - int(x0[j])]
+        return bool(np.any(mi & mj))
+
+    for i, j in zip(*np.nonzero(np.triu(touch, 1))):
+        if pixels_touch(i, j):
+            parent[find(i)] = find(j)
+
+    groups = {}
+    for i in range(len(pieces)):
+        groups.setdefault(find(i), []).append(i)
+    merged = []
+    for idx in groups.values():
+        gx0, gy0 = int(x0[idx].min()), int(y0[idx].min())
+        gx1, gy1 = int(x1[idx].max()), int(y1[idx].max())
+        area = min(b[idx, 4].sum(), (gx1 - gx0) * (gy1 - gy0))
+        merged.append((gx0, gy0, gx1 - gx0, gy1 - gy0, area))
+    return merged
+
+
+def box_passes(box, params):
+    x, y, w, h, area = box
+    r = w / h if h else 0
+    return area > params["min_area"] and params["min_ratio"] < r < params["max_ratio"]
+
+
+def locate_plates_tiled(img, params):
+    """Versi locate_plates untuk gambar sangat besar dengan memori puncak sebatas ukuran tile.
+
+    Gambar diproses per tile persegi yang saling tumpang tindih; buffer
+    gray/blur/edge/morph hanya sebesar satu tile. Kontur yang menyentuh batas
+    tile bagian dalam digabung lintas tile sebelum filter luas/rasio, dan
+    kotak ganda dari area tumpang tindih dibuang. Statistik (auto params,
+    engine auto) dihitung dari versi kecil gambar, ambang Otsu dari histogram
+    gabungan semua tile, sedangkan edge/morph
+    dikembalikan sebagai pratinjau berukuran PREVIEW_SIDE.
+    """
+    H, W = img.shape[:2]
+    s = min(1.0, PREVIEW_SIDE / max(H, W))
+    small = cv2.resize(img, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+    small_gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    mask = plate_color_mask(small) if params["color_mask"] and small.ndim == 3 else None
+    small_blur = cv2.GaussianBlur(small_gray, (5, 5), 0)
+    if params["auto_params"]:
+        method = params["auto_params"] if params["auto_params"] in AUTO_METHODS else "otsu"
+        params = auto_params(small_blur, params, method, shape=img.shape)
+    scale = resolution_scale(img.shape) if params["auto_params"] else 1.0
+
+    # Tumpang tindih cukup untuk kernel closing + blur di kedua sisi batas
+    kernel_side = max(params["kernel_w"], params["kernel_h"],
+                      *(int(round(max(k) * scale)) for k in ENGINE_KERNEL.values()))
+    overlap = 2 * kernel_side + 8
+    budget = (params["tile_mb"] or DEFAULT_TILE_MB) * 1024 * 1024
+    # Tile minimal 4x tumpang tindih agar jumlah tile tidak meledak pada kernel besar
+    side = max(256, 4 * overlap, int(np.sqrt(budget / TILE_BYTES_PER_PX)))
+    tiles = tile_grid(H, W, side, overlap)
+    ph, pw = small.shape[:2]
+
+    auto = params["threshold"] == "auto"
+    for engine in engine_candidates(small_blur, params["threshold"]):
+        kernel = close_kernel(engine, params, auto, scale)
+        level = None
+        if engine in GLOBAL_LEVEL_ENGINES:
+            # Pass pertama: histogram semua tile agar ambang Otsu sama dengan gambar utuh
+            hist = np.zeros(256)
+            for y0, y1, x0, x1 in tiles:
+                tile = img[y0:y1, x0:x1]
+                gray = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY) if tile.ndim == 3 else tile
+                hist += level_histogram(cv2.GaussianBlur(gray, (5, 5), 0), engine, params)
+            level = otsu_from_hist(hist)
+        edge_prev = np.zeros((ph, pw), np.uint8)
+        morph_prev = np.zeros((ph, pw), np.uint8)
+        complete, pieces = [], []
+        for y0, y1, x0, x1 in tiles:
+            tile = img[y0:y1, x0:x1]
+            gray = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY) if tile.ndim == 3 else tile
+            edge = binarize(cv2.GaussianBlur(gray, (5, 5), 0), engine, params, level)
+            morph = cv2.morphologyEx(edge, cv2.MORPH_CLOSE, kernel)
+            if params["morph_open"]:
+                morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
+            if mask is not None:
+                morph = apply_mask(morph, mask, (y0, y1, x0, x1, H, W))
+
+            cnts, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            th, tw = morph.shape
+            for c in cnts:
+                x, y, w, h = cv2.boundingRect(c)
+                box = (x0 + x, y0 + y, w, h, cv2.contourArea(c))
+                cut = ((x == 0 and x0 > 0) or (y == 0 and y0 > 0) or
+                       (x + w == tw and x1 < W) or (y + h == th and y1 < H))
+                if cut:
+                    # Potongan sangat kecil tidak mungkin menjadi bagian penting plat
+                    if box[4] > 0.05 * params["min_area"]:
+                        fill = np.zeros((h, w), np.uint8)
+                        cv2.drawContours(fill, [c - (x, y)], -1, 1, -1)
+                        pieces.append(box + (x0, y0, x1, y1, fill))
+                elif box_passes(box, params):
+                    complete.append(box)
+
+            py0, py1, px0, px1 = (int(round(v * s)) for v in (y0, y1, x0, x1))
+            if py1 > py0 and px1 > px0:
+                edge_prev[py0:py1, px0:px1] = cv2.resize(edge, (px1 - px0, py1 - py0), interpolation=cv2.INTER_AREA)
+                morph_prev[py0:py1, px0:px1] = cv2.resize(morph, (px1 - px0, py1 - py0), interpolation=cv2.INTER_AREA)
+
+        found = complete + [m for m in merge_pieces(pieces) if box_passes(m, params)]
+        if found:
+            arr = np.array([f[:4] for f in found])
+            # Kotak ganda dari area tumpang tindih tile selalu dibuang, walau nms_iou = 0
+            keep = non_max_suppression(arr, arr[:, 2] * arr[:, 3], iou_thresh=params["nms_iou"] or 0.5)
+            boxes = [tuple(int(v) for v in arr[i]) for i in sorted(keep)]
+            break
+        boxes = []
+    # Kontur gabungan lintas tile tidak punya minAreaRect; crop-nya tetap sejajar sumbu
+    return {"boxes": boxes, "rects": [None] * len(boxes), "edge": edge_prev, "morph": morph_prev,
+            "engine": engine, "params": params, "tiles": len(tiles)}
+
+
+# ================= CROP =================
+# Tinggi crop kanonik sama dengan tinggi strip batch OCR, jadi tidak perlu resize lagi
+PLATE_HEIGHT = BATCH_HEIGHT
+# Margin di sekeliling rect, relatif terhadap ukurannya, agar tepi karakter tidak terpotong
+RECT_MARGIN = 0.06
+
+
+def order_corners(pts):
+    """Urutkan 4 titik menjadi kiri-atas, kanan-atas, kanan-bawah, kiri-bawah."""
+    pts = np.asarray(pts, np.float32)
+    s, d = pts.sum(axis=1), np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(s)], pts[np.argmin(d)], pts[np.argmax(s)], pts[np.argmax(d)]], np.float32)
+
+
+def rectify_plate(img, rect=None, quad=None, height=PLATE_HEIGHT, margin=RECT_MARGIN):
+    """Luruskan plat ke gambar setinggi `height` dengan rasio aspek asli.
+
+    Sumbernya minAreaRect ((cx, cy), (w, h), sudut) atau segi empat `quad`
+    (4 titik, mis. hasil approxPolyDP) untuk koreksi perspektif. Hanya piksel
+    keluaran yang dihitung, jadi biayanya sebanding dengan ukuran crop.
+    """
+    if quad is not None:
+        src = order_corners(quad)
+        w = max(np.linalg.norm(src[1] - src[0]), np.linalg.norm(src[2] - src[3]))
+        h = max(np.linalg.norm(src[3] - src[0]), np.linalg.norm(src[2] - src[1]))
+    else:
+        (cx, cy), (w, h), angle = rect
+        # Sisi panjang selalu horizontal
+        if w < h:
+            w, h, angle = h, w, angle + 90
+        w, h = w * (1 + 2 * margin), h * (1 + 2 * margin)
+        src = order_corners(cv2.boxPoints(((cx, cy), (w, h), angle)))
+    if h < 1 or w < 1:
+        return None
+    out_w = max(1, int(round(height * w / h)))
+    dst = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, height - 1], [0, height - 1]], np.float32)
+    m = cv2.getPerspectiveTransform(src, dst)
+    return cv2.warpPerspective(img, m, (out_w, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def crop_plates(img, out, rectify=True):
+    """Crop semua plat pada output locate_plates; diluruskan jika rect tersedia."""
+    crops = []
+    for (x, y, w, h), rect in zip(out["boxes"], out["rects"]):
+        warped = rectify_plate(img, rect) if rectify and rect is not None else None
+        crops.append(warped if warped is not None else img[y:y+h, x:x+w])
+    return crops
+
+
+def draw_boxes(img, boxes, max_side=None):
+    """Gambar bounding box; dengan max_side digambar di atas salinan yang diperkecil."""
+    s = min(1.0, max_side / max(img.shape[:2])) if max_side else 1.0
+    if s < 1:
+        box_img = cv2.resize(img, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+        boxes = [tuple(int(round(v * s)) for v in b) for b in boxes]
+    else:
+        box_img = img.copy()
+    for x, y, w, h in boxes:
+        cv2.rectangle(box_img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+    return box_img
+
+
+# ================= CASCADE =================
+# Sisi terpanjang gambar pada level "fast"
+FAST_SIDE = 640
+CLAHE_CLIP = 2.0
+CLAHE_GRID = (8, 8)
+# Skala yang dicoba level "multiscale"; skala yang membuat gambar >= LARGE_IMAGE_PX dilewati
+MULTISCALE_FACTORS = (0.5, 1.0, 1.5)
+# Urutan level jika cascade=True: dari yang termurah, level berikutnya hanya untuk gambar yang belum punya plat valid
+DEFAULT_CASCADE = ("fast", "clahe", "open_close", "adaptive", "multiscale")
+CASCADE_LABELS = {
+    False: "Satu pass (tanpa cascade)",
+    True: "Cascade: " + " → ".join(DEFAULT_CASCADE),
+}
+
+
+def _gray(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+
+def scale_params(params, s):
+    """Parameter berukuran piksel (kernel, min_area) untuk gambar yang diskalakan `s`, tanpa tile.
+
+    Dengan auto_params keduanya sudah dihitung dari resolusi gambar yang
+    diproses, jadi tidak diskalakan dua kali.
+    """
+    if params.get("auto_params"):
+        return dict(params, tile_mb=0)
+    return dict(params, tile_mb=0,
+                kernel_w=max(1, int(round(params["kernel_w"] * s))),
+                kernel_h=max(1, int(round(params["kernel_h"] * s))),
+                min_area=params["min_area"] * s * s)
+
+
+def locate_scaled(img, params, s):
+    """locate_plates pada gambar yang diskalakan `s`; kotak dan rect dikembalikan ke koordinat asli."""
+    if s == 1:
+        return locate_plates(img, params)
+    # Warna hanya dipertahankan jika prefilter warna dipakai
+    src = img if params["color_mask"] else _gray(img)
+    small = cv2.resize(src, None, fx=s, fy=s, interpolation=cv2.INTER_AREA if s < 1 else cv2.INTER_LINEAR)
+    out = locate_plates(small, scale_params(params, s))
+    out["boxes"] = [tuple(int(round(v / s)) for v in b) for b in out["boxes"]]
+    out["rects"] = [((r[0][0] / s, r[0][1] / s), (r[1][0] / s, r[1][1] / s), r[2]) if r else None
+                    for r in out["rects"]]
+    out["params"] = params
+    return out
+
+
+def _level_fast(img, params):
+    return locate_scaled(img, params, min(1.0, FAST_SIDE / max(img.shape[:2])))
+
+
+def _level_clahe(img, params):
+    clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP, tileGridSize=CLAHE_GRID)
+    return locate_plates(clahe.apply(_gray(img)), params)
+
+
+def _level_multiscale(img, params):
+    h, w = img.shape[:2]
+    outs = ([locate_scaled(img, params, s) for s in MULTISCALE_FACTORS if h * w * s * s < LARGE_IMAGE_PX]
+            or [locate_plates(img, params)])
+    out = max(outs, key=lambda o: len(o["boxes"]))
+    boxes = [b for o in outs for b in o["boxes"]]
+    rects = [r for o in outs for r in o["rects"]]
+    # Plat yang sama dari beberapa skala selalu digabung, walau nms_iou = 0
+    out["boxes"], out["rects"] = suppress_overlaps(boxes, rects, params["nms_iou"] or 0.5)
+    return out
+
+
+CASCADE_LEVELS = {
+    "base": locate_plates,
+    "fast": _level_fast,
+    "clahe": _level_clahe,
+    "open_close": lambda img, params: locate_plates(img, dict(params, morph_open=True)),
+    "adaptive": lambda img, params: locate_plates(img, dict(params, threshold="adaptive")),
+    "multiscale": _level_multiscale,
+}
+
+
+def cascade_levels(params):
+    """Daftar level dari parameter "cascade" (False, True, list, atau string dipisah koma)."""
+    cascade = params.get("cascade")
+    if not cascade:
+        return ("base",)
+    if cascade is True:
+        return DEFAULT_CASCADE
+    levels = tuple(cascade.split(",")) if isinstance(cascade, str) else tuple(cascade)
+    unknown = [lv for lv in levels if lv not in CASCADE_LEVELS]
+    if unknown or not levels:
+        raise ValueError(f"level cascade tidak dikenal: {', '.join(unknown) or '(kosong)'}")
+    return levels
+
+
+class CascadeStats:
+    """Jumlah gambar, hit dan waktu (deteksi + OCR) per level cascade, aman dipakai lintas thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.levels = {}
+        self.images = 0
+        self.unresolved = 0
+        self.ms_total = 0.0
+
+    def reset(self):
+        with self.lock:
+            self._clear()
+
+    def record(self, level, images, hits, ms):
+        with self.lock:
+            row = self.levels.setdefault(level, {"images": 0, "hits": 0, "ms": 0.0})
+            row["images"] += images
+            row["hits"] += hits
+            row["ms"] += ms
+            self.ms_total += ms
+
+    def finish(self, images, unresolved):
+        """Catat satu panggilan locate_and_read: jumlah gambar dan yang tetap tanpa plat valid."""
+        with self.lock:
+            self.images += images
+            self.unresolved += unresolved
+
+    def snapshot(self):
+        with self.lock:
+            rows = [{
+                "level": name, "images": r["images"], "hits": r["hits"],
+                "hit_rate": round(r["hits"] / r["images"], 3) if r["images"] else 0,
+                "ms_per_image": round(r["ms"] / r["images"], 1) if r["images"] else 0,
+                "time_share": round(r["ms"] / self.ms_total, 3) if self.ms_total else 0,
+            } for name, r in self.levels.items()]
+            return {"images": self.images, "unresolved": self.unresolved,
+                    "mean_ms": round(self.ms_total / self.images, 1) if self.images else 0, "levels": rows}
+
+
+CASCADE_STATS = CascadeStats()
+
+
+def locate_and_read(images, params_list, ocr=True, ocr_first="otsu", ocr_psm=7, region="lampung",
+                    stats=CASCADE_STATS):
+    """Deteksi + crop + OCR untuk sekumpulan gambar, level cascade demi level.
+
+    Pada setiap level semua gambar yang masih tertunda dideteksi, lalu semua
+    crop-nya dibaca dalam satu batch OCR. Gambar yang sudah punya plat valid
+    (atau, tanpa OCR, sudah punya kotak) berhenti di level itu; sisanya lanjut
+    ke level berikutnya. Gambar yang tidak pernah berhasil memakai output
+    level terakhir yang menemukan kotak. Setiap output berisi "level" dan
+    "quality" (alasan penolakan gerbang kualitas, atau "").
+    """
+    plans = [cascade_levels(p) for p in params_list]
+    outputs = [None] * len(images)
+    pending = []
+    for i, (img, params) in enumerate(zip(images, params_list)):
+        reason = check_quality(img) if params["quality_gate"] else ""
+        if reason:
+            outputs[i] = rejected_output(img, params, reason)
+        else:
+            pending.append(i)
+    depth = unresolved = 0
+    while pending:
+        level_outs, level_ms = {}, {}
+        for i in pending:
+            name = plans[i][depth]
+            t0 = time.perf_counter()
+            out = CASCADE_LEVELS[name](images[i], params_list[i])
+            out["crops"] = crop_plates(images[i], out, out["params"]["rectify"])
+            if params_list[i]["verifier"] and out["crops"]:
+                verify_plates(out)
+            out["level"] = name
+            level_outs.setdefault(name, []).append((i, out))
+            ms = (time.perf_counter() - t0) * 1000
+            level_ms[name] = level_ms.get(name, 0.0) + ms
+            ops_metrics.observe("detect", ms)
+
+        batch = [out for group in level_outs.values() for _, out in group]
+        all_crops = [c for out in batch for c in out["crops"]]
+        t0 = time.perf_counter()
+        attach_ocr(batch, all_crops, ocr, ocr_first, ocr_psm, region)
+        ocr_ms = (time.perf_counter() - t0) * 1000
+        if ocr and all_crops:
+            ops_metrics.observe("ocr", ocr_ms / len(batch))
+
+        still = []
+        for name, group in level_outs.items():
+            hits = 0
+            for i, out in group:
+                hit = any(out["valid"]) if ocr else bool(out["boxes"])
+                if hit or outputs[i] is None or out["boxes"]:
+                    outputs[i] = out
+                if hit:
+                    hits += 1
+                elif depth + 1 < len(plans[i]):
+                    still.append(i)
+                else:
+                    unresolved += 1
+            share = sum(len(out["crops"]) for _, out in group) / len(all_crops) if all_crops else 0
+            stats.record(name, len(group), hits, level_ms[name] + ocr_ms * share)
+        pending = still
+        depth += 1
+    stats.finish(len(images), unresolved)
+    ops_metrics.count("images", len(images))
+    for out in outputs:
+        out.setdefault("quality", "")
+    return outputs
+
+
+def verify_plates(out):
+    """Buang kotak, rect dan crop yang menurut plate_verifier bukan plat, sebelum OCR."""
+    t0 = time.perf_counter()
+    keep = plate_verifier.keep_mask(out["crops"])
+    ops_metrics.observe("verify", (time.perf_counter() - t0) * 1000)
+    if keep.all():
+        return
+    ops_metrics.count("verifier_rejected", int(len(keep) - keep.sum()))
+    for key in ("boxes", "rects", "crops"):
+        out[key] = [v for v, k in zip(out[key], keep) if k]
+
+
+def check_quality(img):
+    """Label alasan gerbang kualitas untuk gambar, atau "" jika lolos."""
+    t0 = time.perf_counter()
+    reason, _ = quality_gate.assess(_gray(img))
+    ops_metrics.observe("quality", (time.perf_counter() - t0) * 1000)
+    if reason:
+        ops_metrics.count("quality_rejected")
+    return quality_gate.REASON_LABELS.get(reason, "")
+
+
+def rejected_output(img, params, reason):
+    """Output tanpa kotak untuk gambar yang ditolak gerbang kualitas; edge/morph kosong seukuran pratinjau."""
+    h, w = img.shape[:2]
+    s = min(1.0, PREVIEW_SIDE / max(h, w))
+    blank = np.zeros((max(1, round(h * s)), max(1, round(w * s))), np.uint8)
+    out = {"boxes": [], "rects": [], "edge": blank, "morph": blank, "engine": None, "params": params, "tiles": 0,
+           "crops": [], "level": "quality", "quality": reason}
+    attach_ocr([out], [], ocr=False)
+    return out
+
+
+def process_batch(images, params_list=None, ocr=True, ocr_first="otsu", ocr_psm=7, region="lampung"):
+    """Deteksi + OCR + wilayah untuk beberapa gambar BGR sekaligus.
+
+    Deteksi berjalan per gambar, tetapi semua crop dari seluruh batch dikirim
+    ke OCR dalam satu batch sehingga jumlah panggilan tesseract tidak tumbuh
+    sebanding dengan jumlah plat. Dengan parameter "cascade", gambar yang
+    belum punya plat valid diulang dengan level yang lebih berat.
+    """
+    params_list = [params_with_defaults(p) for p in (params_list or [None] * len(images))]
+    return locate_and_read(images, params_list, ocr, ocr_first, ocr_psm, region)
+
+
+def attach_ocr(outputs, all_crops, ocr=True, ocr_first="otsu", ocr_psm=7, region="lampung"):
+    """Isi texts/confs/locations tiap output dari satu batch OCR atas semua crop."""
+    reads = read_plates_batch(all_crops, first=ocr_first, psm=ocr_psm) if ocr and all_crops else []
+    region_fn = REGION_FUNCS[region]
+
+    i = 0
+    for out in outputs:
+        n = len(out["crops"])
+        if ocr:
+            chunk = reads[i:i + n]
+            out["texts"] = [r["text"] for r in chunk]
+            out["confs"] = [round(r["conf"], 1) for r in chunk]
+            out["locations"] = [region_fn(r["text"]) for r in chunk]
+            out["valid"] = [bool(r["valid"] and r["syntax"] >= MIN_SYNTAX_SCORE) for r in chunk]
+        else:
+            out["valid"] = [False] * n
+            out["texts"] = ["-"] * n
+            out["confs"] = [0.0] * n
+            out["locations"] = ["OCR tidak tersedia"] * n
+        i += n
+
+
+def detect_plate(img, params=None, ocr=True):
+    """Versi satu gambar dari process_batch, dengan gambar bounding box."""
+    out = process_batch([img], [params], ocr=ocr)[0]
+    return (draw_boxes(img, out["boxes"], PREVIEW_SIDE if out["tiles"] else None), out["crops"], out["edge"], out["morph"],
+            out["texts"], out["locations"], out["confs"])
+
+
+def decode_image(data):
+    """Decode bytes JPG/PNG ke array BGR; None jika bukan gambar."""
+    buf = np.frombuffer(data, np.uint8)
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+
+# ================= PIPELINE GRAYSCALE-FIRST =================
+# Deteksi hanya butuh luminans: gambar di-decode langsung ke grayscale (JPEG
+# cukup kanal Y, tanpa upsampling chroma dan konversi warna), anotasi digambar
+# di pratinjau kecil, dan piksel warna hanya disentuh untuk crop akhir.
+REDUCED_COLOR = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                 (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def decode_gray(data):
+    """Decode bytes JPG/PNG langsung ke grayscale; None jika bukan gambar."""
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def decode_preview(data, shape, max_side=PREVIEW_SIDE):
+    """Pratinjau BGR dengan sisi terpanjang <= max_side.
+
+    Untuk JPEG, IMREAD_REDUCED_COLOR_n men-decode langsung di 1/n resolusi
+    (IDCT diskalakan) sehingga frame warna penuh tidak pernah dibuat.
+    """
+    longest = max(shape[:2])
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced in REDUCED_COLOR:
+        if longest / factor >= max_side:
+            flag = reduced
+            break
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    s = min(1.0, max_side / max(img.shape[:2]))
+    if s < 1:
+        img = cv2.resize(img, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+    return img
+
+
+def shrink_preview(mask, max_side=PREVIEW_SIDE):
+    s = min(1.0, max_side / max(mask.shape[:2]))
+    return cv2.resize(mask, None, fx=s, fy=s, interpolation=cv2.INTER_AREA) if s < 1 else mask
+
+
+def process_encoded(datas, params_list=None, ocr=True, ocr_first="otsu", ocr_psm=7, region="lampung",
+                    color_crops=False):
+    """Versi grayscale-first dari process_batch untuk gambar yang masih berupa bytes JPG/PNG.
+
+    Selain key process_batch, setiap output berisi "box" (pratinjau BGR
+    dengan bounding box) dan edge/morph berukuran pratinjau. Crop berupa
+    grayscale (cukup untuk OCR), kecuali dengan color_mask yang butuh frame
+    BGR; dengan color_crops=True gambar warna di-decode sekali hanya jika ada
+    plat, lalu yang disimpan hanya crop-nya. Gambar yang tidak valid
+    menghasilkan ValueError.
+    """
+    params_list = [params_with_defaults(p) for p in (params_list or [None] * len(datas))]
+    frames = []
+    for data, params in zip(datas, params_list):
+        with ops_metrics.timer("decode"):
+            frames.append(decode_image(data) if params["color_mask"] else decode_gray(data))
+    if any(frame is None for frame in frames):
+        raise ValueError("file bukan gambar yang valid")
+    outputs = locate_and_read(frames, params_list, ocr, ocr_first, ocr_psm, region)
+
+    for data, frame, out in zip(datas, frames, outputs):
+        t0 = time.perf_counter()
+        out["edge"], out["morph"] = shrink_preview(out["edge"]), shrink_preview(out["morph"])
+        preview = decode_preview(data, frame.shape)
+        s = preview.shape[1] / frame.shape[1]
+        out["box"] = draw_boxes(preview, [tuple(int(round(v * s)) for v in b) for b in out["boxes"]])
+        ops_metrics.observe("preview", (time.perf_counter() - t0) * 1000)
+
+    if color_crops:
+        for data, frame, out in zip(datas, frames, outputs):
+            if out["boxes"]:
+                color = frame if frame.ndim == 3 else decode_image(data)
+                out["crops"] = [c.copy() for c in crop_plates(color, out, out["params"]["rectify"])]
+    return outputs
+
+
+# ================= PROXY TUNING =================
+# Halaman parameter menampilkan hasil setiap tahap pada proxy kecil agar
+# geseran slider cepat; resolusi penuh hanya diproses saat parameter diterapkan.
+PROXY_SIDE = 640
+
+
+def make_proxy(data, max_side=PROXY_SIDE):
+    """Proxy BGR (sisi terpanjang <= max_side) dari bytes JPG/PNG dan skalanya terhadap gambar asli.
+
+    JPEG di-decode langsung di resolusi tereduksi terkecil yang masih
+    >= max_side, jadi frame penuh tidak pernah dibuat.
+    """
+    buf = np.frombuffer(data, np.uint8)
+    for factor, flag in REDUCED_COLOR + ((1, cv2.IMREAD_COLOR),):
+        img = cv2.imdecode(buf, flag)
+        if img is None:
+            raise ValueError("file bukan gambar yang valid")
+        if factor == 1 or max(img.shape[:2]) >= max_side:
+            break
+    s = min(1.0, max_side / max(img.shape[:2]))
+    if s < 1:
+        img = cv2.resize(img, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+    return img, s / factor
+
+
+def locate_proxy(proxy, s, params):
+    """locate_plates pada proxy berskala `s` dengan parameter piksel yang diskalakan.
+
+    Kotak tetap di koordinat proxy; output berisi "box" (proxy dengan bounding box).
+    """
+    out = locate_plates(proxy, scale_params(params_with_defaults(params), s))
+    out["box"] = draw_boxes(proxy, out["boxes"])
+    return out
+
+
+# ================= MESIN DETEKSI (TANPA OCR) =================
+def detect_license_plate(image, canny_min=100, canny_max=200, kernel_size=5, min_area=500, max_area=50000, aspect_ratio_min=2.0, aspect_ratio_max=5.0):
+    # Konversi ke grayscale (frame dari image_pack bisa sudah grayscale)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    # Edge detection menggunakan Canny
+    edges = cv2.Canny(gray, canny_min, canny_max)
+
+    # Transformasi morfologi: Closing untuk mengisi celah
+    kernel = np.ones((kernel_size, kernel_size), np.uint8)
+    morph = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
+
+    # Temukan kontur
+    contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Filter kontur berdasarkan area dan aspect ratio
+    filtered_contours = []
+    for cnt in contours:
+        area = cv2.contourArea(cnt)
+        if min_area < area < max_area:
+            x, y, w, h = cv2.boundingRect(cnt)
+            aspect_ratio = w / float(h)
+            if aspect_ratio_min < aspect_ratio < aspect_ratio_max:
+                filtered_contours.append(cnt)
+
+    # Gambar bounding box pada gambar asli
+    result_image = image.copy()
+    cropped_plates = []
+    for cnt in filtered_contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        cv2.rectangle(result_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cropped = image[y:y+h, x:x+w]
+        cropped_plates.append(cropped)
+
+    return result_image, cropped_plates
+
+
+# Semua mesin menerima argumen yang sama dan mengembalikan (result_image, cropped_plates)
+DETECTION_ENGINES = {
+    "canny": detect_license_plate,
+    "integral": detect_license_plate_integral,
+}
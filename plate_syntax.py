@@ -0,0 +1,141 @@
+"""Validasi sintaks plat Indonesia dan koreksi salah baca OCR berdasarkan posisi.
+
+Plat terdiri dari 1-2 huruf kode wilayah, 1-4 angka dan 0-3 huruf akhir.
+Karakter yang sering tertukar (8/B, 0/O, 1/I, 5/S, 2/Z, 6/G) dikoreksi
+sesuai posisinya: di bagian huruf angka diubah ke huruf, di bagian angka
+sebaliknya. Semua kemungkinan pembagian (prefix, angka, suffix) dinilai
+sekaligus untuk seluruh daftar teks dengan tabel lookup NumPy.
+
+Contoh:
+    >>> correct_plate("8E1Z34A8")
+    ('BE1234AB', 0.55)
+"""
+import re
+
+import numpy as np
+
+# ================= TATA BAHASA PLAT =================
+PREFIX_LEN = (1, 2)
+DIGIT_LEN = (1, 2, 3, 4)
+SUFFIX_LEN = (0, 1, 2, 3)
+MAX_LEN = max(PREFIX_LEN) + max(DIGIT_LEN) + max(SUFFIX_LEN)
+
+# Kode wilayah yang terdaftar; kode lain tetap sah secara sintaks tetapi skornya dikurangi
+PREFIXES = (
+    "A", "B", "D", "E", "F", "G", "H", "K", "L", "M", "N", "P", "R", "S", "T", "W", "Z",
+    "AA", "AB", "AD", "AE", "AG", "BA", "BB", "BD", "BE", "BG", "BH", "BK", "BL", "BM", "BN", "BP",
+    "DA", "DB", "DC", "DD", "DE", "DG", "DH", "DK", "DL", "DM", "DN", "DR", "DS", "DT",
+    "EA", "EB", "ED", "KB", "KH", "KT", "KU", "PA", "PB",
+)
+
+# Salah baca OCR yang umum, per arah koreksi
+TO_LETTER = {"8": "B", "0": "O", "1": "I", "5": "S", "2": "Z", "6": "G"}
+TO_DIGIT = {"B": "8", "O": "0", "D": "0", "Q": "0", "I": "1", "S": "5", "Z": "2", "G": "6"}
+
+# Pengurang skor per karakter yang dikoreksi dan untuk kode wilayah tak terdaftar
+CORRECTION_PENALTY = 0.15
+UNKNOWN_PREFIX_PENALTY = 0.2
+# Skor minimal agar hasil OCR boleh diterima tanpa retry
+MIN_SYNTAX_SCORE = 0.7
+
+# Jenis posisi pada pola: angka, huruf, atau kosong (setelah akhir teks)
+DIGIT, LETTER, EMPTY = 0, 1, 2
+INVALID = 99
+
+
+def _tables():
+    cost = np.full((3, 256), INVALID, np.int32)
+    fix = np.zeros((3, 256), np.uint8)
+    for ch in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        cost[LETTER, ord(ch)], fix[LETTER, ord(ch)] = 0, ord(ch)
+    for ch in "0123456789":
+        cost[DIGIT, ord(ch)], fix[DIGIT, ord(ch)] = 0, ord(ch)
+    for src, dst in TO_LETTER.items():
+        cost[LETTER, ord(src)], fix[LETTER, ord(src)] = 1, ord(dst)
+    for src, dst in TO_DIGIT.items():
+        cost[DIGIT, ord(src)], fix[DIGIT, ord(src)] = 1, ord(dst)
+    cost[EMPTY, 0] = 0
+
+    known = np.zeros((256, 256), bool)
+    for code in PREFIXES:
+        known[ord(code[0]), ord(code[1]) if len(code) > 1 else 0] = True
+
+    patterns = [(p, d, s) for p in PREFIX_LEN for d in DIGIT_LEN for s in SUFFIX_LEN]
+    kinds = np.full((len(patterns), MAX_LEN), EMPTY, np.intp)
+    for i, (p, d, s) in enumerate(patterns):
+        kinds[i, :p] = LETTER
+        kinds[i, p:p + d] = DIGIT
+        kinds[i, p + d:p + d + s] = LETTER
+    return cost, fix, known, kinds, np.array([p for p, _, _ in patterns])
+
+
+COST, FIX, KNOWN_PREFIX, PATTERN_KINDS, PATTERN_PREFIX = _tables()
+
+
+def clean(text):
+    return re.sub(r"[^A-Z0-9]", "", (text or "").upper())
+
+
+def encode(texts):
+    """Matriks kode karakter (n, MAX_LEN); teks yang lebih panjang dipotong (dan pasti tidak valid)."""
+    cleaned = [clean(t) for t in texts]
+    chars = np.zeros((len(cleaned), MAX_LEN + 1), np.uint8)
+    if cleaned:
+        raw = np.array([t[:MAX_LEN + 1] for t in cleaned], dtype=f"S{MAX_LEN + 1}")
+        chars[:] = np.frombuffer(raw.tobytes(), np.uint8).reshape(len(cleaned), -1)
+    return cleaned, chars
+
+
+# ================= KOREKSI =================
+def correct_plates(texts):
+    """Koreksi sekumpulan teks OCR sekaligus.
+
+    Mengembalikan dict berisi array sepanjang `texts`: plate (teks terkoreksi,
+    atau teks asli yang dibersihkan jika tidak ada pola yang cocok), valid,
+    score (0-1) dan corrections (jumlah karakter yang diubah).
+    """
+    cleaned, chars = encode(texts)
+    n = len(cleaned)
+    if n == 0:
+        return {"plate": [], "valid": np.zeros(0, bool), "score": np.zeros(0), "corrections": np.zeros(0, int)}
+    # Teks lebih panjang dari MAX_LEN punya karakter di kolom terakhir, jadi tidak cocok pola mana pun
+    too_long = chars[:, MAX_LEN] != 0
+    chars = chars[:, :MAX_LEN]
+
+    # Biaya (n, pola): jumlah koreksi, >= INVALID jika ada posisi yang tidak bisa dikoreksi
+    cost = COST[PATTERN_KINDS[None], chars[:, None, :]].sum(axis=2)
+    cost[too_long] = INVALID
+
+    # Kode wilayah setelah dikoreksi ke huruf, untuk prefix 1 dan 2 karakter
+    c0 = FIX[LETTER, chars[:, 0]]
+    c1 = FIX[LETTER, chars[:, 1]]
+    known = np.stack([KNOWN_PREFIX[c0, 0], KNOWN_PREFIX[c0, c1]], axis=1)[:, PATTERN_PREFIX - 1]
+
+    penalty = cost * CORRECTION_PENALTY + ~known * UNKNOWN_PREFIX_PENALTY
+    best = penalty.argmin(axis=1)
+    rows = np.arange(n)
+    best_cost = cost[rows, best]
+    valid = best_cost < INVALID
+    score = np.where(valid, np.clip(1 - penalty[rows, best], 0, 1), 0.0)
+
+    fixed = FIX[PATTERN_KINDS[best], chars]
+    plates = [fixed[i].tobytes().rstrip(b"\0").decode() if valid[i] else cleaned[i] for i in range(n)]
+    return {"plate": plates, "valid": valid, "score": np.round(score, 2),
+            "corrections": np.where(valid, best_cost, 0)}
+
+
+def correct_plate(text):
+    """(teks terkoreksi, skor) untuk satu teks."""
+    res = correct_plates([text])
+    return res["plate"][0], float(res["score"][0])
+
+
+def validate_table(df, column="Hasil OCR", score_column="Skor Plat", plate_column=None):
+    """Salinan tabel hasil dengan kolom skor validitas (dan teks terkoreksi jika `plate_column` diisi)."""
+    res = correct_plates(df[column].astype(str).tolist() if column in df else [])
+    df = df.copy()
+    if len(df) == len(res["plate"]):
+        df[score_column] = res["score"]
+        if plate_column:
+            df[plate_column] = res["plate"]
+    return df
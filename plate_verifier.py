@@ -0,0 +1,384 @@
+"""Verifikasi plat/bukan-plat sebelum OCR.
+
+Filter geometri (luas, rasio) masih meloloskan jendela, rambu, gril dan
+bumper, dan setiap kandidat itu menghabiskan satu bacaan OCR. Modul ini
+memberi skor setiap crop dengan fitur HOG (histogram arah gradien per sel,
+dinormalisasi per blok 2x2) dan model linear (regresi logistik), semuanya
+NumPy dan dihitung sekaligus untuk satu batch crop; crop di bawah ambang
+dibuang sebelum OCR.
+
+Model disimpan di file .npz berversi (MODEL_PATH, atau env
+PLATE_VERIFIER_MODEL) dan dimuat sekali per proses. Data latih: crop
+berlabel di folder (--pos/--neg), crop hasil `mine` dari foto lokal, dan/atau
+plat + latar sintetis.
+
+Contoh:
+    python plate_verifier.py mine folder_gambar/ crops/ --truth label.csv
+    python plate_verifier.py train --pos crops/pos --neg crops/neg --synthetic 2000
+    python plate_verifier.py score crops/neg
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# ================= FITUR =================
+# Versi tata letak fitur; model dengan versi lain ditolak saat dimuat
+FEATURE_VERSION = 1
+# Crop dinormalisasi ke grid ini (rasio 3:1, kira-kira plat setelah rectify_plate)
+VERIFY_W, VERIFY_H = 96, 32
+CELL = 8
+BINS = 9
+# Batas nilai blok setelah normalisasi L2 (L2-Hys, seperti HOG Dalal-Triggs)
+HYS_CLIP = 0.2
+N_FEATURES = (VERIFY_H // CELL - 1) * (VERIFY_W // CELL - 1) * 4 * BINS + 1
+
+MODEL_PATH = os.environ.get("PLATE_VERIFIER_MODEL",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "plate_verifier.npz"))
+# Ambang dipilih saat latih agar recall plat pada data latih minimal sebesar ini
+TARGET_RECALL = 0.99
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+
+
+def _grid(crop):
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return cv2.resize(gray, (VERIFY_W, VERIFY_H), interpolation=cv2.INTER_AREA)
+
+
+def hog_features(crops):
+    """Matriks fitur (n, N_FEATURES) float32: HOG grid VERIFY_W x VERIFY_H + log rasio aspek crop asli."""
+    n = len(crops)
+    if not n:
+        return np.zeros((0, N_FEATURES), np.float32)
+    x = np.stack([_grid(c) for c in crops]).astype(np.float32)
+    gx = np.zeros_like(x)
+    gy = np.zeros_like(x)
+    gx[:, :, 1:-1] = x[:, :, 2:] - x[:, :, :-2]
+    gy[:, 1:-1, :] = x[:, 2:, :] - x[:, :-2, :]
+    # cartToPolar jauh lebih cepat dari np.hypot + np.arctan2 (akurasi sudut ~0.3 derajat, cukup untuk 9 bin)
+    mag, ang = cv2.cartToPolar(gx.reshape(-1, VERIFY_W), gy.reshape(-1, VERIFY_W))
+    mag = mag.reshape(x.shape)
+    # Arah tanpa tanda (0..pi): huruf gelap di latar terang dan sebaliknya dianggap sama
+    pos = ang.reshape(x.shape) * (BINS / np.pi)
+    np.subtract(pos, BINS, out=pos, where=pos >= BINS)
+    b0 = pos.astype(np.int32)
+    frac = pos - b0
+    b0[b0 >= BINS] = 0
+    b1 = b0 + 1
+    b1[b1 == BINS] = 0
+
+    # Indeks (crop, sel, bin) tiap piksel, lalu satu bincount untuk semua crop
+    ncy, ncx = VERIFY_H // CELL, VERIFY_W // CELL
+    cell = (np.arange(VERIFY_H)[:, None] // CELL) * ncx + np.arange(VERIFY_W)[None, :] // CELL
+    base = (np.arange(n)[:, None, None] * (ncy * ncx) + cell) * BINS
+    size = n * ncy * ncx * BINS
+    hist = (np.bincount((base + b0).ravel(), (mag * (1 - frac)).ravel(), size)
+            + np.bincount((base + b1).ravel(), (mag * frac).ravel(), size))
+    hist = hist.reshape(n, ncy, ncx, BINS)
+
+    blocks = np.concatenate([hist[:, :-1, :-1], hist[:, :-1, 1:], hist[:, 1:, :-1], hist[:, 1:, 1:]], axis=3)
+    blocks = blocks.reshape(n, -1, 4 * BINS)
+    blocks /= np.sqrt((blocks ** 2).sum(axis=2, keepdims=True)) + 1e-6
+    np.minimum(blocks, HYS_CLIP, out=blocks)
+    blocks /= np.sqrt((blocks ** 2).sum(axis=2, keepdims=True)) + 1e-6
+
+    aspect = np.log([c.shape[1] / max(1, c.shape[0]) for c in crops])
+    return np.concatenate([blocks.reshape(n, -1), aspect[:, None]], axis=1).astype(np.float32)
+
+
+# ================= MODEL =================
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_model(path=MODEL_PATH):
+    """Muat model .npz; ValueError jika versi fiturnya tidak cocok dengan modul ini."""
+    with np.load(path, allow_pickle=False) as f:
+        model = {k: f[k] for k in f.files}
+    if int(model["feature_version"]) != FEATURE_VERSION or model["w"].shape != (N_FEATURES,):
+        raise ValueError(f"model verifier {path} memakai fitur versi {int(model['feature_version'])}, "
+                         f"modul ini versi {FEATURE_VERSION}; latih ulang dengan `python plate_verifier.py train`")
+    model["threshold"] = float(model["threshold"])
+    model["version"] = str(model["version"])
+    return model
+
+
+def get_model():
+    """Model yang sedang dipakai proses ini; file dibaca sekali saat pertama dibutuhkan."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if not os.path.exists(MODEL_PATH):
+                    raise RuntimeError(f"model verifier tidak ditemukan: {MODEL_PATH} "
+                                       "(buat dengan `python plate_verifier.py train --synthetic 2000`)")
+                _model = load_model(MODEL_PATH)
+    return _model
+
+
+def set_model(path):
+    """Ganti file model untuk proses ini (mis. setelah melatih ulang)."""
+    global MODEL_PATH, _model
+    with _model_lock:
+        MODEL_PATH, _model = path, None
+
+
+def score(crops, model=None):
+    """Probabilitas plat per crop (array float32)."""
+    model = model or get_model()
+    x = (hog_features(crops) - model["mean"]) / model["std"]
+    return 1 / (1 + np.exp(-(x @ model["w"] + model["b"])))
+
+
+def keep_mask(crops, model=None):
+    """Mask bool crop yang dianggap plat (skor >= ambang model)."""
+    model = model or get_model()
+    return score(crops, model) >= model["threshold"]
+
+
+# ================= DATA LATIH =================
+def _random_plate(rng):
+    from plate_syntax import PREFIXES
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    prefix = PREFIXES[rng.integers(len(PREFIXES))]
+    digits = "".join(str(d) for d in rng.integers(0, 10, rng.integers(1, 5)))
+    suffix = "".join(letters[i] for i in rng.integers(0, 26, rng.integers(0, 4)))
+    return f"{prefix} {digits} {suffix}".strip()
+
+
+def _degrade(img, rng):
+    """Blur, noise, kontras dan resolusi rendah acak, seperti crop dari foto jalan."""
+    img = img.astype(np.float32)
+    img = img * rng.uniform(0.7, 1.1) + rng.uniform(-30, 30)
+    sigma = rng.uniform(0, 1.2)
+    if sigma > 0.3:
+        img = cv2.GaussianBlur(img, (0, 0), sigma)
+    img += rng.normal(0, rng.uniform(0, 8), img.shape)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    h, w = img.shape
+    low = rng.integers(20, h + 1)
+    if low < h:
+        small = cv2.resize(img, (max(1, w * low // h), low), interpolation=cv2.INTER_AREA)
+        img = cv2.resize(small, (w, h), interpolation=cv2.INTER_LINEAR)
+    return img
+
+
+def synthetic_plate(rng, height=48):
+    """Crop plat sintetis grayscale: teks plat (kadang + baris masa berlaku), bingkai, sedikit miring/geser."""
+    text = _random_plate(rng)
+    font = (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX)[rng.integers(2)]
+    thick = int(rng.integers(2, 6))
+    (tw, th), _ = cv2.getTextSize(text, font, 1.6, thick)
+    dark_bg = rng.random() < 0.4
+    bg, fg = (int(rng.integers(0, 60)), int(rng.integers(200, 256))) if dark_bg else \
+        (int(rng.integers(180, 256)), int(rng.integers(0, 50)))
+    pad = int(th * 0.5)
+    expiry = rng.random() < 0.5
+    h, w = th + 2 * pad + (int(th * 0.6) if expiry else 0), tw + 2 * pad
+    plate = np.full((h, w), bg, np.uint8)
+    cv2.putText(plate, text, (pad, pad + th), font, 1.6, fg, thick, cv2.LINE_AA)
+    if expiry:
+        cv2.putText(plate, f"{rng.integers(1, 13):02d}.{rng.integers(20, 35)}", (w // 2 - th, h - pad // 2),
+                    font, 0.7, fg, 2, cv2.LINE_AA)
+    if rng.random() < 0.7:
+        cv2.rectangle(plate, (2, 2), (w - 3, h - 3), fg, int(rng.integers(1, 4)))
+
+    # Kotak kandidat jarang pas: plat ditempel di latar acak yang 5-130% lebih lebar/tinggi, lalu dimiringkan sedikit
+    ch, cw = int(h * rng.uniform(1.05, 2.0)), int(w * rng.uniform(1.05, 2.3))
+    canvas = _clutter(rng, ch, cw)
+    y0, x0 = int(rng.integers(0, ch - h + 1)), int(rng.integers(0, cw - w + 1))
+    canvas[y0:y0 + h, x0:x0 + w] = plate
+    rot = cv2.getRotationMatrix2D((cw / 2, ch / 2), rng.uniform(-5, 5), 1.0)
+    canvas = cv2.warpAffine(canvas, rot, (cw, ch), borderMode=cv2.BORDER_REPLICATE)
+    crop = cv2.resize(canvas, (max(1, cw * height // ch), height), interpolation=cv2.INTER_AREA)
+    return _degrade(crop, rng)
+
+
+def _clutter(rng, height, w):
+    """Latar bukan plat uint8: gril, jendela/panel bergradasi, garis dan kotak acak, tekstur, bidang polos."""
+    kind = rng.integers(5)
+    yy, xx = np.mgrid[0:height, 0:w].astype(np.float32)
+    if kind == 0:
+        # Gril: garis berulang horizontal/vertikal/miring
+        period = rng.uniform(3, 14)
+        angle = rng.choice([0, np.pi / 2, rng.uniform(0, np.pi)])
+        wave = np.sin((xx * np.cos(angle) + yy * np.sin(angle)) * 2 * np.pi / period)
+        img = 128 + rng.uniform(40, 120) * (wave > rng.uniform(-0.5, 0.5)) - 60
+    elif kind == 1:
+        # Jendela/panel: gradasi halus dengan satu-dua tepi atau pantulan
+        img = rng.uniform(30, 220) + rng.uniform(-1, 1) * xx + rng.uniform(-2, 2) * yy
+        for _ in range(rng.integers(0, 3)):
+            p0 = (int(rng.integers(0, w)), int(rng.integers(0, height)))
+            p1 = (int(rng.integers(0, w)), int(rng.integers(0, height)))
+            cv2.line(img, p0, p1, float(rng.uniform(0, 255)), int(rng.integers(1, 6)))
+    elif kind == 2:
+        # Garis dan kotak acak (rambu, bayangan, tepi bodi)
+        img = np.full((height, w), rng.uniform(0, 255), np.float32)
+        for _ in range(rng.integers(2, 12)):
+            p0 = (int(rng.integers(0, w)), int(rng.integers(0, height)))
+            p1 = (int(rng.integers(0, w)), int(rng.integers(0, height)))
+            color = float(rng.uniform(0, 255))
+            if rng.random() < 0.5:
+                cv2.rectangle(img, p0, p1, color, int(rng.choice([-1, 1, 2, 4])))
+            else:
+                cv2.line(img, p0, p1, color, int(rng.integers(1, 8)))
+    elif kind == 3:
+        # Tekstur: noise berskala acak (daun, aspal, kerikil)
+        cell = int(rng.integers(2, 12))
+        small = rng.uniform(0, 255, (height // cell + 1, w // cell + 1)).astype(np.float32)
+        img = cv2.resize(small, (w, height), interpolation=cv2.INTER_CUBIC)
+    else:
+        # Bidang polos (lampu, pantulan terang, bodi gelap), kadang dengan bingkai gelap di tepinya
+        img = np.full((height, w), rng.uniform(0, 255), np.float32)
+        if rng.random() < 0.5:
+            cv2.rectangle(img, (0, 0), (w - 1, height - 1), float(rng.uniform(0, 255)), int(rng.integers(1, 8)))
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def synthetic_negative(rng, height=48):
+    """Crop bukan plat sintetis dengan rasio aspek seperti kandidat plat."""
+    return _degrade(_clutter(rng, height, int(height * rng.uniform(2.0, 6.0))), rng)
+
+
+def load_crops(folder):
+    """{nama file: crop grayscale} untuk semua gambar valid di folder, urut nama."""
+    crops = {}
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(IMAGE_EXT):
+            img = cv2.imread(os.path.join(folder, name), cv2.IMREAD_GRAYSCALE)
+            if img is not None:
+                crops[name] = img
+    return crops
+
+
+def mine_crops(paths, out_dir, truth=None, params=None):
+    """Jalankan pipeline pada foto lokal dan simpan setiap crop kandidat ke out_dir/pos atau out_dir/neg.
+
+    Label diambil dari ground truth (teks OCR cocok dengan plat gambar itu)
+    bila ada, selain itu dari OCR: plat valid -> pos, tanpa teks -> neg. Crop
+    yang meragukan (ada teks tetapi tidak valid) ke out_dir/unsure untuk
+    dilabeli manual. Mengembalikan jumlah crop per label.
+    """
+    from image_pack import iter_files
+    from plate_pipeline import decode_image, process_batch
+
+    counts = {"pos": 0, "neg": 0, "unsure": 0}
+    for label in counts:
+        os.makedirs(os.path.join(out_dir, label), exist_ok=True)
+    for fname, data in iter_files(paths):
+        img = decode_image(data)
+        if img is None:
+            continue
+        name = os.path.splitext(fname)[0]
+        out = process_batch([img], [params])[0]
+        plates = set(truth.get(fname, [])) if truth else None
+        for k, (crop, text, valid) in enumerate(zip(out["crops"], out["texts"], out["valid"])):
+            if plates is not None:
+                label = "pos" if text in plates else "neg"
+            else:
+                label = "pos" if valid else "neg" if not text.strip("-") else "unsure"
+            cv2.imwrite(os.path.join(out_dir, label, f"{name}_{k}.png"), crop)
+            counts[label] += 1
+    return counts
+
+
+# ================= LATIH =================
+def train(pos, neg, l2=1e-3, epochs=300, lr=0.5, target_recall=TARGET_RECALL):
+    """Regresi logistik (gradient descent full-batch, bobot kelas seimbang) atas crop pos/neg.
+
+    Mengembalikan dict model siap disimpan dengan save_model; ambang dipilih
+    sehingga recall plat pada data latih >= target_recall.
+    """
+    x = hog_features(list(pos) + list(neg)).astype(np.float64)
+    y = np.r_[np.ones(len(pos)), np.zeros(len(neg))]
+    mean, std = x.mean(axis=0), x.std(axis=0) + 1e-6
+    x = (x - mean) / std
+    sw = np.where(y == 1, 0.5 / len(pos), 0.5 / len(neg))
+    w, b = np.zeros(x.shape[1]), 0.0
+    for _ in range(epochs):
+        p = 1 / (1 + np.exp(-(x @ w + b)))
+        g = sw * (p - y)
+        w -= lr * (x.T @ g + l2 * w)
+        b -= lr * g.sum()
+
+    p = 1 / (1 + np.exp(-(x @ w + b)))
+    threshold = float(np.quantile(p[y == 1], 1 - target_recall))
+    keep = p >= threshold
+    return {
+        "w": w.astype(np.float32), "b": np.float32(b), "mean": mean.astype(np.float32),
+        "std": std.astype(np.float32), "threshold": threshold,
+        "train_recall": round(float(keep[y == 1].mean()), 4),
+        "train_reject": round(float((~keep[y == 0]).mean()), 4),
+        "n_pos": len(pos), "n_neg": len(neg),
+    }
+
+
+def save_model(model, path, sources=""):
+    """Simpan model ke .npz; versi = cap waktu latih, dan metadata latih ikut tersimpan."""
+    meta = {k: model[k] for k in ("n_pos", "n_neg", "train_recall", "train_reject")}
+    meta["sources"] = sources
+    np.savez(path if path.endswith(".npz") else path + ".npz", feature_version=FEATURE_VERSION,
+             version=time.strftime("%Y%m%d-%H%M%S"), w=model["w"], b=model["b"], mean=model["mean"],
+             std=model["std"], threshold=model["threshold"], meta=json.dumps(meta))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Verifier plat/bukan-plat (HOG + model linear)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("mine", help="kumpulkan crop kandidat berlabel dari foto lokal")
+    m.add_argument("paths", nargs="+", help="file gambar atau folder, diikuti folder tujuan crop")
+    m.add_argument("--truth", help="CSV (name,plate) atau JSON ground truth")
+    t = sub.add_parser("train", help="latih model dan simpan ke .npz")
+    t.add_argument("--pos", nargs="*", default=[], help="folder crop plat")
+    t.add_argument("--neg", nargs="*", default=[], help="folder crop bukan plat")
+    t.add_argument("--synthetic", type=int, default=0, help="jumlah crop sintetis per kelas")
+    t.add_argument("--seed", type=int, default=0)
+    t.add_argument("--recall", type=float, default=TARGET_RECALL, help="recall plat minimum untuk ambang")
+    t.add_argument("-o", "--output", default=MODEL_PATH)
+    s = sub.add_parser("score", help="skor crop di folder dengan model saat ini")
+    s.add_argument("folder")
+    s.add_argument("--model", default=MODEL_PATH)
+    args = ap.parse_args()
+
+    if args.cmd == "mine":
+        *sources, out_dir = args.paths
+        if not sources:
+            ap.error("butuh minimal satu sumber gambar dan satu folder tujuan")
+        truth = None
+        if args.truth:
+            from image_pack import load_truth
+            truth = load_truth(args.truth)
+        counts = mine_crops(sources, out_dir, truth)
+        print(f"{counts['pos']} plat, {counts['neg']} bukan plat, {counts['unsure']} ragu "
+              f"(periksa {os.path.join(out_dir, 'unsure')} lalu pindahkan ke pos/neg)")
+    elif args.cmd == "train":
+        rng = np.random.default_rng(args.seed)
+        pos = [c for d in args.pos for c in load_crops(d).values()]
+        neg = [c for d in args.neg for c in load_crops(d).values()]
+        n_real = (len(pos), len(neg))
+        pos += [synthetic_plate(rng) for _ in range(args.synthetic)]
+        neg += [synthetic_negative(rng) for _ in range(args.synthetic)]
+        if not pos or not neg:
+            ap.error("butuh crop plat dan bukan plat (--pos/--neg dan/atau --synthetic)")
+        t0 = time.perf_counter()
+        model = train(pos, neg, target_recall=args.recall)
+        sources = f"pos={args.pos} neg={args.neg} real={n_real} synthetic={args.synthetic} seed={args.seed}"
+        save_model(model, args.output, sources)
+        print(f"{len(pos)} plat, {len(neg)} bukan plat, dilatih {time.perf_counter() - t0:.1f} s; "
+              f"ambang {model['threshold']:.3f}, recall {model['train_recall']:.3f}, "
+              f"bukan plat dibuang {model['train_reject']:.3f} -> {args.output}")
+    else:
+        model = load_model(args.model)
+        named = load_crops(args.folder)
+        crops = list(named.values())
+        t0 = time.perf_counter()
+        p = score(crops, model)
+        us = (time.perf_counter() - t0) * 1e6 / max(1, len(crops))
+        print(f"model versi {model['version']}, ambang {model['threshold']:.3f}, {us:.0f} us/crop")
+        for name, v in zip(named, p):
+            print(f"{name:<30} {v:.3f} {'plat' if v >= model['threshold'] else 'buang'}")
+        print(f"{int((p >= model['threshold']).sum())}/{len(crops)} dianggap plat")
@@ -0,0 +1,135 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+import param_profiles
+from archive_ingest import ARCHIVE_TYPES, ArchiveReader, spool
+
+
+# ================= PROFIL PARAMETER =================
+def profile_panel(owner, keys):
+    """Simpan/muat parameter di session_state sebagai profil per kamera.
+
+    `keys` memetakan key session_state aplikasi ke nama parameter pipeline,
+    mis. {"cmin": "canny_min"}; profil selalu disimpan dengan nama pipeline.
+    """
+    st.markdown("### Profil Parameter")
+    conn = param_profiles.connect()
+    c1, c2 = st.columns(2)
+    camera = c1.text_input("Kamera", key="profile_camera", placeholder="gerbang1")
+    names = param_profiles.list_profiles(conn, owner, camera)
+    chosen = c2.selectbox("Profil tersimpan", ["-"] + names, key="profile_chosen")
+
+    b1, b2 = st.columns(2)
+    if b1.button("Muat Profil", disabled=chosen == "-"):
+        params = param_profiles.load_profile(conn, owner, camera, chosen)
+        for skey, pkey in keys.items():
+            if pkey in params:
+                st.session_state[skey] = params[pkey]
+        conn.close()
+        st.rerun()
+    if b2.button("Hapus Profil", disabled=chosen == "-"):
+        param_profiles.delete_profile(conn, owner, camera, chosen)
+        conn.close()
+        st.rerun()
+
+    conn.close()
+    save_profile_form(owner, {pkey: st.session_state[skey] for skey, pkey in keys.items() if skey in st.session_state},
+                      camera)
+
+
+def save_profile_form(owner, params, camera=None):
+    """Form nama profil + tombol simpan untuk `params` (nama key pipeline atau alias-nya)."""
+    n1, n2 = st.columns([3, 1])
+    if camera is None:
+        camera = n1.text_input("Kamera", key="profile_save_camera", placeholder="gerbang1")
+    name = n1.text_input("Nama profil baru", key="profile_name", placeholder="siang")
+    if n2.button("Simpan Profil", disabled=not name):
+        conn = param_profiles.connect()
+        param_profiles.save_profile(conn, owner, camera, name, params)
+        conn.close()
+        st.success(f"Profil '{name}' disimpan untuk kamera '{camera or '-'}'")
+
+
+# ================= PERBANDINGAN A/B =================
+# Tabel hasil digambar ulang setiap sekian gambar, bukan setiap gambar
+TABLE_EVERY = 10
+
+
+def _batch_items(files, archive):
+    if not archive:
+        for f in files:
+            yield f.name, f.getvalue()
+        return
+    path = spool(archive, archive.name)
+    try:
+        with ArchiveReader(path) as reader:
+            for i, name in enumerate(reader.members):
+                try:
+                    yield name, reader.read(i)
+                except ValueError:
+                    # Anggota terlalu besar: dilaporkan sebagai gambar gagal
+                    yield name, None
+    finally:
+        os.remove(path)
+
+
+def ab_compare_panel(owner):
+    """Jalankan dua profil atas satu batch gambar dan tampilkan perbedaannya per gambar."""
+    st.markdown("### Perbandingan Profil A/B")
+    conn = param_profiles.connect()
+    cameras = param_profiles.list_cameras(conn, owner)
+    camera = st.selectbox("Kamera", [""] + [c for c in cameras if c], key="ab_camera",
+                          format_func=lambda c: c or "(tanpa kamera)")
+    names = [param_profiles.DEFAULT_PROFILE] + param_profiles.list_profiles(conn, owner, camera)
+    c1, c2 = st.columns(2)
+    name_a = c1.selectbox("Profil A", names, key="ab_a")
+    name_b = c2.selectbox("Profil B", names, index=min(1, len(names) - 1), key="ab_b")
+    params_a = param_profiles.load_profile(conn, owner, camera, name_a)
+    params_b = param_profiles.load_profile(conn, owner, camera, name_b)
+    conn.close()
+
+    files = st.file_uploader("Gambar", type=["jpg", "jpeg", "png"], accept_multiple_files=True, key="ab_files")
+    archive = st.file_uploader("Atau arsip ZIP/TAR", type=ARCHIVE_TYPES, key="ab_archive")
+    ocr = st.checkbox("Sertakan OCR", value=True, key="ab_ocr")
+    if not st.button("Bandingkan", disabled=not (files or archive)):
+        return
+
+    rows = []
+    progress = st.progress(0.0, text="Memproses...")
+    table = st.empty()
+    total = len(files) if not archive else None
+    try:
+        for r in param_profiles.compare_profiles(_batch_items(files, archive), params_a, params_b, ocr=ocr):
+            rows.append(r)
+            if total:
+                progress.progress(len(rows) / total, text=f"{len(rows)}/{total} gambar")
+            if len(rows) % TABLE_EVERY == 1:
+                table.dataframe(_table(rows), use_container_width=True)
+    except ValueError as e:
+        st.error(f"Arsip tidak bisa diproses: {e}")
+    progress.empty()
+    table.dataframe(_table(rows), use_container_width=True)
+
+    s = param_profiles.summarize(rows)
+    if s["images"]:
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Plat A / B", f"{s['plates_a']} / {s['plates_b']}")
+        m2.metric("Gambar dengan kotak beda", s["differing_boxes"])
+        m3.metric("Gambar dengan teks beda", s["differing_text"])
+        m4.metric("Rata-rata ms A / B", f"{s['mean_ms_a']:.1f} / {s['mean_ms_b']:.1f}")
+        st.caption(f"Decode bersama: rata-rata {s['mean_decode_ms']:.1f} ms per gambar; {s['failed']} gambar gagal")
+
+
+def _table(rows):
+    return pd.DataFrame([{
+        "Nama Gambar": r["name"],
+        "Plat A": r.get("plates_a"), "Plat B": r.get("plates_b"),
+        "Hanya di A": r.get("only_a"), "Hanya di B": r.get("only_b"),
+        "OCR A": ", ".join(r.get("texts_a", [])), "OCR B": ", ".join(r.get("texts_b", [])),
+        "Teks Sama": r.get("same_text"),
+        "ms A": round(r["ms_a"], 1) if "ms_a" in r else None,
+        "ms B": round(r["ms_b"], 1) if "ms_b" in r else None,
+        "Error": r["error"],
+    } for r in rows])
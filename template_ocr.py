@@ -0,0 +1,260 @@
+"""OCR plat di dalam proses, tanpa tesseract.
+
+Crop dibinarisasi (Otsu), karakter dipisah dengan connected components, lalu
+setiap karakter dinormalisasi ke grid GLYPH_W x GLYPH_H dan dicocokkan dengan
+template huruf/angka sekaligus lewat satu perkalian matriks NumPy (korelasi).
+Template dirender sekali dari font bawaan OpenCV (Hershey) dan PIL.
+
+Antarmukanya meniru pytesseract (`image_to_data`, `image_to_string`,
+`Output`), sehingga plate_ocr bisa memakai modul ini sebagai pengganti.
+"""
+import re
+
+import cv2
+import numpy as np
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+# ================= KONFIG =================
+CHARSET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+GLYPH_W, GLYPH_H = 16, 24
+
+# Font Hershey x ketebalan garis; huruf plat tebal, jadi ketebalan dibuat bervariasi
+HERSHEY_FONTS = (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_TRIPLEX)
+HERSHEY_THICKNESS = (3, 6, 9)
+PIL_STROKES = (0, 2, 4)
+RENDER_SIZE = 64
+
+# Crop lebih pendek dari ini diperbesar dulu agar karakter tidak pecah
+MIN_IMAGE_H = 40
+# Batas komponen yang dianggap karakter
+MIN_CHAR_PX = 8
+MAX_CHAR_ASPECT = 1.5
+MIN_FILL = 0.12
+# Dalam satu baris, karakter harus setinggi minimal ini dari karakter tertinggi
+MIN_REL_HEIGHT = 0.6
+# Jarak antar karakter (relatif tinggi karakter) yang memisahkan kata
+WORD_GAP = 0.6
+# Mode psm yang membaca banyak baris; mode lain hanya mengambil baris utama
+BLOCK_PSM = (3, 4, 6, 11, 12)
+
+
+class Output:
+    BYTES = "bytes"
+    DICT = "dict"
+    STRING = "string"
+
+
+# ================= TEMPLATE =================
+def glyph_canvas(mask):
+    """Karakter (mask yang sudah dipotong pas) diskalakan ke tinggi GLYPH_H di tengah grid."""
+    h, w = mask.shape
+    nw = max(1, min(GLYPH_W, int(round(w * GLYPH_H / h))))
+    x0 = (GLYPH_W - nw) // 2
+    canvas = np.zeros((GLYPH_H, GLYPH_W), np.float32)
+    canvas[:, x0:x0 + nw] = cv2.resize(mask.astype(np.float32), (nw, GLYPH_H), interpolation=cv2.INTER_AREA)
+    return canvas
+
+
+def _tight(mask):
+    ys, xs = np.nonzero(mask)
+    return mask[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+
+def glyph_features(canvases):
+    """Vektor fitur (n, GLYPH_W*GLYPH_H): di-blur sedikit lalu dinormalisasi (rata-rata 0, norma 1).
+
+    Semua grid ditumpuk dengan sela satu baris nol agar blur 3x3 cukup satu panggilan.
+    """
+    n = len(canvases)
+    stacked = np.zeros((n, GLYPH_H + 1, GLYPH_W), np.float32)
+    stacked[:, :GLYPH_H] = canvases
+    blurred = cv2.GaussianBlur(stacked.reshape(-1, GLYPH_W), (3, 3), 0, borderType=cv2.BORDER_CONSTANT)
+    vec = blurred.reshape(n, GLYPH_H + 1, GLYPH_W)[:, :GLYPH_H].reshape(n, -1)
+    vec -= vec.mean(axis=1, keepdims=True)
+    norm = np.linalg.norm(vec, axis=1, keepdims=True)
+    return vec / np.where(norm > 0, norm, 1)
+
+
+def _render_hershey(ch, font, thickness):
+    img = np.zeros((RENDER_SIZE * 2, RENDER_SIZE * 2), np.uint8)
+    cv2.putText(img, ch, (RENDER_SIZE // 2, RENDER_SIZE * 3 // 2), font, 2.0, 255, thickness, cv2.LINE_AA)
+    return _tight(img > 127)
+
+
+def _render_pil(ch, font, stroke):
+    img = Image.new("L", (RENDER_SIZE * 2, RENDER_SIZE * 2), 0)
+    ImageDraw.Draw(img).text((RENDER_SIZE // 2, RENDER_SIZE // 4), ch, fill=255, font=font,
+                             stroke_width=stroke, stroke_fill=255)
+    return _tight(np.asarray(img) > 127)
+
+
+def build_templates(charset=CHARSET):
+    """Matriks template (n_char, n_varian, GLYPH_W*GLYPH_H) untuk setiap karakter di `charset`."""
+    renders = [(_render_hershey, f, t) for f in HERSHEY_FONTS for t in HERSHEY_THICKNESS]
+    if Image is not None:
+        try:
+            font = ImageFont.load_default(size=RENDER_SIZE)
+            renders += [(_render_pil, font, s) for s in PIL_STROKES]
+        except (TypeError, OSError):
+            # PIL lama tanpa font skalabel: cukup template Hershey
+            pass
+    canvases = [glyph_canvas(render(ch, a, b)) for ch in charset for render, a, b in renders]
+    return glyph_features(np.stack(canvases)).reshape(len(charset), len(renders), -1)
+
+
+_TEMPLATES = None
+# Matriks template (dim, n_char*n_varian) per whitelist, disiapkan sekali
+_MATRICES = {}
+
+
+def templates():
+    """Template dirender sekali per proses, lalu dipakai ulang."""
+    global _TEMPLATES
+    if _TEMPLATES is None:
+        _TEMPLATES = build_templates()
+    return _TEMPLATES
+
+
+def template_matrix(whitelist=None):
+    charset = "".join(ch for ch in CHARSET if not whitelist or ch in whitelist)
+    if charset not in _MATRICES:
+        tmpl = templates()[[CHARSET.index(ch) for ch in charset]]
+        _MATRICES[charset] = (charset, tmpl.shape[1], np.ascontiguousarray(tmpl.reshape(-1, tmpl.shape[2]).T))
+    return _MATRICES[charset]
+
+
+# ================= SEGMENTASI =================
+def _to_gray(image):
+    if Image is not None and isinstance(image, Image.Image):
+        image = np.asarray(image.convert("L"))
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def _components(fg):
+    """Statistik komponen yang bentuknya mirip karakter: array baris (x, y, w, h, label)."""
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(fg, connectivity=8)
+    x, y, w, h, area = stats[1:].T
+    ok = ((h >= MIN_CHAR_PX) & (h <= 0.95 * fg.shape[0]) & (w <= MAX_CHAR_ASPECT * h)
+          & (area >= MIN_FILL * w * h))
+    comps = np.stack([x, y, w, h, np.arange(1, n)], axis=1)[ok]
+    return comps, labels
+
+
+def _lines(comps):
+    """Kelompokkan komponen menjadi baris berdasarkan tumpang tindih vertikal."""
+    lines = []
+    for c in comps[np.argsort(comps[:, 1] + comps[:, 3] / 2)]:
+        cy = c[1] + c[3] / 2
+        for line in lines:
+            if line["top"] <= cy <= line["bottom"]:
+                line["items"].append(c)
+                line["top"] = min(line["top"], c[1])
+                line["bottom"] = max(line["bottom"], c[1] + c[3])
+                break
+        else:
+            lines.append({"top": c[1], "bottom": c[1] + c[3], "items": [c]})
+    result = []
+    for line in lines:
+        items = np.array(line["items"])
+        # Titik, tanda hubung dan noda kecil di antara karakter dibuang
+        items = items[items[:, 3] >= MIN_REL_HEIGHT * items[:, 3].max()]
+        result.append(items[np.argsort(items[:, 0])])
+    return result
+
+
+def segment(gray):
+    """Karakter per baris (array (x, y, w, h, label)) beserta peta label.
+
+    Polaritas (teks gelap di latar terang atau sebaliknya) dipilih dari yang
+    menghasilkan karakter terbanyak pada baris terpanjang.
+    """
+    _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    best = None
+    for fg in (cv2.bitwise_not(th), th):
+        comps, labels = _components(fg)
+        lines = _lines(comps) if len(comps) else []
+        n = max((len(line) for line in lines), default=0)
+        if best is None or n > best[0]:
+            best = (n, lines, labels)
+    return best[1], best[2]
+
+
+# ================= PENGENALAN =================
+def _parse_config(config):
+    psm = re.search(r"--psm\s+(\d+)", config or "")
+    whitelist = re.search(r"tessedit_char_whitelist=(\S+)", config or "")
+    return (int(psm.group(1)) if psm else 3), (whitelist.group(1) if whitelist else None)
+
+
+def classify(glyphs, whitelist=None):
+    """(karakter, skor korelasi) untuk setiap vektor glyph, semuanya dalam satu matmul."""
+    charset, n_var, matrix = template_matrix(whitelist)
+    scores = (glyphs @ matrix).reshape(len(glyphs), len(charset), n_var).max(axis=2)
+    best = scores.argmax(axis=1)
+    return [charset[i] for i in best], scores[np.arange(len(glyphs)), best]
+
+
+def image_to_data(image, lang=None, config="", nice=0, output_type=Output.STRING, timeout=0, pandas_config=None):
+    """Padanan pytesseract.image_to_data: satu entri per kata.
+
+    Keyakinan kata (0-100) adalah skor korelasi terendah di antara karakternya.
+    """
+    psm, whitelist = _parse_config(config)
+    gray = _to_gray(image)
+    scale = 1.0
+    if gray.shape[0] < MIN_IMAGE_H:
+        scale = MIN_IMAGE_H / gray.shape[0]
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+
+    lines, labels = segment(gray)
+    if psm not in BLOCK_PSM and lines:
+        # Satu baris teks: ambil baris dengan karakter tertinggi (nomor plat, bukan masa berlaku)
+        lines = [max(lines, key=lambda items: (np.median(items[:, 3]), len(items)))]
+
+    data = {k: [] for k in ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+                            "left", "top", "width", "height", "conf", "text")}
+    if not lines:
+        return data if output_type == Output.DICT else "\t".join(data)
+    # Glyph semua baris diklasifikasi dalam satu matmul: untuk kanvas batch plate_ocr
+    # (satu baris per crop) ini satu perkalian, bukan satu per crop
+    glyphs = glyph_features(np.stack([glyph_canvas(labels[y:y + h, x:x + w] == lab)
+                                      for items in lines for x, y, w, h, lab in items]))
+    all_chars, all_scores = classify(glyphs, whitelist)
+    offset = 0
+    for line_num, items in enumerate(lines, start=1):
+        chars, scores = all_chars[offset:offset + len(items)], all_scores[offset:offset + len(items)]
+        offset += len(items)
+        gap_limit = WORD_GAP * np.median(items[:, 3])
+        starts = [0] + [i for i in range(1, len(items))
+                        if items[i, 0] - (items[i - 1, 0] + items[i - 1, 2]) > gap_limit] + [len(items)]
+        for word_num, (a, b) in enumerate(zip(starts[:-1], starts[1:]), start=1):
+            word = items[a:b]
+            x0, y0 = word[:, 0].min(), word[:, 1].min()
+            x1, y1 = (word[:, 0] + word[:, 2]).max(), (word[:, 1] + word[:, 3]).max()
+            for key, val in (("level", 5), ("page_num", 1), ("block_num", 1), ("par_num", 1),
+                             ("line_num", line_num), ("word_num", word_num),
+                             ("left", int(x0 / scale)), ("top", int(y0 / scale)),
+                             ("width", int((x1 - x0) / scale)), ("height", int((y1 - y0) / scale)),
+                             ("conf", round(float(np.clip(scores[a:b].min(), 0, 1)) * 100, 2)),
+                             ("text", "".join(chars[a:b]))):
+                data[key].append(val)
+
+    if output_type == Output.DICT:
+        return data
+    rows = ["\t".join(data)] + ["\t".join(str(data[k][i]) for k in data) for i in range(len(data["text"]))]
+    return "\n".join(rows)
+
+
+def image_to_string(image, lang=None, config="", nice=0, output_type=Output.STRING, timeout=0):
+    data = image_to_data(image, config=config, output_type=Output.DICT)
+    lines = {}
+    for line_num, word in zip(data["line_num"], data["text"]):
+        lines.setdefault(line_num, []).append(word)
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return {"text": text} if output_type == Output.DICT else text
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import cv2
+import streamlit as st
+
+import ops_metrics
+from plate_pipeline import locate_proxy, make_proxy, process_encoded
+
+
+# ================= PROXY GAMBAR UJI =================
+# st.cache_data menjalankan fungsi di thread pemanggil hanya saat miss
+_proxy_load = threading.local()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _load_proxy(file_id, _data):
+    _proxy_load.miss = True
+    return make_proxy(_data)
+
+
+def proxy_for(uploaded):
+    """(proxy BGR, skala) untuk file upload; di-decode sekali per file, bukan setiap geseran slider."""
+    _proxy_load.miss = False
+    proxy = _load_proxy(uploaded.file_id, uploaded.getvalue())
+    ops_metrics.count("proxy_cache_miss" if _proxy_load.miss else "proxy_cache_hit")
+    return proxy
+
+
+# ================= PRATINJAU PARAMETER =================
+def pipeline_preview(params, key="tune"):
+    """Tahap deteksi plate_pipeline pada proxy gambar uji, plus tombol proses resolusi penuh.
+
+    Dipanggil di dalam st.fragment bersama slider-nya, sehingga geseran slider
+    hanya menjalankan ulang fragment itu, bukan seluruh halaman.
+    """
+    uploaded = st.file_uploader("Gambar uji", type=["jpg", "jpeg", "png"], key=f"{key}_file")
+    if uploaded is None:
+        st.caption("Upload gambar uji untuk melihat pratinjau parameter.")
+        return
+    try:
+        proxy, s = proxy_for(uploaded)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    t0 = time.perf_counter()
+    out = locate_proxy(proxy, s, params)
+    ms = (time.perf_counter() - t0) * 1000
+    ops_metrics.observe("tuning", ms)
+    c1, c2, c3 = st.columns(3)
+    c1.image(out["edge"], caption="Edge", use_container_width=True)
+    c2.image(out["morph"], caption="Morfologi", use_container_width=True)
+    c3.image(cv2.cvtColor(out["box"], cv2.COLOR_BGR2RGB), caption=f"{len(out['boxes'])} kandidat plat",
+             use_container_width=True)
+    st.caption(f"Pratinjau proxy {proxy.shape[1]}x{proxy.shape[0]} (skala {s:.2f}): {ms:.0f} ms")
+
+    if st.button("Terapkan di resolusi penuh", key=f"{key}_apply"):
+        t0 = time.perf_counter()
+        full = process_encoded([uploaded.getvalue()], [params])[0]
+        ms = (time.perf_counter() - t0) * 1000
+        st.image(cv2.cvtColor(full["box"], cv2.COLOR_BGR2RGB), use_container_width=True,
+                 caption=f"Resolusi penuh: {len(full['boxes'])} plat, {ms:.0f} ms")
+        if full["boxes"]:
+            st.write(", ".join(f"{t} ({c})" for t, c in zip(full["texts"], full["confs"])))
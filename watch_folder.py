@@ -0,0 +1,226 @@
+"""Ingest otomatis dari folder kamera gerbang.
+
+Memantau sebuah folder, memproses setiap JPG/PNG baru lewat pipeline
+deteksi/OCR/wilayah (plate_pipeline.py) dengan worker pool terbatas, lalu
+menyimpan hasilnya ke riwayat `detections`. File yang sudah diproses dicatat
+di tabel `ingested_files` sehingga daemon bisa dihentikan dan dilanjutkan.
+`--fpm` hanya target untuk peringatan TERTINGGAL; pembatasan laju
+pemrosesan terpisah lewat --max-fpm (default mati), agar antrian yang
+menumpuk tetap bisa dikejar secepat worker mampu. Dengan --gate, frame yang tidak berubah di area ROI (motion_gate.py) dicatat
+sebagai "skipped" tanpa deteksi/OCR.
+
+Contoh:
+    python watch_folder.py /mnt/kamera/gerbang1 --source gerbang1 --workers 4 --fpm 120
+    python watch_folder.py /mnt/kamera/gerbang1 --gate --gate-threshold 25 --roi 0,0.4,1,0.6
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import history
+from motion_gate import DEFAULT_MIN_CHANGED, DEFAULT_THRESHOLD, MotionGate, parse_roi
+from plate_pipeline import process_encoded
+
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+POLL_INTERVAL = 2.0
+# File dianggap selesai ditulis kamera jika tidak berubah selama SETTLE_SECONDS
+SETTLE_SECONDS = 1.0
+REPORT_INTERVAL = 30.0
+# Peringatan jika file tertua yang belum diproses lebih tua dari ini (detik)
+MAX_LAG = 60.0
+
+
+def init_checkpoint(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ingested_files (
+        path TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime REAL,
+        status TEXT,
+        plates INTEGER,
+        error TEXT,
+        processed_at REAL
+    )
+    """)
+    conn.commit()
+
+
+def scan_folder(folder, seen, now):
+    """File gambar baru yang sudah stabil, diurutkan dari yang paling lama.
+
+    `seen` berisi (path, mtime, size): kamera yang menimpa nama file yang sama
+    menghasilkan versi baru yang tetap diproses.
+    """
+    found = []
+    for entry in os.scandir(folder):
+        if not entry.is_file() or not entry.name.lower().endswith(IMAGE_EXT):
+            continue
+        st = entry.stat()
+        if (entry.path, st.st_mtime, st.st_size) in seen:
+            continue
+        if now - st.st_mtime < SETTLE_SECONDS:
+            continue
+        found.append((st.st_mtime, entry.path, st.st_size))
+    found.sort()
+    return found
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def process_file(path, params, options, data=None):
+    if data is None:
+        data = read_file(path)
+    return process_encoded([data], [params], **options)[0]
+
+
+class IngestStats:
+    """Throughput dan lag selama jendela 60 detik terakhir."""
+
+    def __init__(self, target_fpm):
+        self.target_fpm = target_fpm
+        self.done_times = deque()
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def record(self, ok, now):
+        self.done_times.append(now)
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+
+    def record_skip(self, now):
+        # Frame yang dilewati gerbang tetap dihitung sebagai throughput
+        self.done_times.append(now)
+        self.skipped += 1
+
+    def fpm(self, now):
+        while self.done_times and now - self.done_times[0] > 60:
+            self.done_times.popleft()
+        return len(self.done_times)
+
+    def report(self, now, backlog, oldest_mtime):
+        lag = now - oldest_mtime if oldest_mtime else 0.0
+        fpm = self.fpm(now)
+        line = (f"[ingest] diproses={self.processed} dilewati={self.skipped} gagal={self.failed} "
+                f"fpm={fpm} target={self.target_fpm or '-'} antrian={backlog} lag={lag:.0f}s")
+        behind = backlog and (lag > MAX_LAG or (self.target_fpm and fpm < self.target_fpm))
+        if behind:
+            line += "  TERTINGGAL"
+        print(line, flush=True)
+        return behind
+
+
+def run(folder, source="watch", workers=2, fpm=0, params=None, options=None,
+        db_path=history.DB_PATH, once=False, gate=None, max_fpm=0):
+    """Loop utama daemon. `once=True` berhenti setelah folder kosong (untuk uji).
+
+    `fpm` adalah target throughput untuk laporan (di bawahnya dianggap
+    tertinggal); `max_fpm` membatasi laju submit (0 = tanpa batas).
+
+    `gate` (MotionGate) dicek di loop utama sesuai urutan waktu file; frame
+    yang dilewati tidak dikirim ke worker.
+    """
+    conn = history.connect(db_path)
+    init_checkpoint(conn)
+    seen = {tuple(row) for row in conn.execute("SELECT path, mtime, size FROM ingested_files")}
+
+    params = params or {}
+    options = options or {}
+    interval = 60.0 / max_fpm if max_fpm else 0.0
+    stats = IngestStats(fpm)
+    pending = deque()
+    in_flight = {}
+    next_submit = last_report = time.time()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            now = time.time()
+            for mtime, path, size in scan_folder(folder, seen, now):
+                seen.add((path, mtime, size))
+                pending.append((mtime, path, size))
+
+            # Batasi jumlah file di memori: paling banyak 2x jumlah worker yang sedang jalan
+            while pending and len(in_flight) < workers * 2 and time.time() >= next_submit:
+                mtime, path, size = pending.popleft()
+                data = None
+                if gate is not None:
+                    try:
+                        data = read_file(path)
+                        changed = gate.check(data)
+                    except (OSError, ValueError):
+                        # File rusak tetap diteruskan ke worker agar tercatat gagal
+                        changed = True
+                    if not changed:
+                        conn.execute("INSERT OR REPLACE INTO ingested_files VALUES (?,?,?,?,?,?,?)",
+                                     (path, size, mtime, "skipped", 0, None, time.time()))
+                        conn.commit()
+                        stats.record_skip(time.time())
+                        continue
+                in_flight[pool.submit(process_file, path, params, options, data)] = (path, size, mtime)
+                next_submit = max(next_submit, time.time()) + interval
+
+            if in_flight:
+                timeout = POLL_INTERVAL if not pending else min(POLL_INTERVAL, max(0.0, next_submit - time.time()))
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                done = ()
+                if once and not pending:
+                    break
+                time.sleep(POLL_INTERVAL if not pending else max(0.0, next_submit - time.time()))
+
+            now = time.time()
+            for fut in done:
+                path, size, mtime = in_flight.pop(fut)
+                try:
+                    out = fut.result()
+                    history.record_detections(conn, source, "", os.path.basename(path),
+                                              out["texts"], out["confs"], out["locations"], now)
+                    # Alasan penolakan gerbang kualitas dicatat di kolom error
+                    status, plates, error = "done", len(out["boxes"]), out["quality"] or None
+                except Exception as e:
+                    status, plates, error = "failed", 0, str(e)
+                conn.execute("INSERT OR REPLACE INTO ingested_files VALUES (?,?,?,?,?,?,?)",
+                             (path, size, mtime, status, plates, error, now))
+                conn.commit()
+                stats.record(status == "done", now)
+
+            if now - last_report >= REPORT_INTERVAL:
+                oldest = pending[0][0] if pending else (min(m for _, _, m in in_flight.values()) if in_flight else None)
+                stats.report(now, len(pending) + len(in_flight), oldest)
+                last_report = now
+
+    stats.report(time.time(), 0, None)
+    conn.close()
+    return stats
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pantau folder kamera dan deteksi plat secara otomatis")
+    ap.add_argument("folder")
+    ap.add_argument("--source", default="watch", help="nama kamera/sumber di riwayat")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--fpm", type=int, default=0, help="target frame per menit untuk peringatan tertinggal (0 = tanpa target)")
+    ap.add_argument("--max-fpm", type=int, default=0, help="batas laju frame per menit (0 = secepatnya)")
+    ap.add_argument("--params", help="file JSON berisi parameter deteksi")
+    ap.add_argument("--region", default="lampung", choices=["lampung", "nasional"])
+    ap.add_argument("--db", default=history.DB_PATH)
+    ap.add_argument("--once", action="store_true", help="berhenti setelah semua file diproses")
+    ap.add_argument("--gate", action="store_true", help="lewati frame yang tidak berubah (motion_gate.py)")
+    ap.add_argument("--gate-threshold", type=int, default=DEFAULT_THRESHOLD, help="selisih level piksel yang dianggap berubah")
+    ap.add_argument("--gate-min-changed", type=float, default=DEFAULT_MIN_CHANGED,
+                    help="fraksi piksel ROI yang harus berubah agar frame diproses")
+    ap.add_argument("--roi", type=parse_roi, help="area plat x,y,w,h dalam fraksi frame, mis. 0,0.4,1,0.6")
+    args = ap.parse_args()
+
+    params = json.load(open(args.params)) if args.params else {}
+    gate = MotionGate(args.gate_threshold, args.gate_min_changed, args.roi) if args.gate else None
+    run(args.folder, args.source, args.workers, args.fpm, params, {"region": args.region},
+        args.db, args.once, gate, args.max_fpm)